@@ -107,7 +107,7 @@ void sendInitialStates() {
   Serial.println("📡 Sending initial sensor states to server...");
   for(int i = 0; i < 4; i++) {
     bool currentState = digitalRead(sensorPins[i]) == LOW;
-    sendSensorUpdate(sensorIds[i], currentState, i, true);
+    sendSensorUpdate(sensorIds[i], currentState, i, true, false);
     delay(500);
   }
 }
@@ -127,7 +127,7 @@ void loop() {
     
     if(currentState != lastStates[i]) {
       // State changed - send update to server
-      sendSensorUpdate(sensorIds[i], currentState, i, false);
+      sendSensorUpdate(sensorIds[i], currentState, i, false, false);
       lastStates[i] = currentState;
       
       // Visual feedback
@@ -146,6 +146,9 @@ void loop() {
       Serial.print(sensorPins[i]);
       Serial.print("): ");
       Serial.println(lastStates[i] ? "OCCUPIED" : "VACANT");
+      
+      // The status cycle doubles as the server heartbeat
+      sendSensorUpdate(sensorIds[i], lastStates[i], i, true, true);
     }
     lastStatusTime = millis();
   }
@@ -153,7 +156,7 @@ void loop() {
   delay(300); // Small delay for stability
 }
 
-void sendSensorUpdate(String sensorId, bool isOccupied, int sensorIndex, bool isInitial) {
+void sendSensorUpdate(String sensorId, bool isOccupied, int sensorIndex, bool isInitial, bool isHeartbeat) {
   WiFiClient client;
   HTTPClient http;
   
@@ -176,6 +179,7 @@ void sendSensorUpdate(String sensorId, bool isOccupied, int sensorIndex, bool is
   StaticJsonDocument<200> doc;
   doc["sensor_id"] = sensorId;
   doc["is_occupied"] = isOccupied;
+  doc["heartbeat"] = isHeartbeat;
   
   String jsonString;
   serializeJson(doc, jsonString);
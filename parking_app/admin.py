@@ -1,5 +1,74 @@
-﻿from django.contrib import admin
-from .models import ParkingSlot, ParkingBooking
+﻿from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction, DatabaseError
+from django.db.models import Case, When, Value, F, Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .lots import current_database
+from .models import ParkingSlot, ParkingBooking, ArchivedBooking
+from .outbox import record_booking_events, record_slot_event
+from .plates import normalize_plate
+from .summaries import rebuild_days
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never runs an unbounded COUNT(*) on large tables.
+
+    Unfiltered changelists use a cheap table-size estimate; filtered ones
+    count at most COUNT_LIMIT rows.
+    """
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where:
+            estimate = self.estimate_table_rows(self.object_list)
+            if estimate is not None:
+                return estimate
+        return self.object_list[:self.COUNT_LIMIT].count()
+
+    @staticmethod
+    def estimate_table_rows(queryset):
+        """Planner statistics for the size of the queryset's table in its lot database, or None"""
+        table = queryset.model._meta.db_table
+        connection = connections[queryset.db]
+        with connection.cursor() as cursor:
+            try:
+                if connection.vendor == 'postgresql':
+                    cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+                elif connection.vendor == 'sqlite':
+                    # Populated by ANALYZE; the first number in `stat` is the row count
+                    cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s AND idx IS NULL', [table])
+                else:
+                    return None
+                row = cursor.fetchone()
+            except DatabaseError:
+                return None
+        if not row or row[0] is None:
+            return None
+        estimate = int(str(row[0]).split()[0])
+        return estimate if estimate >= 0 else None
+
+class BookingSearchMixin:
+    """Search by exact bill number or plate prefix, each a range scan on an index.
+
+    Plates are matched on the normalised `plate` column with a plain range
+    rather than LIKE, which no backend can serve from an ordinary index
+    once case folding is involved.
+    """
+    search_fields = ['bill_number', 'plate']
+    search_help_text = 'Exact bill number, or the start of a vehicle number'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        query = Q(bill_number=term)
+        plate = normalize_plate(term)
+        if plate:
+            # Plates are upper-case alphanumerics, all of which sort before '~'
+            query |= Q(plate__gte=plate, plate__lt=plate + '~')
+        return queryset.filter(query), False
 
 @admin.register(ParkingSlot)
 class ParkingSlotAdmin(admin.ModelAdmin):
@@ -8,12 +77,15 @@ class ParkingSlotAdmin(admin.ModelAdmin):
     search_fields = ['slot_number', 'sensor_id']
 
 @admin.register(ParkingBooking)
-class ParkingBookingAdmin(admin.ModelAdmin):
+class ParkingBookingAdmin(BookingSearchMixin, admin.ModelAdmin):
     list_display = ['bill_number', 'vehicle_number', 'owner_name', 'parking_slot', 
                     'status', 'total_amount', 'created_at']
-    list_filter = ['status', 'is_paid', 'created_at']
-    search_fields = ['bill_number', 'vehicle_number', 'owner_name', 'phone_number']
+    list_filter = ['status', 'is_paid']
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ['created_at']
+    actions = ['cancel_bookings', 'mark_paid', 'release_slots']
     fieldsets = [
         ('Booking Information', {
             'fields': ['bill_number', 'vehicle_number', 'owner_name', 'phone_number']
@@ -22,13 +94,100 @@ class ParkingBookingAdmin(admin.ModelAdmin):
             'fields': ['parking_slot', 'sensor_id', 'floor_number']
         }),
         ('Timing', {
-            'fields': ['booked_from', 'booked_until', 'actual_entry_time', 'actual_exit_time']
+            'fields': ['booked_from', 'booked_until', 'actual_entry_time', 'actual_exit_time', 'duration_minutes']
         }),
         ('Payment', {
-            'fields': ['status', 'total_amount', 'is_paid', 'rate_per_hour', 'free_minutes']
+            'fields': ['status', 'total_amount', 'is_paid', 'payment_method', 'payment_status',
+                       'payment_date', 'payment_reference', 'upi_transaction_id']
         }),
         ('Cancellation', {
             'fields': ['cancelled_at', 'cancellation_reason'],
             'classes': ['collapse']
         }),
-    ]
\ No newline at end of file
+    ]
+
+    # Actions update rows in bulk, bypassing save(), so each one writes the
+    # outbox events and recounts the summaries itself, in the same transaction
+
+    @admin.action(description='Cancel selected bookings and free their slots')
+    def cancel_bookings(self, request, queryset):
+        reason = 'Cancelled by admin'
+        with transaction.atomic(using=current_database()):
+            ids = list(queryset.filter(status__in=['reserved', 'active']).select_for_update().values_list('pk', flat=True))
+            bookings = ParkingBooking.objects.filter(pk__in=ids)
+            slot_numbers = list(bookings.values_list('parking_slot', flat=True).distinct())
+            days = list(bookings.dates('booked_from', 'day'))
+            cancelled = bookings.update(
+                status='cancelled',
+                cancelled_at=timezone.now(),
+                cancellation_reason=reason,
+                version=F('version') + 1
+            )
+            record_booking_events('booking.cancelled', bookings.order_by('pk'), cancellation_reason=reason)
+            rebuild_days(days)
+            freed = self._free_slots(slot_numbers)
+        self.message_user(request, f'Cancelled {cancelled} bookings and freed {freed} slots', messages.SUCCESS)
+
+    @admin.action(description='Mark selected bookings as paid')
+    def mark_paid(self, request, queryset):
+        with transaction.atomic(using=current_database()):
+            ids = list(queryset.exclude(status='cancelled').select_for_update().values_list('pk', flat=True))
+            bookings = ParkingBooking.objects.filter(pk__in=ids)
+            days = list(bookings.dates('booked_from', 'day'))
+            updated = bookings.update(
+                is_paid=True,
+                payment_status='completed',
+                payment_date=timezone.now(),
+                status=Case(When(status='completed', then=Value('paid')), default=F('status')),
+                version=F('version') + 1
+            )
+            record_booking_events('booking.paid', bookings.order_by('pk'))
+            rebuild_days(days)
+        self.message_user(request, f'Marked {updated} bookings as paid', messages.SUCCESS)
+
+    @admin.action(description='Release the slots of selected bookings')
+    def release_slots(self, request, queryset):
+        slot_numbers = set(queryset.values_list('parking_slot', flat=True))
+        with transaction.atomic(using=current_database()):
+            # A slot with an open booking is genuinely taken; cancel that booking instead
+            held = set(ParkingBooking.objects.filter(
+                parking_slot__in=slot_numbers, status__in=['reserved', 'active']
+            ).values_list('parking_slot', flat=True))
+            released = self._release(ParkingSlot.objects.filter(slot_number__in=slot_numbers - held))
+        self.message_user(request, f'Released {released} slots', messages.SUCCESS)
+        if held:
+            self.message_user(
+                request, f"Kept {len(held)} slots with open bookings: {', '.join(sorted(held))}", messages.WARNING
+            )
+
+    def _free_slots(self, slot_numbers):
+        # Keep slots that still hold another reserved booking
+        still_reserved = ParkingBooking.objects.filter(status='reserved').values('parking_slot')
+        return self._release(ParkingSlot.objects.filter(slot_number__in=slot_numbers).exclude(
+            slot_number__in=still_reserved
+        ))
+
+    def _release(self, slots):
+        slots = list(slots.select_for_update())
+        ParkingSlot.objects.filter(pk__in=[slot.pk for slot in slots]).update(is_reserved=False, is_occupied=False)
+        for slot in slots:
+            slot.is_reserved = slot.is_occupied = False
+            record_slot_event(slot)
+        return len(slots)
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(BookingSearchMixin, admin.ModelAdmin):
+    list_display = ['bill_number', 'vehicle_number', 'owner_name', 'parking_slot',
+                    'status', 'total_amount', 'created_at', 'archived_at']
+    list_filter = ['status', 'is_paid']
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['original_id', 'archived_at', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Archived rows are read-only; see ArchivedBooking.save
+        return False
@@ -3,4 +3,16 @@ from django.apps import AppConfig
 
 class ParkingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'parking_app'  # This MUST be 'parking_app' exactly
\ No newline at end of file
+    name = 'parking_app'  # This MUST be 'parking_app' exactly
+
+    def ready(self):
+        from django.core.signals import request_started
+        from . import plates, summaries  # noqa: F401 - connect the booking save signals
+        from .lots import validate_lots
+        from .warmup import warm_on_first_request
+
+        validate_lots()
+
+        # ready() must not touch the database; caches and connections are
+        # warmed by wsgi.py/asgi.py, or at the latest as serving starts
+        request_started.connect(warm_on_first_request)
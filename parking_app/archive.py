@@ -0,0 +1,115 @@
+"""Hot/cold partitioning of bookings.
+
+Paid or cancelled bookings older than BOOKING_ARCHIVE_AFTER_DAYS are moved in batches
+from ParkingBooking into ArchivedBooking, so the queries behind sensor
+updates, active bookings and cancellation only ever scan open rows.
+Read paths that need full history merge both tables.
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .lots import current_database
+from .models import BookingRecord, ParkingBooking, ArchivedBooking
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+DEFAULT_BATCH_SIZE = 1000
+
+# Every concrete column shared by the hot and archive tables
+BOOKING_FIELDS = [
+    field.name for field in BookingRecord._meta.get_fields()
+    if getattr(field, 'concrete', False) and not field.primary_key
+]
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'BOOKING_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable_bookings(cutoff):
+    """Settled bookings whose stay (or cancellation) ended before the cutoff.
+
+    Completed stays stay hot until they are paid, since archived rows are
+    read-only.
+    """
+    return ParkingBooking.objects.filter(
+        Q(booked_until__lt=cutoff) | Q(cancelled_at__lt=cutoff),
+        Q(status='cancelled') | Q(status__in=['completed', 'paid'], is_paid=True),
+    )
+
+
+def archive_batch(ids):
+    """Copy one batch of bookings to the archive and delete them from the hot table"""
+    now = timezone.now()
+    with transaction.atomic(using=current_database()):
+        bookings = list(ParkingBooking.objects.select_for_update().filter(id__in=ids))
+        ArchivedBooking.objects.bulk_create([
+            ArchivedBooking(
+                original_id=booking.id,
+                archived_at=now,
+                **{name: getattr(booking, name) for name in BOOKING_FIELDS}
+            )
+            for booking in bookings
+        ])
+        ParkingBooking.objects.filter(id__in=[booking.id for booking in bookings]).delete()
+    return len(bookings)
+
+
+def archive_closed_bookings(days=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Move closed bookings older than `days` into the archive, `batch_size` rows at a time"""
+    candidates = archivable_bookings(archive_cutoff(days)).order_by('id')
+    if dry_run:
+        return candidates.count()
+
+    archived = 0
+    while True:
+        # Each batch commits on its own so writers are never blocked for long
+        ids = list(candidates.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        archived += archive_batch(ids)
+    return archived
+
+
+def search_filter(query):
+    return (
+        Q(vehicle_number__icontains=query) |
+        Q(owner_name__icontains=query) |
+        Q(phone_number__icontains=query) |
+        Q(bill_number__icontains=query) |
+        Q(parking_slot__icontains=query)
+    )
+
+
+def merged_history(query_filter=None):
+    """Bookings from both tables, newest first, as (booking, is_archived) pairs"""
+    hot = ParkingBooking.objects.all()
+    cold = ArchivedBooking.objects.all()
+    if query_filter is not None:
+        hot = hot.filter(query_filter)
+        cold = cold.filter(query_filter)
+
+    # Both querysets are already sorted, so a streaming merge keeps memory flat
+    return heapq.merge(
+        ((booking, False) for booking in hot.order_by('-created_at').iterator()),
+        ((booking, True) for booking in cold.order_by('-created_at').iterator()),
+        key=lambda pair: pair[0].created_at,
+        reverse=True,
+    )
+
+
+def find_booking(bill_number):
+    """Look up a booking by bill number in the hot table, then the archive"""
+    try:
+        return ParkingBooking.objects.get(bill_number=bill_number)
+    except ParkingBooking.DoesNotExist:
+        try:
+            return ArchivedBooking.objects.get(bill_number=bill_number)
+        except ArchivedBooking.DoesNotExist:
+            raise ParkingBooking.DoesNotExist(f'Booking {bill_number} not found')
@@ -0,0 +1,81 @@
+"""Bill number allocation.
+
+Bill numbers look like BILL-261019-T1-000123: local date, lot code and a
+per-day sequence, so they sort by issue time and a day's or lot's bills
+are one index range scan. Each worker thread reserves a block of
+BILL_NUMBER_BLOCK_SIZE numbers with a single UPDATE on the lot's
+BillSequence and
+then hands them out from memory, so there is no database round trip per
+booking and no two workers can ever issue the same number.
+"""
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .lots import current_lot, database_for
+from .models import BillSequence
+
+DEFAULT_BLOCK_SIZE = 100
+
+
+class BillNumberAllocator:
+    def __init__(self):
+        self._local = threading.local()
+
+    def next_bill_number(self, lot_code=None):
+        lot_code = lot_code or current_lot()
+        day = timezone.localdate().strftime('%y%m%d')
+        key = f'{day}-{lot_code}'
+        return f'BILL-{key}-{self._next_value(key, database_for(lot_code)):06d}'
+
+    def _next_value(self, key, using):
+        blocks = getattr(self._local, 'blocks', None)
+        if blocks is None:
+            blocks = self._local.blocks = {}
+
+        block = blocks.get(key)
+        if block is not None and not block['confirmed'] and not self._pending(block, using):
+            # Reserved inside a transaction that has since rolled back: the
+            # counter was restored, so these numbers may be handed out again
+            block = None
+        if block is None or block['next'] >= block['end']:
+            block = blocks[key] = self._reserve_block(key, using)
+
+        value = block['next']
+        block['next'] += 1
+        return value
+
+    def _reserve_block(self, key, using):
+        size = getattr(settings, 'BILL_NUMBER_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)
+        sequences = BillSequence.objects.using(using)
+        with transaction.atomic(using=using):
+            # Write first so the row lock is taken before anything is read
+            if not sequences.filter(key=key).update(next_value=F('next_value') + size):
+                try:
+                    with transaction.atomic(using=using):
+                        sequences.create(key=key, next_value=1 + size)
+                except IntegrityError:
+                    # Another worker created the row first
+                    sequences.filter(key=key).update(next_value=F('next_value') + size)
+            end = sequences.get(key=key).next_value
+
+        block = {'next': end - size, 'end': end, 'confirmed': False}
+        block['confirm'] = lambda: block.update(confirmed=True)
+        # Runs immediately outside a transaction, or once the caller's commits
+        transaction.on_commit(block['confirm'], using=using)
+        return block
+
+    @staticmethod
+    def _pending(block, using):
+        """True while the transaction that reserved the block is still open"""
+        return any(callback is block['confirm'] for _, callback, _ in connections[using].run_on_commit)
+
+
+allocator = BillNumberAllocator()
+
+
+def next_bill_number(lot_code=None):
+    return allocator.next_bill_number(lot_code)
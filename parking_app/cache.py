@@ -0,0 +1,121 @@
+"""A cache backend on a local SQLite file, for counters every worker shares.
+
+Django's file and database caches implement incr() as a get() and a set(),
+so concurrent workers lose each other's hits. Here add(), incr() and
+decr() are each a single SQLite statement, serialised across every process
+on the host by SQLite's write lock, which is what ratelimit.py needs when
+no Memcached or Redis server is available. Limits shared across hosts
+still need one of those.
+
+Integers are stored as they are so incr() can run in SQL; anything else is
+pickled. Expired rows are purged every PURGE_EVERY writes.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = 'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value, expires REAL)'
+LIVE = '(expires IS NULL OR expires > ?)'
+# Seconds a statement waits for another process's write lock
+BUSY_TIMEOUT = 5.0
+PURGE_EVERY = 1000
+
+
+def _encode(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(value):
+    return pickle.loads(value) if isinstance(value, bytes) else value
+
+
+class SQLiteCache(BaseCache):
+    """Cache in the SQLite file at LOCATION, with atomic add()/incr()"""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, reopened in a forked child
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self._path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(SCHEMA)
+            local.connection, local.pid, local.writes = connection, os.getpid(), 0
+        return local.connection
+
+    def _write(self, sql, params):
+        connection = self._connection()
+        cursor = connection.execute(sql, params)
+        self._local.writes += 1
+        if self._local.writes % PURGE_EVERY == 0:
+            connection.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        return cursor
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            f'SELECT value FROM cache WHERE key = ? AND {LIVE}', (key, time.time())
+        ).fetchone()
+        return default if row is None else _decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, _encode(value), self.get_backend_timeout(timeout)),
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # Inserts, or replaces an expired row; a live row is left alone
+        cursor = self._write(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, _encode(value), self.get_backend_timeout(timeout), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # fetchall() steps the statement to completion, releasing the write lock
+        rows = self._write(
+            'UPDATE cache SET value = value + ? '
+            f"WHERE key = ? AND {LIVE} AND typeof(value) = 'integer' RETURNING value",
+            (delta, key, time.time()),
+        ).fetchall()
+        if not rows:
+            raise ValueError("Key '%s' not found" % key)
+        return rows[0][0]
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._write(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {LIVE}',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        ).rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._write('DELETE FROM cache WHERE key = ?', (key,)).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {LIVE}', (key, time.time())
+        ).fetchone() is not None
+
+    def clear(self):
+        self._write('DELETE FROM cache', ())
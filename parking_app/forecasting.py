@@ -0,0 +1,182 @@
+"""Demand forecasting over booking history.
+
+Bookings are turned into a slot x hour occupancy matrix with NumPy
+difference arrays (no per-hour Python loops), then per-floor seasonal
+day-of-week x hour-of-day profiles are fitted and projected forward.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedBooking, ParkingSlot, ParkingBooking
+
+BUCKET_SECONDS = 3600
+HOURS_PER_WEEK = 7 * 24
+
+# Older weeks count less when fitting the seasonal profile
+RECENCY_HALF_LIFE_WEEKS = 8
+
+
+def _epoch_seconds(values):
+    """Convert a sequence of aware datetimes to an array of epoch seconds"""
+    return np.fromiter((value.timestamp() for value in values), dtype=np.float64, count=len(values))
+
+
+def _local_offset():
+    return timezone.localtime(timezone.now()).utcoffset().total_seconds()
+
+
+def _bucket_floor(timestamp):
+    """Round an epoch timestamp down to the start of its local-time hour"""
+    offset = _local_offset()
+    return (timestamp + offset) // BUCKET_SECONDS * BUCKET_SECONDS - offset
+
+
+def _local_week_keys(bucket_starts):
+    """Map epoch bucket starts to day-of-week * 24 + hour-of-day in local time"""
+    offset = _local_offset()
+    local_hours = ((bucket_starts + offset) // BUCKET_SECONDS).astype(np.int64)
+    # 1970-01-01 was a Thursday, shift so that Monday == 0
+    day_of_week = (local_hours // 24 + 3) % 7
+    return day_of_week * 24 + local_hours % 24
+
+
+def _stays(model, start, end):
+    return (
+        model.objects
+        .filter(booked_from__lt=end)
+        .filter(Q(actual_exit_time__gt=start) | Q(actual_exit_time__isnull=True, booked_until__gt=start))
+        .exclude(status='cancelled')
+        .values_list('parking_slot', 'floor_number', 'booked_from', 'booked_until',
+                     'actual_entry_time', 'actual_exit_time')
+    )
+
+
+def load_history(start, end):
+    """Fetch the columns needed for forecasting as NumPy arrays.
+
+    Reads both the hot and archive tables, since archiving moves exactly
+    the older stays the seasonal profiles are fitted on.
+    """
+    rows = list(_stays(ParkingBooking, start, end).union(_stays(ArchivedBooking, start, end), all=True))
+    if not rows:
+        return None
+
+    slots, floors, booked_from, booked_until, entry, exit_ = zip(*rows)
+
+    # Prefer what the sensors saw, fall back to the booked window
+    starts = [e or b for e, b in zip(entry, booked_from)]
+    ends = [x or b for x, b in zip(exit_, booked_until)]
+
+    return {
+        'slots': np.array(slots),
+        'floors': np.array(floors, dtype=np.int64),
+        'starts': _epoch_seconds(starts),
+        'ends': _epoch_seconds(ends),
+    }
+
+
+def occupancy_matrix(history, start, end):
+    """Build a slot x hourly-bucket 0/1 occupancy matrix.
+
+    Returns (slot_labels, slot_floors, bucket_starts, matrix).
+    """
+    origin = _bucket_floor(start.timestamp())
+    n_buckets = int(np.ceil((end.timestamp() - origin) / BUCKET_SECONDS))
+    bucket_starts = origin + np.arange(n_buckets) * BUCKET_SECONDS
+
+    slot_labels, slot_index = np.unique(history['slots'], return_inverse=True)
+    slot_floors = np.zeros(len(slot_labels), dtype=np.int64)
+    slot_floors[slot_index] = history['floors']
+
+    # Half-open [first, last) bucket range touched by each booking
+    first = np.floor((history['starts'] - origin) / BUCKET_SECONDS).astype(np.int64)
+    last = np.ceil((history['ends'] - origin) / BUCKET_SECONDS).astype(np.int64)
+    first = np.clip(first, 0, n_buckets)
+    last = np.clip(last, 0, n_buckets)
+    keep = last > first
+
+    # Difference array: +1 where a stay starts, -1 where it ends, then cumsum
+    diff = np.zeros((len(slot_labels), n_buckets + 1), dtype=np.int32)
+    np.add.at(diff, (slot_index[keep], first[keep]), 1)
+    np.add.at(diff, (slot_index[keep], last[keep]), -1)
+    matrix = np.minimum(np.cumsum(diff[:, :-1], axis=1), 1).astype(np.uint8)
+
+    return slot_labels, slot_floors, bucket_starts, matrix
+
+
+def fit_weekly_profiles(floor_labels, floor_occupancy, bucket_starts, now):
+    """Fit a recency-weighted mean occupancy per floor for each of the 168 weekly hours"""
+    keys = _local_week_keys(bucket_starts)
+    age_weeks = (now.timestamp() - bucket_starts) / (HOURS_PER_WEEK * BUCKET_SECONDS)
+    weights = 0.5 ** (np.maximum(age_weeks, 0) / RECENCY_HALF_LIFE_WEEKS)
+
+    sums = np.zeros((HOURS_PER_WEEK, len(floor_labels)))
+    np.add.at(sums, keys, (floor_occupancy * weights).T)
+    totals = np.bincount(keys, weights=weights, minlength=HOURS_PER_WEEK)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        profiles = np.where(totals[:, None] > 0, sums / totals[:, None], 0.0)
+    return profiles.T
+
+
+def forecast_occupancy(days=7, history_days=365, now=None):
+    """Predict hourly occupied bays per floor for the next `days` days"""
+    now = now or timezone.now()
+    history_start = now - timedelta(days=history_days)
+
+    capacity = {}
+    for floor in ParkingSlot.objects.values_list('floor_number', flat=True):
+        capacity[floor] = capacity.get(floor, 0) + 1
+
+    first_bucket = _bucket_floor(now.timestamp()) + BUCKET_SECONDS
+    future_starts = first_bucket + np.arange(days * 24) * BUCKET_SECONDS
+
+    history = load_history(history_start, now)
+    if history is None:
+        floor_labels = np.array(sorted(capacity), dtype=np.int64)
+        predicted = np.zeros((len(floor_labels), len(future_starts)))
+        history_buckets = 0
+        booking_count = 0
+    else:
+        _, slot_floors, bucket_starts, matrix = occupancy_matrix(history, history_start, now)
+
+        # Collapse slots into floors: floor x bucket count of occupied bays
+        floor_labels = np.union1d(slot_floors, np.array(sorted(capacity), dtype=np.int64))
+        floor_index = np.searchsorted(floor_labels, slot_floors)
+        floor_occupancy = np.zeros((len(floor_labels), matrix.shape[1]))
+        np.add.at(floor_occupancy, floor_index, matrix)
+
+        profiles = fit_weekly_profiles(floor_labels, floor_occupancy, bucket_starts, now)
+        predicted = profiles[:, _local_week_keys(future_starts)]
+        history_buckets = int(matrix.shape[1])
+        booking_count = int(len(history['slots']))
+
+    floors = []
+    for row, floor in enumerate(floor_labels.tolist()):
+        floor_capacity = capacity.get(floor, 0)
+        hourly = []
+        for column, bucket_start in enumerate(future_starts.tolist()):
+            expected = float(predicted[row, column])
+            hourly.append({
+                'time': timezone.localtime(datetime.fromtimestamp(bucket_start, tz=dt_timezone.utc)).isoformat(),
+                'expected_occupied': round(expected, 2),
+                'occupancy_rate': round(expected / floor_capacity, 4) if floor_capacity else None,
+            })
+        floors.append({
+            'floor_number': floor,
+            'capacity': floor_capacity,
+            'peak_expected_occupied': round(float(predicted[row].max()), 2) if predicted.shape[1] else 0,
+            'hourly': hourly,
+        })
+
+    return {
+        'generated_at': now.isoformat(),
+        'history_days': history_days,
+        'history_buckets': history_buckets,
+        'bookings_used': booking_count,
+        'forecast_days': days,
+        'floors': floors,
+    }
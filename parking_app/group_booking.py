@@ -0,0 +1,215 @@
+"""Bulk group bookings packed onto as few bays as possible.
+
+Requests are sorted by start time and assigned with best-fit interval
+partitioning: each window goes to the bay that became free most recently
+before it starts, so gaps between back-to-back stays are as small as
+possible, and a new bay is only opened when no used bay fits.
+"""
+import bisect
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ArchivedBooking, ParkingSlot, ParkingBooking
+from .billing import next_bill_number
+from .plates import normalize_plate, plate_index_for
+from .outbox import record_booking_events, record_slot_event
+from .lots import current_database, current_lot
+
+MAX_GROUP_SIZE = 100
+REQUIRED_FIELDS = ['vehicle_number', 'owner_name', 'phone_number', 'booked_from', 'booked_until']
+
+
+class GroupBookingError(Exception):
+    """Raised when a group cannot be booked; carries the per-item report"""
+
+    def __init__(self, message, items, status_code=400):
+        super().__init__(message)
+        self.items = items
+        self.status_code = status_code
+
+
+def parse_iso_datetime(value):
+    """Parse an ISO-8601 string the same way create_booking does"""
+    if 'Z' in value:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    else:
+        parsed = datetime.fromisoformat(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def calculate_amount(booked_from, booked_until):
+    """₹10 per started hour, NO FREE MINUTES"""
+    duration = (booked_until - booked_from).total_seconds() / 60
+    hours = math.ceil(duration / 60)
+    return int(duration), round(float(hours) * 10.00, 2)
+
+
+def validate_items(group, items):
+    """Normalise each requested booking, returning (clean_items, report)"""
+    clean, report = [], []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            clean.append({'index': index})
+            report.append({
+                'index': index,
+                'vehicle_number': None,
+                'status': 'error',
+                'errors': ['Each booking must be an object'],
+            })
+            continue
+
+        # Group-level contact details apply unless the item overrides them
+        merged = {
+            'owner_name': group.get('owner_name'),
+            'phone_number': group.get('phone_number'),
+            'booked_from': group.get('booked_from'),
+            'booked_until': group.get('booked_until'),
+        }
+        merged.update({key: value for key, value in item.items() if value not in (None, '')})
+
+        errors = [f'{field} is required' for field in REQUIRED_FIELDS if not merged.get(field)]
+        if not errors:
+            try:
+                merged['booked_from'] = parse_iso_datetime(merged['booked_from'])
+                merged['booked_until'] = parse_iso_datetime(merged['booked_until'])
+            except (TypeError, ValueError) as e:
+                errors.append(f'Invalid datetime format: {str(e)}')
+
+        if not errors and (merged['booked_until'] - merged['booked_from']).total_seconds() < 3600:
+            errors.append('Minimum booking duration is 1 hour')
+
+        merged['index'] = index
+        clean.append(merged)
+        report.append({
+            'index': index,
+            'vehicle_number': merged.get('vehicle_number'),
+            'status': 'error' if errors else 'ok',
+            'errors': errors,
+        })
+
+    return clean, report
+
+
+def pack_intervals(items, bays):
+    """Assign each item to a bay so that no bay holds overlapping windows.
+
+    `bays` is the ordered list of free bays; bays are opened in that order.
+    Returns {item index: bay} or raises ValueError if the bays run out.
+    """
+    assignment = {}
+    # Sorted (free_from, open order, bay) for bays already used by this group
+    in_use = []
+    unopened = list(bays)
+    opened = 0
+
+    for item in sorted(items, key=lambda i: (i['booked_from'], i['booked_until'])):
+        start = item['booked_from']
+        # Best fit: the bay whose previous stay ended latest but not after this start
+        position = bisect.bisect_right(in_use, (start, math.inf)) - 1
+
+        if position >= 0:
+            _, order, bay = in_use.pop(position)
+        elif opened < len(unopened):
+            bay, order = unopened[opened], opened
+            opened += 1
+        else:
+            raise ValueError('Not enough free parking slots for this group')
+
+        assignment[item['index']] = bay
+        bisect.insort(in_use, (item['booked_until'], order, bay))
+
+    return assignment
+
+
+def create_group_booking(group, items):
+    """Validate, pack and create every booking of a group in one transaction"""
+    if not items:
+        raise GroupBookingError('At least one booking is required', [])
+    if len(items) > MAX_GROUP_SIZE:
+        raise GroupBookingError(f'A group can contain at most {MAX_GROUP_SIZE} bookings', [])
+
+    clean, report = validate_items(group, items)
+    if any(entry['status'] == 'error' for entry in report):
+        raise GroupBookingError('One or more bookings are invalid', report)
+
+    floor_number = group.get('floor_number')
+
+    database = current_database()
+    lot = current_lot()
+
+    with transaction.atomic(using=database):
+        free_slots = ParkingSlot.objects.select_for_update().filter(is_occupied=False, is_reserved=False)
+        if floor_number not in (None, ''):
+            free_slots = free_slots.filter(floor_number=floor_number)
+        bays = list(free_slots.order_by('floor_number', 'slot_number'))
+
+        try:
+            assignment = pack_intervals(clean, bays)
+        except ValueError as e:
+            for entry in report:
+                entry['status'] = 'error'
+                entry['errors'].append(str(e))
+            raise GroupBookingError(str(e), report, status_code=409)
+
+        bookings = []
+        for item in clean:
+            slot = assignment[item['index']]
+            duration_minutes, total_amount = calculate_amount(item['booked_from'], item['booked_until'])
+            bookings.append(ParkingBooking(
+                bill_number=next_bill_number(),
+                vehicle_number=item['vehicle_number'],
+                plate=normalize_plate(item['vehicle_number']),
+                owner_name=item['owner_name'],
+                phone_number=item['phone_number'],
+                parking_slot=slot.slot_number,
+                booked_from=item['booked_from'],
+                booked_until=item['booked_until'],
+                sensor_id=slot.sensor_id,
+                floor_number=slot.floor_number,
+                duration_minutes=duration_minutes,
+                total_amount=total_amount,
+                status='reserved',
+            ))
+
+        # bulk_create skips save() and post_save, so everything they would do
+        # happens here: bill numbers, plates and amounts are set above, new
+        # rows start at version 1, reserved bookings add nothing to the daily
+        # summaries, and the development-only archive check, outbox events
+        # and plate index entries follow
+        if settings.DEBUG:
+            archived = ArchivedBooking.objects.filter(bill_number__in=[b.bill_number for b in bookings])
+            if archived.exists():
+                raise IntegrityError('Bill number already archived')
+        ParkingBooking.objects.bulk_create(bookings)
+        record_booking_events('booking.created', bookings)
+        transaction.on_commit(lambda: plate_index_for(lot).update_many(bookings), using=database)
+
+        used_slot_ids = {slot.pk for slot in assignment.values()}
+        ParkingSlot.objects.filter(pk__in=used_slot_ids).update(is_reserved=True)
+        for slot in {slot.pk: slot for slot in assignment.values()}.values():
+            slot.is_reserved = True
+            record_slot_event(slot)
+
+    for entry, booking in zip(report, bookings):
+        entry.update({
+            'bill_number': booking.bill_number,
+            'parking_slot': booking.parking_slot,
+            'floor_number': booking.floor_number,
+            'booked_from': booking.booked_from.isoformat(),
+            'booked_until': booking.booked_until.isoformat(),
+            'duration_minutes': booking.duration_minutes,
+            'total_amount': booking.total_amount,
+        })
+
+    return {
+        'bookings': report,
+        'slots_used': sorted({booking.parking_slot for booking in bookings}),
+        'total_amount': round(sum(booking.total_amount for booking in bookings), 2),
+    }
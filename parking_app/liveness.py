@@ -0,0 +1,134 @@
+"""Sensor heartbeat tracking.
+
+Every reading (change or periodic heartbeat) touches the sensor in an
+in-process tracker, which only records the time. A background thread in
+each worker flushes last-seen times to ParkingSlot.last_seen_at every
+SENSOR_HEARTBEAT_FLUSH_SECONDS, so heartbeats never wait on a database
+write. A flush issues one UPDATE per second of last-seen time, in chunks
+of FLUSH_BATCH_SIZE sensors, and only moves last_seen_at forward, so a
+worker flushing late never overwrites a newer time from another one.
+Sensors are tracked per lot, and each lot is flushed to its own database.
+Staleness is read back from the column (see unhealthy_sensors), which
+covers every worker.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .lots import current_lot, database_for
+from .models import ParkingSlot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STALE_AFTER_SECONDS = 90
+DEFAULT_FLUSH_SECONDS = 15
+FLUSH_BATCH_SIZE = 500
+
+
+def stale_after_seconds():
+    return getattr(settings, 'SENSOR_STALE_AFTER_SECONDS', DEFAULT_STALE_AFTER_SECONDS)
+
+
+class HeartbeatTracker:
+    def __init__(self, flush_seconds=None):
+        self.flush_seconds = flush_seconds
+        # (lot, sensor_id) -> last-seen time not yet flushed
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def touch(self, sensor_id):
+        """Record that a sensor reported in; the background flusher writes it later"""
+        key = (current_lot(), sensor_id)
+        with self._lock:
+            self._pending[key] = time.time()
+            # Threads do not survive a fork, so each worker starts its own
+            if self._flusher_pid != os.getpid() and self.flush_interval() > 0:
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._run, name='heartbeat-flusher', daemon=True).start()
+
+    def flush_interval(self):
+        """Seconds between background flushes; 0 leaves flushing to explicit flush() calls"""
+        if self.flush_seconds is not None:
+            return self.flush_seconds
+        return getattr(settings, 'SENSOR_HEARTBEAT_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval() or DEFAULT_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing sensor heartbeats failed')
+            finally:
+                # Only this thread's connections
+                connections.close_all()
+
+    def flush(self):
+        """Write pending last-seen times to each lot's database; returns how many sensors were pending"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        by_lot = {}
+        for (lot, sensor_id), seen_at in pending.items():
+            # Whole seconds, so sensors seen in the same second share an UPDATE
+            by_lot.setdefault(lot, {}).setdefault(int(seen_at), []).append(sensor_id)
+
+        try:
+            for lot, seconds in by_lot.items():
+                slots = ParkingSlot.objects.using(database_for(lot))
+                for second, sensor_ids in seconds.items():
+                    seen_at = datetime.fromtimestamp(second, tz=dt_timezone.utc)
+                    for start in range(0, len(sensor_ids), FLUSH_BATCH_SIZE):
+                        slots.filter(
+                            Q(last_seen_at__isnull=True) | Q(last_seen_at__lt=seen_at),
+                            sensor_id__in=sensor_ids[start:start + FLUSH_BATCH_SIZE],
+                        ).update(last_seen_at=seen_at)
+        except Exception:
+            # Keep the times for the next flush, unless the sensor has reported since
+            with self._lock:
+                for key, seen_at in pending.items():
+                    self._pending[key] = max(seen_at, self._pending.get(key, seen_at))
+            raise
+        return len(pending)
+
+
+tracker = HeartbeatTracker()
+
+
+def unhealthy_sensors(stale_after=None):
+    """Stale and never-seen sensors across all workers, from the flushed last-seen column"""
+    tracker.flush()
+    stale_after = stale_after or stale_after_seconds()
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_after)
+
+    # Range scan on the last_seen_at index only touches stale rows
+    stale = ParkingSlot.objects.filter(last_seen_at__lt=cutoff).order_by('last_seen_at')
+    never_seen = ParkingSlot.objects.filter(last_seen_at__isnull=True).order_by('slot_number')
+
+    def describe(slot, state):
+        return {
+            'sensor_id': slot.sensor_id,
+            'slot_number': slot.slot_number,
+            'floor_number': slot.floor_number,
+            'state': state,
+            'last_seen_at': slot.last_seen_at.isoformat() if slot.last_seen_at else None,
+            'silent_seconds': int((now - slot.last_seen_at).total_seconds()) if slot.last_seen_at else None,
+            'is_occupied': slot.is_occupied,
+            'is_reserved': slot.is_reserved,
+        }
+
+    return {
+        'stale_after_seconds': stale_after,
+        'checked_at': now.isoformat(),
+        'stale': [describe(slot, 'stale') for slot in stale],
+        'never_seen': [describe(slot, 'never_seen') for slot in never_seen],
+    }
@@ -0,0 +1,240 @@
+"""Parking lots and the database each one lives in.
+
+Lots are configured in settings.PARKING_LOTS as
+{code: {'name': ..., 'database': alias}}. Every lot keeps its slots,
+bookings, archive and bill sequences in its own database, so lots scale
+and fail independently. The lot a request or command works on is held in
+a context variable, set from the /api/lots/<lot>/ URL prefix by
+LotMiddleware or with use_lot(), and LotRouter sends parking_app queries
+to that lot's database. Cross-lot reads run one query per lot in
+parallel threads with fan_out() and merge the results.
+
+Rows carry their lot code, but queries do not filter on it: isolation
+comes from the database alone, so validate_lots() refuses configurations
+where two lots share one.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import Count, Q, Sum
+
+DEFAULT_LOT_CODE = 'T1'
+
+_current_lot = contextvars.ContextVar('parking_lot', default=None)
+
+
+class UnknownLot(KeyError):
+    pass
+
+
+def configured_lots():
+    return getattr(settings, 'PARKING_LOTS', None) or {
+        DEFAULT_LOT_CODE: {'name': DEFAULT_LOT_CODE, 'database': DEFAULT_DB_ALIAS},
+    }
+
+
+def lot_codes():
+    return list(configured_lots())
+
+
+def default_lot():
+    return getattr(settings, 'DEFAULT_LOT', None) or lot_codes()[0]
+
+
+def current_lot():
+    """The lot being worked on; also the default for new slots and bookings"""
+    return _current_lot.get() or default_lot()
+
+
+def database_for(lot):
+    try:
+        return configured_lots()[lot].get('database', DEFAULT_DB_ALIAS)
+    except KeyError:
+        raise UnknownLot(lot)
+
+
+def current_database():
+    return database_for(current_lot())
+
+
+def lot_databases():
+    """Every database alias that holds a lot's data"""
+    return {database_for(lot) for lot in lot_codes()}
+
+
+def validate_lots():
+    """Raise ImproperlyConfigured unless every lot has a database of its own"""
+    owners = {}
+    for lot in lot_codes():
+        database = database_for(lot)
+        if database in owners:
+            raise ImproperlyConfigured(
+                f"Parking lots {owners[database]} and {lot} share the database '{database}'; "
+                f"each lot needs its own"
+            )
+        if database not in settings.DATABASES:
+            raise ImproperlyConfigured(f"Parking lot {lot} uses unknown database '{database}'")
+        owners[database] = lot
+
+
+def activate_lot(lot):
+    """Make `lot` current, returning a token for deactivate_lot()"""
+    database_for(lot)
+    return _current_lot.set(lot)
+
+
+def deactivate_lot(token):
+    _current_lot.reset(token)
+
+
+@contextmanager
+def use_lot(lot):
+    token = activate_lot(lot)
+    try:
+        yield lot
+    finally:
+        deactivate_lot(token)
+
+
+def fan_out(func, lots=None):
+    """Call func(lot) for every lot in parallel, each inside use_lot(lot).
+
+    Returns {lot: result} in configuration order. Each lot runs in its own
+    thread with its own database connection, closed when it finishes.
+    """
+    lots = list(lots or lot_codes())
+
+    def run(lot):
+        try:
+            with use_lot(lot):
+                return func(lot)
+        finally:
+            connections.close_all()
+
+    if len(lots) == 1:
+        with use_lot(lots[0]):
+            return {lots[0]: func(lots[0])}
+
+    with ThreadPoolExecutor(max_workers=len(lots)) as executor:
+        results = executor.map(run, lots)
+        return dict(zip(lots, results))
+
+
+def lot_for_bill(bill_number):
+    """The lot encoded in a BILL-<yymmdd>-<lot>-<sequence> number, if configured"""
+    parts = str(bill_number or '').split('-')
+    if len(parts) == 4 and parts[2] in configured_lots():
+        return parts[2]
+    return None
+
+
+def lot_from_body(view):
+    """Run a view in the lot encoded in the `bill_number` of its request body.
+
+    For views addressed by a bill number in the body rather than the URL,
+    so unprefixed /api/ calls reach the bill's lot instead of the default
+    one. A lot named in the URL prefix still wins.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        lot = None
+        if not getattr(request, 'lot_from_url', False) and isinstance(request.data, dict):
+            lot = lot_for_bill(request.data.get('bill_number'))
+        if lot is None:
+            return view(request, *args, **kwargs)
+        with use_lot(lot):
+            return view(request, *args, **kwargs)
+    return wrapped
+
+
+def _per_lot(func):
+    # One unreachable lot is reported instead of failing the whole fan-out
+    def run(lot):
+        try:
+            return func(lot)
+        except DatabaseError as e:
+            return {'error': str(e)}
+    return run
+
+
+def _merge(per_lot, keys):
+    totals = dict.fromkeys(keys, 0)
+    for result in per_lot.values():
+        if 'error' not in result:
+            for key in keys:
+                totals[key] += result[key]
+    return totals
+
+
+def lot_availability(lot):
+    from .models import ParkingSlot
+
+    free = Q(is_occupied=False, is_reserved=False)
+    return ParkingSlot.objects.aggregate(
+        total_slots=Count('id'),
+        available_slots=Count('id', filter=free),
+        occupied_slots=Count('id', filter=Q(is_occupied=True)),
+        reserved_slots=Count('id', filter=Q(is_occupied=False, is_reserved=True)),
+    )
+
+
+def cross_lot_availability():
+    """Slot availability of every lot, queried in parallel and merged"""
+    per_lot = fan_out(_per_lot(lot_availability))
+    keys = ['total_slots', 'available_slots', 'occupied_slots', 'reserved_slots']
+    return {
+        'lots': [
+            {'lot': lot, 'name': configured_lots()[lot].get('name', lot), **result}
+            for lot, result in per_lot.items()
+        ],
+        'totals': _merge(per_lot, keys),
+    }
+
+
+def lot_report(lot, date_from=None, date_to=None):
+    """Bookings and revenue of one lot, live and archived, by created_at range"""
+    from .models import ParkingBooking, ArchivedBooking
+
+    created = Q()
+    if date_from:
+        created &= Q(created_at__gte=date_from)
+    if date_to:
+        created &= Q(created_at__lt=date_to)
+
+    report = {'bookings': 0, 'revenue': 0.0, 'unpaid_amount': 0.0, 'by_status': {}}
+    for model in (ParkingBooking, ArchivedBooking):
+        rows = model.objects.filter(created).values('status').annotate(
+            count=Count('id'),
+            paid=Sum('total_amount', filter=Q(is_paid=True)),
+            unpaid=Sum('total_amount', filter=Q(is_paid=False) & ~Q(status='cancelled')),
+        )
+        for row in rows:
+            report['bookings'] += row['count']
+            report['revenue'] += float(row['paid'] or 0)
+            report['unpaid_amount'] += float(row['unpaid'] or 0)
+            report['by_status'][row['status']] = report['by_status'].get(row['status'], 0) + row['count']
+    return report
+
+
+def cross_lot_report(date_from=None, date_to=None):
+    """lot_report for every lot in parallel, with merged totals"""
+    per_lot = fan_out(_per_lot(lambda lot: lot_report(lot, date_from, date_to)))
+    totals = _merge(per_lot, ['bookings', 'revenue', 'unpaid_amount'])
+    totals['by_status'] = {}
+    for result in per_lot.values():
+        for status, count in result.get('by_status', {}).items():
+            totals['by_status'][status] = totals['by_status'].get(status, 0) + count
+    totals['revenue'] = round(totals['revenue'], 2)
+    totals['unpaid_amount'] = round(totals['unpaid_amount'], 2)
+    return {
+        'lots': [
+            {'lot': lot, 'name': configured_lots()[lot].get('name', lot), **result}
+            for lot, result in per_lot.items()
+        ],
+        'totals': totals,
+    }
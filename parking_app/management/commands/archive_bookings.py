@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from parking_app.archive import archive_closed_bookings, DEFAULT_BATCH_SIZE
+from parking_app.lots import lot_codes, use_lot
+
+class Command(BaseCommand):
+    help = 'Move paid or cancelled bookings older than N days from the live table into the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Archive paid or cancelled bookings older than this many days (default: BOOKING_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the bookings that would be archived')
+        parser.add_argument('--lot', action='append', help='Only archive this lot (repeatable; default: every lot)')
+
+    def handle(self, *args, **options):
+        for lot in options['lot'] or lot_codes():
+            with use_lot(lot):
+                count = archive_closed_bookings(
+                    days=options['days'],
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run']
+                )
+
+            if options['dry_run']:
+                self.stdout.write(self.style.WARNING(f'⚠️ {lot}: {count} bookings would be archived'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'🎉 {lot}: Archived {count} bookings'))
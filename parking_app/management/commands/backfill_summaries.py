@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from parking_app.lots import lot_codes, use_lot
+from parking_app.models import ParkingBooking, ArchivedBooking
+from parking_app.summaries import parse_day, rebuild_range
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized daily booking summaries from live and archived bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='First stay day to rebuild (YYYY-MM-DD; default: earliest booking)')
+        parser.add_argument('--date-to', help='Last stay day to rebuild (YYYY-MM-DD; default: latest booking)')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days rebuilt per transaction')
+        parser.add_argument('--lot', action='append', help='Only rebuild this lot (repeatable; default: every lot)')
+
+    def handle(self, *args, **options):
+        try:
+            date_from, date_to = parse_day(options['date_from']), parse_day(options['date_to'])
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        for lot in options['lot'] or lot_codes():
+            with use_lot(lot):
+                self.backfill(lot, date_from, date_to, max(options['chunk_days'], 1))
+
+        self.stdout.write(self.style.SUCCESS('🎉 Daily summaries rebuilt!'))
+
+    def backfill(self, lot, date_from, date_to, chunk_days):
+        if date_from is None or date_to is None:
+            spans = [model.objects.aggregate(first=Min('booked_from'), last=Max('booked_from'))
+                     for model in (ParkingBooking, ArchivedBooking)]
+            firsts = [span['first'] for span in spans if span['first']]
+            lasts = [span['last'] for span in spans if span['last']]
+            if not firsts:
+                self.stdout.write(self.style.WARNING(f'⚠️ {lot}: No bookings to summarise'))
+                return
+            date_from = date_from or timezone.localdate(min(firsts))
+            date_to = date_to or timezone.localdate(max(lasts))
+
+        started = time.perf_counter()
+        rows = 0
+        day = date_from
+        while day <= date_to:
+            last = min(day + timedelta(days=chunk_days - 1), date_to)
+            rows += rebuild_range(day, last)
+            day = last + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {lot}: {rows} summary rows for {date_from} to {date_to} ({time.perf_counter() - started:.2f}s)'
+        ))
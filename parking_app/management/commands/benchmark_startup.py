@@ -0,0 +1,116 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: boot the WSGI application the way a new
+# worker does, optionally warm it, then time one request through it
+FIRST_REQUEST = r'''
+import json, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+booted = time.perf_counter()
+
+from django.conf import settings
+from parking_app.warmup import warm_up
+settings.PARKING_WARMUP = sys.argv[2] == 'on'
+warm_up()
+warmed = time.perf_counter()
+
+from wsgiref.util import setup_testing_defaults
+def request():
+    environ = {'PATH_INFO': sys.argv[1], 'REQUEST_METHOD': 'GET'}
+    setup_testing_defaults(environ)
+    status = []
+    b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+    return status[0]
+
+status = request()
+first = time.perf_counter()
+request()
+second = time.perf_counter()
+print(json.dumps({
+    'status': status,
+    'boot': booted - started,
+    'warmup': warmed - booted,
+    'first_request': first - warmed,
+    'second_request': second - first,
+}))
+'''
+
+IMPORT_TIME = 'import django; django.setup(); import {urlconf}'
+
+
+class Command(BaseCommand):
+    help = 'Measure worker cold start: import time and time to first request, with and without warmup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/slots/available/', help='URL of the first request')
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh processes per measurement (median reported)')
+        parser.add_argument('--top', type=int, default=10, help='Slowest top-level packages to list')
+
+    def handle(self, *args, **options):
+        repeat = max(options['repeat'], 1)
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+
+        self.stdout.write('📦 Import time (django.setup() + URLconf)')
+        runs = [self.import_times(env) for _ in range(repeat)]
+        total = statistics.median(run[0] for run in runs)
+        self.stdout.write(self.style.SUCCESS(f'   total: {total * 1000:.0f} ms'))
+        packages = runs[-1][1]
+        for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'   {name:<24} {seconds * 1000:7.1f} ms')
+        for heavy in ('qrcode', 'PIL', 'numpy', 'brotli'):
+            if heavy in packages:
+                self.stdout.write(self.style.WARNING(f'⚠️ {heavy} is imported at startup'))
+
+        for mode in ('off', 'on'):
+            results = [self.first_request(env, options['path'], mode) for _ in range(repeat)]
+            median = {key: statistics.median(result[key] for result in results)
+                      for key in ('spawn', 'boot', 'warmup', 'first_request', 'second_request')}
+            self.stdout.write(f"\n🚀 Warmup {mode} ({results[-1]['status']} for {options['path']})")
+            self.stdout.write(f"   process start to ready: {median['spawn'] * 1000:7.1f} ms")
+            self.stdout.write(f"   application boot:       {median['boot'] * 1000:7.1f} ms")
+            self.stdout.write(f"   warmup:                 {median['warmup'] * 1000:7.1f} ms")
+            self.stdout.write(self.style.SUCCESS(f"   first request:          {median['first_request'] * 1000:7.1f} ms"))
+            self.stdout.write(f"   second request:         {median['second_request'] * 1000:7.1f} ms")
+
+    def import_times(self, env):
+        """(total seconds, {top-level package: seconds}) from python -X importtime"""
+        urlconf = settings.ROOT_URLCONF
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', IMPORT_TIME.format(urlconf=urlconf)],
+            env=env, capture_output=True, text=True
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        total, packages = 0, {}
+        for line in result.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+            package = name.strip().split('.')[0]
+            packages[package] = packages.get(package, 0) + int(self_us) / 1e6
+            if not name.startswith('  '):
+                total += int(cumulative_us) / 1e6
+        return total, packages
+
+    def first_request(self, env, path, mode):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', FIRST_REQUEST, path, mode], env=env, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        timings['spawn'] = elapsed - timings['first_request'] - timings['second_request']
+        return timings
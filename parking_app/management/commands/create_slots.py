@@ -1,10 +1,18 @@
 from django.core.management.base import BaseCommand
+from parking_app.lots import default_lot, use_lot
 from parking_app.models import ParkingSlot
 
 class Command(BaseCommand):
     help = 'Create initial parking slots with sensors'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', default=None, help='Parking lot to create the slots in (default: DEFAULT_LOT)')
+
     def handle(self, *args, **options):
+        with use_lot(options['lot'] or default_lot()) as lot:
+            self.create_slots(lot)
+
+    def create_slots(self, lot):
         slots_data = [
             {'slot_number': 'A01', 'sensor_id': 'SENSOR_001', 'floor_number': 1},
             {'slot_number': 'A02', 'sensor_id': 'SENSOR_002', 'floor_number': 1},
@@ -22,7 +30,7 @@ class Command(BaseCommand):
             )
             if created:
                 self.stdout.write(
-                    self.style.SUCCESS(f'✅ Created slot: {slot.slot_number} (Sensor: {slot.sensor_id})')
+                    self.style.SUCCESS(f'✅ Created slot: {slot.slot_number} (Sensor: {slot.sensor_id}, Lot: {lot})')
                 )
             else:
                 self.stdout.write(
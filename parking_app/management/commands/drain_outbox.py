@@ -0,0 +1,63 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from parking_app.lots import lot_codes, use_lot
+from parking_app.outbox import ConcurrentDrain, drain, prune, serialize_event
+
+class Command(BaseCommand):
+    help = 'Drain new outbox events for a consumer as JSON lines, advancing its cursor after each batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', required=True, help='Consumer name; each consumer keeps its own position')
+        parser.add_argument('--batch-size', type=int, default=500, help='Events per batch')
+        parser.add_argument('--output', help='Append events to this file instead of stdout')
+        parser.add_argument('--lot', action='append', help='Only drain this lot (repeatable; default: every lot)')
+        parser.add_argument('--follow', action='store_true', help='Keep polling for new events')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls with --follow')
+        parser.add_argument('--prune', action='store_true',
+                            help='Afterwards delete events every consumer has drained (older than OUTBOX_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        lots = options['lot'] or lot_codes()
+        sink = open(options['output'], 'a', encoding='utf-8') if options['output'] else sys.stdout
+
+        def write(events):
+            for event in events:
+                sink.write(json.dumps(serialize_event(event)) + '\n')
+            sink.flush()
+
+        total = 0
+        try:
+            while True:
+                drained = 0
+                for lot in lots:
+                    with use_lot(lot):
+                        # Keep draining a lot until it is caught up
+                        while True:
+                            count = drain(options['consumer'], options['batch_size'], write)
+                            drained += count
+                            if count < options['batch_size']:
+                                break
+                total += drained
+                if not options['follow']:
+                    break
+                if not drained:
+                    time.sleep(options['interval'])
+        except ConcurrentDrain as e:
+            raise CommandError(str(e))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if sink is not sys.stdout:
+                sink.close()
+
+        # Progress goes to stderr so stdout stays a clean event stream
+        self.stderr.write(self.style.SUCCESS(f"🎉 Drained {total} events for consumer '{options['consumer']}'"))
+
+        if options['prune']:
+            for lot in lots:
+                with use_lot(lot):
+                    deleted = prune()
+                self.stderr.write(self.style.SUCCESS(f'🧹 {lot}: Pruned {deleted} drained events'))
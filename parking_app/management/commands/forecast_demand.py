@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from parking_app.forecasting import forecast_occupancy
+from parking_app.lots import default_lot, use_lot
+
+class Command(BaseCommand):
+    help = 'Forecast per-floor parking occupancy for the coming days from booking history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Number of days to forecast')
+        parser.add_argument('--history-days', type=int, default=365, help='Days of booking history to learn from')
+        parser.add_argument('--lot', default=None, help='Parking lot to forecast (default: DEFAULT_LOT)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with use_lot(options['lot'] or default_lot()) as lot:
+            forecast = forecast_occupancy(days=options['days'], history_days=options['history_days'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"📈 {lot}: Forecast from {forecast['bookings_used']} bookings over "
+            f"{forecast['history_buckets']} hourly buckets ({elapsed:.2f}s)"
+        )
+
+        for floor in forecast['floors']:
+            self.stdout.write(self.style.SUCCESS(
+                f"\n🏢 Floor {floor['floor_number']} (capacity {floor['capacity']})"
+            ))
+
+            # Summarise the hourly forecast as a daily peak and average
+            days = {}
+            for hour in floor['hourly']:
+                days.setdefault(hour['time'][:10], []).append(hour['expected_occupied'])
+
+            for day, values in days.items():
+                peak = max(values)
+                average = sum(values) / len(values)
+                self.stdout.write(f"   {day}: peak {peak:.1f} bays, average {average:.1f} bays")
+
+        self.stdout.write(self.style.SUCCESS('🎉 Demand forecast complete!'))
@@ -0,0 +1,18 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from parking_app.lots import configured_lots, database_for, use_lot
+
+class Command(BaseCommand):
+    help = 'Apply migrations to the database of every parking lot'
+
+    def handle(self, *args, **options):
+        # Every lot has a database of its own (see lots.validate_lots)
+        lots = configured_lots()
+        for lot, config in lots.items():
+            database = database_for(lot)
+            self.stdout.write(f"🏗️ Migrating {config.get('name', lot)} ({lot}) on database '{database}'")
+            # Inside the lot so rows that predate multi-lot support get its code
+            with use_lot(lot):
+                call_command('migrate', database=database, verbosity=options['verbosity'], interactive=False)
+
+        self.stdout.write(self.style.SUCCESS(f'🎉 Migrated {len(lots)} lot databases!'))
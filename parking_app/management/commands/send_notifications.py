@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from parking_app.lots import lot_codes, use_lot
+from parking_app.notifications import deliver, schedule_due
+
+class Command(BaseCommand):
+    help = 'Queue due booking reminders and send pending notifications through the configured provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', action='append', help='Only notify for this lot (repeatable; default: every lot)')
+        parser.add_argument('--follow', action='store_true', help='Keep scanning and sending')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds between idle passes with --follow')
+        parser.add_argument('--no-scan', action='store_true', help='Only send what is already queued')
+        parser.add_argument('--no-send', action='store_true', help='Only queue due reminders')
+
+    def handle(self, *args, **options):
+        lots = options['lot'] or lot_codes()
+        totals = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'skipped': 0}
+
+        try:
+            while True:
+                busy = False
+                for lot in lots:
+                    with use_lot(lot):
+                        if not options['no_scan']:
+                            totals['queued'] += schedule_due()
+                        if not options['no_send']:
+                            # Keep sending while full batches come back
+                            while True:
+                                counts = deliver()
+                                for key, count in counts.items():
+                                    totals[key] += count
+                                if not any(counts.values()):
+                                    break
+                                busy = True
+                if not options['follow']:
+                    break
+                if not busy:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stderr.write(self.style.SUCCESS(
+            f"🎉 Queued {totals['queued']}, sent {totals['sent']}, retrying {totals['retried']}, "
+            f"failed {totals['failed']}, skipped {totals['skipped']}"
+        ))
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from parking_app.lots import default_lot, use_lot
+from parking_app.models import ParkingSlot
+from parking_app.simulator import FleetModel, Replayer, generate_events, read_log, write_log
+
+class Command(BaseCommand):
+    help = 'Simulate a fleet of parking sensors against the ingestion endpoints, or replay a recorded log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server')
+        parser.add_argument('--lot', default=None, help='Parking lot whose sensors are simulated (default: DEFAULT_LOT)')
+        parser.add_argument('--sensors', type=int, default=1000, help='Number of virtual sensors')
+        parser.add_argument('--create-slots', action='store_true', help='Create SIM slots/sensors that are missing')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same events')
+        parser.add_argument('--duration', type=int, default=3600, help='Simulated seconds')
+        parser.add_argument('--arrivals-per-hour', type=float, default=1.5, help='Base arrivals per bay per hour')
+        parser.add_argument('--flight-banks', type=int, default=3, help='Arrival surges during the run')
+        parser.add_argument('--flicker', type=float, default=0.05, help='Probability a transition flickers')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent connections')
+        parser.add_argument('--speed', type=float, default=0.0,
+                            help='Time compression factor (60 = one simulated minute per second, 0 = as fast as possible)')
+        parser.add_argument('--frames', action='store_true',
+                            help='Send sensors listed in SENSOR_GATEWAYS as binary frames')
+        parser.add_argument('--record', help='Write the generated events to this JSON lines file')
+        parser.add_argument('--replay', help='Replay events from a recorded file instead of generating them')
+        parser.add_argument('--dry-run', action='store_true', help='Generate/record events without sending them')
+
+    def handle(self, *args, **options):
+        with use_lot(options['lot'] or default_lot()) as lot:
+            self.simulate(lot, options)
+
+    def simulate(self, lot, options):
+        if options['replay']:
+            meta, events = read_log(options['replay'])
+            self.stdout.write(f"📼 Replaying {len(events)} events recorded with seed {meta.get('seed')}")
+        else:
+            sensor_ids = self.sensor_ids(options['sensors'], options['create_slots'])
+            model = FleetModel(
+                duration=options['duration'],
+                arrivals_per_hour=options['arrivals_per_hour'],
+                flicker_probability=options['flicker'],
+                flight_banks=options['flight_banks'],
+            )
+            events = generate_events(sensor_ids, model, options['seed'])
+            self.stdout.write(f'🎲 Generated {len(events)} events for {len(sensor_ids)} sensors (seed {options["seed"]})')
+
+            if options['record']:
+                meta = {key: options[key] for key in ('seed', 'duration', 'arrivals_per_hour', 'flight_banks', 'flicker')}
+                meta['sensors'] = len(sensor_ids)
+                write_log(options['record'], meta, events)
+                self.stdout.write(self.style.SUCCESS(f"✅ Recorded events to {options['record']}"))
+
+        if options['dry_run']:
+            return
+
+        gateways = {
+            gateway_id: gateway for gateway_id, gateway in getattr(settings, 'SENSOR_GATEWAYS', {}).items()
+            if gateway.get('lot', default_lot()) == lot
+        }
+        replayer = Replayer(
+            options['url'],
+            threads=options['threads'],
+            speed=options['speed'],
+            gateways=gateways if options['frames'] else None,
+            api_path=f'/api/lots/{lot}',
+        )
+        report = replayer.run(events)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🚀 Sent {report['events']} events in {report['requests']} requests over {report['seconds']:.2f}s "
+            f"({report['events_per_second']:.0f} events/s)"
+        ))
+        self.stdout.write(f"   Latency p50 {report['p50_ms']:.1f}ms, p95 {report['p95_ms']:.1f}ms, p99 {report['p99_ms']:.1f}ms")
+        if report['throttled']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {report['throttled']} requests were throttled (429); raise ADMISSION_CONTROL limits for load tests"
+            ))
+        if report['errors']:
+            self.stdout.write(self.style.WARNING(f"⚠️ {report['errors']} requests failed"))
+
+    def sensor_ids(self, count, create_slots):
+        if create_slots:
+            existing = set(ParkingSlot.objects.filter(sensor_id__startswith='SIM_').values_list('sensor_id', flat=True))
+            ParkingSlot.objects.bulk_create([
+                ParkingSlot(slot_number=f'S{i:05d}', sensor_id=f'SIM_{i:05d}', floor_number=i % 4 + 1)
+                for i in range(1, count + 1) if f'SIM_{i:05d}' not in existing
+            ])
+
+        sensor_ids = list(ParkingSlot.objects.order_by('sensor_id').values_list('sensor_id', flat=True)[:count])
+        if not sensor_ids:
+            raise CommandError('No sensors found; run create_slots or pass --create-slots')
+        return sensor_ids
@@ -0,0 +1,199 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .authentication import verified_gateway_id
+from .lots import activate_lot, configured_lots, deactivate_lot, default_lot, lot_for_bill
+from .ratelimit import acquire, counter_cache
+
+# Hashed file names never change content, so clients may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=300'
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+class StaticDeliveryMiddleware:
+    """Serve collected static files with pre-compressed variants and far-future caching.
+
+    Only active when DEBUG is off; in development runserver keeps serving
+    files straight from STATICFILES_DIRS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.static_url = settings.STATIC_URL
+        self.static_root = getattr(settings, 'STATIC_ROOT', None)
+        self._hashed_names = None
+
+    def __call__(self, request):
+        if (settings.DEBUG or not self.static_root
+                or request.method not in ('GET', 'HEAD')
+                or not request.path.startswith(self.static_url)):
+            return self.get_response(request)
+
+        response = self.serve(request, request.path[len(self.static_url):])
+        if response is None:
+            return self.get_response(request)
+        return response
+
+    @property
+    def hashed_names(self):
+        if self._hashed_names is None:
+            hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+            self._hashed_names = set(hashed_files.values())
+        return self._hashed_names
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.static_root, name)
+        except SuspiciousFileOperation:
+            return None
+
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        content_type, _ = mimetypes.guess_type(path)
+
+        # Conditional GET against the uncompressed original
+        not_modified = get_conditional_response(request, last_modified=int(stat.st_mtime))
+        if not_modified is not None:
+            not_modified['Cache-Control'] = self.cache_control(name)
+            return not_modified
+
+        encoding, served_path = self.negotiate(request, path)
+        response = FileResponse(open(served_path, 'rb'), filename=os.path.basename(path),
+                                content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = self.cache_control(name)
+        return response
+
+    def negotiate(self, request, path):
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        accepted = {token.split(';')[0].strip() for token in accept_encoding.split(',')}
+
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + suffix):
+                return encoding, path + suffix
+        return None, path
+
+    def cache_control(self, name):
+        if name in self.hashed_names:
+            return IMMUTABLE_CACHE_CONTROL
+        return DEFAULT_CACHE_CONTROL
+
+
+class AdmissionControlMiddleware:
+    """Rate-limit admission control for the API.
+
+    Every request to an API view counts against its client's limit for the
+    view's endpoint class, and against a global limit sized to worker
+    capacity. Lower-priority classes may not use the share of the global
+    limit reserved for sensor and gate traffic, so dashboard polling is
+    shed first. Rejected requests get a 429 with Retry-After before any
+    view or ORM work runs. Limits are sliding windows counted in a cache
+    every worker shares (see ratelimit.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = getattr(settings, 'ADMISSION_CONTROL', {})
+        self.enabled = self.config.get('ENABLED', False)
+        self.prefix = self.config.get('PATH_PREFIX', '/api/')
+        self.cache_alias = self.config.get('CACHE', 'default')
+        if self.enabled:
+            # Refuse a cache that would let workers overrun the limits
+            counter_cache(self.cache_alias)
+
+    def __call__(self, request):
+        if not self.enabled or not request.path_info.startswith(self.prefix):
+            return self.get_response(request)
+
+        endpoint_class = self.endpoint_class(request)
+        if endpoint_class is None:
+            return self.get_response(request)
+
+        retry_after = self.admit(endpoint_class, self.client_key(request, endpoint_class))
+        if retry_after is not None:
+            response = JsonResponse({
+                'error': 'Too many requests',
+                'endpoint_class': endpoint_class,
+                'retry_after': retry_after
+            }, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+
+        return self.get_response(request)
+
+    def endpoint_class(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        return self.config.get('ROUTES', {}).get(match.url_name, self.config.get('DEFAULT_CLASS', 'dashboard'))
+
+    def client_key(self, request, endpoint_class):
+        # Gateways share an IP behind NAT, so they are keyed by their id, but
+        # only once the signature proves the id; anything else is keyed by IP
+        gateway_id = verified_gateway_id(request)
+        if gateway_id:
+            return f'gw:{gateway_id}'
+        return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+    def admit(self, endpoint_class, client_key):
+        """Count the request against the client and global limits, or return seconds to wait"""
+        class_limits = self.config.get('CLASSES', {}).get(endpoint_class)
+        global_limits = self.config.get('GLOBAL')
+
+        buckets = []
+        if class_limits:
+            buckets.append((f'admission:{endpoint_class}:{client_key}', class_limits, 0.0))
+        if global_limits:
+            # Low-priority classes must leave this fraction of the global limit untouched
+            reserve = self.config.get('RESERVE', {}).get(endpoint_class, 0.0) * global_limits['burst']
+            buckets.append(('admission:global', global_limits, reserve))
+
+        return acquire(counter_cache(self.cache_alias), buckets)
+
+
+class LotMiddleware:
+    """Select the parking lot from the `lot` URL kwarg, or the default lot.
+
+    Unprefixed booking URLs follow the lot encoded in the bill number (views
+    taking it in the body use lots.lot_from_body). The kwarg is removed
+    before the view runs; it only selects the database that LotRouter sends
+    parking_app queries to.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            token = getattr(request, '_lot_token', None)
+            if token is not None:
+                deactivate_lot(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.lot_from_url = 'lot' in view_kwargs
+        lot = view_kwargs.pop('lot', None) or lot_for_bill(view_kwargs.get('bill_number')) or default_lot()
+        if lot not in configured_lots():
+            return JsonResponse({'error': f'Unknown parking lot: {lot}'}, status=404)
+        request.lot = lot
+        request._lot_token = activate_lot(lot)
+        return None
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bill_number', models.CharField(max_length=20, unique=True)),
+                ('vehicle_number', models.CharField(max_length=20)),
+                ('owner_name', models.CharField(max_length=100)),
+                ('phone_number', models.CharField(max_length=15)),
+                ('parking_slot', models.CharField(max_length=10)),
+                ('booked_from', models.DateTimeField()),
+                ('booked_until', models.DateTimeField()),
+                ('actual_entry_time', models.DateTimeField(blank=True, null=True)),
+                ('actual_exit_time', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('reserved', 'Reserved'), ('active', 'Active'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('paid', 'Paid')], default='reserved', max_length=10)),
+                ('duration_minutes', models.IntegerField(blank=True, null=True)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('is_paid', models.BooleanField(default=False)),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('upi', 'UPI'), ('card', 'Card'), ('wallet', 'Wallet')], default='cash', max_length=10)),
+                ('payment_status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('refunded', 'Refunded')], default='pending', max_length=10)),
+                ('payment_date', models.DateTimeField(blank=True, null=True)),
+                ('payment_reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('upi_transaction_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('sensor_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('floor_number', models.IntegerField(default=1)),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True)),
+                ('cancellation_reason', models.TextField(blank=True, null=True)),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='parkingbooking',
+            index=models.Index(fields=['parking_slot', 'status'], name='booking_slot_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parkingbooking',
+            index=models.Index(fields=['status', 'booked_until'], name='booking_status_until_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['-created_at'], name='archived_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['vehicle_number'], name='archived_vehicle_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_app', '0003_slot_last_seen'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='parkingbooking',
+            index=models.Index(fields=['created_at'], name='booking_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parkingbooking',
+            index=models.Index(fields=['vehicle_number'], name='booking_vehicle_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:52
+
+import parking_app.lots
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_app', '0006_booking_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='lot',
+            field=models.CharField(default=parking_app.lots.current_lot, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='parkingbooking',
+            name='lot',
+            field=models.CharField(default=parking_app.lots.current_lot, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='parkingslot',
+            name='lot',
+            field=models.CharField(default=parking_app.lots.current_lot, max_length=10),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:56
+
+import parking_app.lots
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_app', '0008_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot', models.CharField(default=parking_app.lots.current_lot, max_length=10)),
+                ('day', models.DateField()),
+                ('floor_number', models.IntegerField()),
+                ('payment_method', models.CharField(max_length=10)),
+                ('status', models.CharField(max_length=10)),
+                ('bookings', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('duration_minutes', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['booked_from'], name='archived_from_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parkingbooking',
+            index=models.Index(fields=['booked_from'], name='booking_from_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysummary',
+            constraint=models.UniqueConstraint(fields=('day', 'floor_number', 'payment_method', 'status'), name='daily_summary_unique'),
+        ),
+    ]
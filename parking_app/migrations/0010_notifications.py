@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:02
+
+import django.utils.timezone
+import parking_app.lots
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_app', '0009_daily_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot', models.CharField(default=parking_app.lots.current_lot, max_length=10)),
+                ('bill_number', models.CharField(max_length=32)),
+                ('kind', models.CharField(choices=[('ending', 'Booking ending'), ('no_show', 'Reservation expiring')], max_length=10)),
+                ('due_at', models.DateTimeField()),
+                ('provider', models.CharField(max_length=30)),
+                ('recipient', models.CharField(max_length=15)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bill_number', 'kind', 'due_at'), name='notification_dedup')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:16
+
+import parking_app.lots
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_app', '0010_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot', models.CharField(default=parking_app.lots.current_lot, max_length=10)),
+                ('gateway_id', models.CharField(max_length=50)),
+                ('sensor_index', models.PositiveIntegerField()),
+                ('last_sequence', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('gateway_id', 'sensor_index'), name='sensor_sequence_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:18
+
+import re
+
+from django.db import migrations, models
+
+# Same normalisation as plates.normalize_plate at the time of writing
+NON_ALPHANUMERIC = re.compile(r'[^A-Z0-9]')
+BATCH_SIZE = 1000
+
+
+def fill_plates(apps, schema_editor):
+    database = schema_editor.connection.alias
+    for model_name in ('ParkingBooking', 'ArchivedBooking'):
+        model = apps.get_model('parking_app', model_name)
+        batch = []
+        for booking in model.objects.using(database).only('id', 'vehicle_number').iterator(chunk_size=BATCH_SIZE):
+            booking.plate = NON_ALPHANUMERIC.sub('', booking.vehicle_number.upper())
+            batch.append(booking)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.using(database).bulk_update(batch, ['plate'])
+                batch = []
+        model.objects.using(database).bulk_update(batch, ['plate'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_app', '0011_sensor_sequences'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='archivedbooking',
+            name='archived_vehicle_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='parkingbooking',
+            name='booking_vehicle_idx',
+        ),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='plate',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='parkingbooking',
+            name='plate',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(fill_plates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['plate'], name='archived_plate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parkingbooking',
+            index=models.Index(fields=['plate'], name='booking_plate_idx'),
+        ),
+    ]
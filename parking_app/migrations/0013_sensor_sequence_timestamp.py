@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_app', '0012_booking_plate_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorsequence',
+            name='last_timestamp',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
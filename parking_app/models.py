@@ -1,20 +1,37 @@
-﻿from django.db import models
+﻿from django.conf import settings
+from django.db import IntegrityError, models, router, transaction
 from django.utils import timezone
-import uuid
+from .lots import current_lot
 import math
 
 class ParkingSlot(models.Model):
+    # Each lot lives in its own database (see lots.py), so slot numbers and
+    # sensor ids only have to be unique within a lot
+    lot = models.CharField(max_length=10, default=current_lot)
     slot_number = models.CharField(max_length=10, unique=True)
     floor_number = models.IntegerField(default=1)
     is_occupied = models.BooleanField(default=False)
     is_reserved = models.BooleanField(default=False)
     sensor_id = models.CharField(max_length=50, unique=True)
+    # Flushed periodically from the in-memory heartbeat tracker (see liveness.py)
+    last_seen_at = models.DateTimeField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        # last_seen_at is owned by the heartbeat tracker, so ordinary saves of
+        # an existing slot must not write back a stale copy of it
+        if not self._state.adding and 'update_fields' not in kwargs and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'last_seen_at'
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.slot_number} - {self.sensor_id}"
 
-class ParkingBooking(models.Model):
+class BookingRecord(models.Model):
+    """Fields shared by live bookings and their archived copies"""
     STATUS_CHOICES = [
         ('reserved', 'Reserved'),
         ('active', 'Active'),
@@ -38,8 +55,11 @@ class ParkingBooking(models.Model):
         ('refunded', 'Refunded'),
     ]
     
-    bill_number = models.CharField(max_length=20, unique=True)
+    lot = models.CharField(max_length=10, default=current_lot)
+    bill_number = models.CharField(max_length=32, unique=True)
     vehicle_number = models.CharField(max_length=20)
+    # vehicle_number normalised by plates.normalize_plate, for indexed search
+    plate = models.CharField(max_length=20, blank=True, default='', editable=False)
     owner_name = models.CharField(max_length=100)
     phone_number = models.CharField(max_length=15)
     parking_slot = models.CharField(max_length=10)
@@ -69,10 +89,54 @@ class ParkingBooking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     cancelled_at = models.DateTimeField(null=True, blank=True)
     cancellation_reason = models.TextField(blank=True, null=True)
+    # Bumped on every save; drives ETags for booking detail and QR responses
+    version = models.PositiveIntegerField(default=1)
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        from .plates import normalize_plate
+        from .summaries import STATE_FIELDS, remember_summary_state
+        
+        self.plate = normalize_plate(self.vehicle_number)
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        
+        if kwargs.get('update_fields') is not None:
+            # Partial saves still write the derived columns
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'plate', 'version'}
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            # Lock the stored row, so the version bump and the daily summary
+            # delta start from what is committed, not from an older copy
+            stored = type(self)._base_manager.using(using).select_for_update().only(
+                'version', *STATE_FIELDS
+            ).get(pk=self.pk)
+            self.version = stored.version + 1
+            remember_summary_state(self, stored)
+            super().save(*args, **kwargs)
+
+class ParkingBooking(BookingRecord):
+    # Statuses a booking ends in
+    CLOSED_STATUSES = ['completed', 'paid', 'cancelled']
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['parking_slot', 'status'], name='booking_slot_status_idx'),
+            models.Index(fields=['status', 'booked_until'], name='booking_status_until_idx'),
+            # Admin date hierarchy and plate search
+            models.Index(fields=['created_at'], name='booking_created_idx'),
+            models.Index(fields=['plate'], name='booking_plate_idx'),
+            # Daily summary rebuilds scan one day of stays
+            models.Index(fields=['booked_from'], name='booking_from_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.bill_number:
-            self.bill_number = f"BILL-{uuid.uuid4().hex[:8].upper()}"
+            from .billing import next_bill_number
+            self.bill_number = next_bill_number(self.lot)
         
         # Calculate amount if not set
         if self.total_amount == 0 and self.booked_from and self.booked_until:
@@ -83,6 +147,13 @@ class ParkingBooking(models.Model):
             hours = math.ceil(duration / 60)
             self.total_amount = round(float(hours) * 10.00, 2)
         
+        # The allocator never reissues a bill number, so this only checks
+        # hand-set ones, and only in development
+        if self._state.adding and settings.DEBUG:
+            database = kwargs.get('using') or router.db_for_write(ParkingBooking, instance=self)
+            if ArchivedBooking.objects.using(database).filter(bill_number=self.bill_number).exists():
+                raise IntegrityError(f'Bill number {self.bill_number} is already archived')
+        
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -90,38 +161,178 @@ class ParkingBooking(models.Model):
     
     def generate_payment_qr_data(self):
         """Generate QR code data for UPI payment"""
-        import qrcode
         import base64
-        from io import BytesIO
-        
-        # Create UPI payment URL
-        upi_id = "ravirajvibhute09@okicici"  # Replace with your actual UPI ID
-        amount = float(self.total_amount)
-        
-        # UPI payment URL format
-        upi_url = f"upi://pay?pa={upi_id}&pn=Smart%20Parking%20System&am={amount}&tn=Parking%20Bill%20{self.bill_number}"
-        
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(upi_url)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        from .qr import payment_url, render_png
         
+        upi_url = payment_url(self)
         return {
             'upi_url': upi_url,
-            'qr_code_base64': img_str,
-            'amount': amount,
+            'qr_code_base64': base64.b64encode(render_png(upi_url)).decode(),
+            'amount': float(self.total_amount),
             'bill_number': self.bill_number
-        }
\ No newline at end of file
+        }
+
+class ArchivedBooking(BookingRecord):
+    """Closed booking moved out of the hot ParkingBooking table"""
+    original_id = models.BigIntegerField(unique=True)
+    # Keep the original creation time rather than stamping the archive time
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='archived_created_idx'),
+            models.Index(fields=['plate'], name='archived_plate_idx'),
+            models.Index(fields=['booked_from'], name='archived_from_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Archived rows are final; only archive_batch writes them
+        if not self._state.adding:
+            raise ValueError('Archived bookings cannot be changed')
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.bill_number} - {self.vehicle_number} - {self.status} (archived)"
+    
+    def generate_payment_qr_data(self):
+        return ParkingBooking.generate_payment_qr_data(self)
+
+
+class BillSequence(models.Model):
+    """Per-day, per-lot bill number counter; workers reserve blocks from it"""
+    key = models.CharField(max_length=20, unique=True)
+    next_value = models.BigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.key}: {self.next_value}"
+
+
+class DailySummary(models.Model):
+    """Closed bookings pre-aggregated by stay day, floor, payment method and status.
+
+    Maintained incrementally as bookings complete, are paid or cancelled
+    (see summaries.py) and rebuilt by the `backfill_summaries` command.
+    """
+    lot = models.CharField(max_length=10, default=current_lot)
+    day = models.DateField()
+    floor_number = models.IntegerField()
+    payment_method = models.CharField(max_length=10)
+    status = models.CharField(max_length=10)
+    bookings = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    duration_minutes = models.BigIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'floor_number', 'payment_method', 'status'], name='daily_summary_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} floor {self.floor_number} {self.payment_method} {self.status}: {self.bookings}"
+
+
+class OutboxEvent(models.Model):
+    """Change event written in the same transaction as the change it describes.
+
+    The auto-increment id is the change-feed cursor.
+    """
+    lot = models.CharField(max_length=10, default=current_lot)
+    event_type = models.CharField(max_length=30)
+    # Bill number for booking events, slot number for slot events
+    key = models.CharField(max_length=32)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='outbox_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.pk} {self.event_type} {self.key}"
+
+
+class OutboxConsumer(models.Model):
+    """How far a named consumer has drained the outbox"""
+    name = models.CharField(max_length=50, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+class SensorSequence(models.Model):
+    """Latest reading applied per gateway sensor, to drop duplicates and replays.
+
+    Readings are ordered by the gateway's record timestamp, then by sequence
+    within one second (see sensors.is_newer_reading). Advanced in the same
+    transaction that applies the reading, so a reading that fails to apply
+    is not marked as seen.
+    """
+    lot = models.CharField(max_length=10, default=current_lot)
+    gateway_id = models.CharField(max_length=50)
+    sensor_index = models.PositiveIntegerField()
+    last_sequence = models.BigIntegerField()
+    # Gateway clock (epoch seconds) of the last applied reading
+    last_timestamp = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['gateway_id', 'sensor_index'], name='sensor_sequence_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.gateway_id}[{self.sensor_index}] @ {self.last_sequence}"
+
+
+class Notification(models.Model):
+    """A customer message queued by the notification scanner (see notifications.py).
+
+    One row per booking, kind and booked_until, so rescans never queue a
+    reminder twice while an extended booking gets a fresh one.
+    """
+    KIND_CHOICES = [
+        ('ending', 'Booking ending'),
+        ('no_show', 'Reservation expiring'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+    
+    lot = models.CharField(max_length=10, default=current_lot)
+    bill_number = models.CharField(max_length=32)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # booked_until when queued; the reminder is stale once it changes
+    due_at = models.DateTimeField()
+    provider = models.CharField(max_length=30)
+    recipient = models.CharField(max_length=15)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # When a pending message may be tried, or when a sending claim lapses
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bill_number', 'kind', 'due_at'], name='notification_dedup'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.bill_number} {self.kind} to {self.recipient} ({self.status})"
@@ -0,0 +1,249 @@
+"""Booking reminders, queued and sent outside the request path.
+
+The `send_notifications` command periodically scans each lot for
+bookings whose booked_until falls within the lead time, using the
+(status, booked_until) index: active bookings about to end, and
+reservations about to run out without the vehicle ever arriving. Due
+bookings are queued as Notification rows in batches; the unique
+(bill_number, kind, due_at) key makes rescans idempotent.
+
+The same command then delivers pending rows through the configured
+provider. A row is claimed with a lease before sending, so a crashed
+worker's messages are retried once the lease lapses; failures back off
+exponentially up to MAX_ATTEMPTS. Each provider's rate limit is counted
+in CACHE, which must count atomically across workers (see ratelimit.py),
+so several workers together stay under its rate. A row is claimed before
+its send is counted, so a row lost to another worker uses none of the
+rate, and a claimed row the limit refuses is handed back. Messages for
+bookings that changed since they were queued are skipped.
+"""
+import json
+import sys
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Notification, ParkingBooking
+from .ratelimit import acquire, counter_cache
+
+DEFAULTS = {
+    'PROVIDER': 'console',
+    'PROVIDERS': {
+        'console': {'BACKEND': 'parking_app.notifications.ConsoleProvider'},
+    },
+    'CACHE': 'default',
+    'ENDING_LEAD_MINUTES': 15,
+    'NO_SHOW_LEAD_MINUTES': 15,
+    'BATCH_SIZE': 200,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_SECONDS': 60,
+    'LEASE_SECONDS': 300,
+}
+
+# kind: (booking status it applies to, lead time setting)
+KINDS = {
+    'ending': ('active', 'ENDING_LEAD_MINUTES'),
+    'no_show': ('reserved', 'NO_SHOW_LEAD_MINUTES'),
+}
+
+
+class NotificationError(Exception):
+    """A send that may succeed if retried later"""
+
+
+class RejectedNotification(NotificationError):
+    """A send the provider will never accept, e.g. an invalid number"""
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'NOTIFICATIONS', {})}
+
+
+class NotificationProvider:
+    """Base class for SMS/push gateways; subclasses implement send()"""
+
+    def __init__(self, name, options):
+        self.name = name
+        self.options = options
+
+    def send(self, recipient, message):
+        raise NotImplementedError
+
+
+class ConsoleProvider(NotificationProvider):
+    """Writes messages to stdout, for development"""
+
+    def send(self, recipient, message):
+        sys.stdout.write(f'📨 [{self.name}] to {recipient}: {message}\n')
+        sys.stdout.flush()
+
+
+class FileProvider(NotificationProvider):
+    """Appends messages to a JSON-lines file at options['PATH'], for tests"""
+
+    def send(self, recipient, message):
+        with open(self.options['PATH'], 'a', encoding='utf-8') as sink:
+            sink.write(json.dumps({
+                'provider': self.name,
+                'recipient': recipient,
+                'message': message,
+                'sent_at': timezone.now().isoformat(),
+            }) + '\n')
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name):
+    with _providers_lock:
+        if name not in _providers:
+            options = config()['PROVIDERS'][name]
+            _providers[name] = import_string(options['BACKEND'])(name, options)
+        return _providers[name]
+
+
+def take_token(provider_name):
+    """Count one send against the provider's shared rate limit; False when it is used up"""
+    limits = config()['PROVIDERS'].get(provider_name, {}).get('RATE_LIMIT')
+    if not limits:
+        return True
+    buckets = [(f'notification:{provider_name}', limits, 0.0)]
+    return acquire(counter_cache(config()['CACHE']), buckets) is None
+
+
+def render_message(kind, booking):
+    until = timezone.localtime(booking['booked_until']).strftime('%H:%M')
+    if kind == 'ending':
+        return (f"Parking {booking['bill_number']}: your booking for {booking['vehicle_number']} "
+                f"at slot {booking['parking_slot']} ends at {until}.")
+    return (f"Parking {booking['bill_number']}: your reservation of slot {booking['parking_slot']} "
+            f"for {booking['vehicle_number']} ends at {until} and you have not checked in yet.")
+
+
+def due_bookings(kind, now=None):
+    """Bookings the reminder of this kind is due for, soonest first"""
+    status, lead_setting = KINDS[kind]
+    now = now or timezone.now()
+    return ParkingBooking.objects.filter(
+        status=status,
+        booked_until__gt=now,
+        booked_until__lte=now + timedelta(minutes=config()[lead_setting]),
+    ).exclude(phone_number='').order_by('booked_until', 'pk')
+
+
+def schedule_due(now=None):
+    """Queue every due reminder of the current lot; returns how many were new"""
+    options = config()
+    queued = 0
+    for kind in KINDS:
+        bookings = due_bookings(kind, now).values(
+            'bill_number', 'vehicle_number', 'parking_slot', 'phone_number', 'booked_until'
+        )
+        batch = []
+        for booking in bookings.iterator(chunk_size=options['BATCH_SIZE']):
+            batch.append(booking)
+            if len(batch) >= options['BATCH_SIZE']:
+                queued += _queue(kind, batch, options['PROVIDER'])
+                batch = []
+        if batch:
+            queued += _queue(kind, batch, options['PROVIDER'])
+    return queued
+
+
+def _queue(kind, bookings, provider):
+    existing = set(Notification.objects.filter(
+        kind=kind, bill_number__in=[booking['bill_number'] for booking in bookings]
+    ).values_list('bill_number', 'due_at'))
+    new = [
+        Notification(
+            bill_number=booking['bill_number'], kind=kind, due_at=booking['booked_until'],
+            provider=provider, recipient=booking['phone_number'], message=render_message(kind, booking),
+        )
+        for booking in bookings
+        if (booking['bill_number'], booking['booked_until']) not in existing
+    ]
+    # A concurrent scanner may have queued the same rows in the meantime
+    Notification.objects.bulk_create(new, ignore_conflicts=True)
+    return len(new)
+
+
+def _claim(notification, now, lease_seconds):
+    """Lease a due row for sending; False if another worker got it first"""
+    return Notification.objects.filter(
+        pk=notification.pk, status=notification.status, next_attempt_at=notification.next_attempt_at
+    ).update(
+        status='sending', attempts=F('attempts') + 1, next_attempt_at=now + timedelta(seconds=lease_seconds)
+    ) == 1
+
+
+def _release(notification):
+    """Hand a claimed row back untouched, e.g. when the provider's rate is used up"""
+    Notification.objects.filter(pk=notification.pk, status='sending').update(
+        status=notification.status, attempts=notification.attempts, next_attempt_at=notification.next_attempt_at
+    )
+
+
+def _still_due(notification, bookings, now):
+    # Cancelled, arrived, extended, archived, or simply too late to be useful
+    booking = bookings.get(notification.bill_number)
+    return notification.due_at > now and booking == (KINDS[notification.kind][0], notification.due_at)
+
+
+def deliver(now=None):
+    """Send one batch of due notifications of the current lot.
+
+    Returns counts of sent, retried, failed and skipped messages. Providers
+    whose rate limit is used up are left for the next call.
+    """
+    options = config()
+    now = now or timezone.now()
+    # Pending rows whose retry time has come, and sending rows whose lease lapsed
+    due = list(Notification.objects.filter(
+        status__in=['pending', 'sending'], next_attempt_at__lte=now
+    ).order_by('next_attempt_at')[:options['BATCH_SIZE']])
+    bookings = {
+        bill_number: (status, booked_until)
+        for bill_number, status, booked_until in ParkingBooking.objects.filter(
+            bill_number__in={notification.bill_number for notification in due}
+        ).values_list('bill_number', 'status', 'booked_until')
+    }
+
+    counts = {'sent': 0, 'retried': 0, 'failed': 0, 'skipped': 0}
+    throttled = set()
+    for notification in due:
+        if notification.provider in throttled:
+            continue
+        if not _still_due(notification, bookings, now):
+            Notification.objects.filter(pk=notification.pk, status=notification.status).update(status='skipped')
+            counts['skipped'] += 1
+            continue
+        if not _claim(notification, now, options['LEASE_SECONDS']):
+            continue
+        if not take_token(notification.provider):
+            _release(notification)
+            throttled.add(notification.provider)
+            continue
+
+        attempts = notification.attempts + 1
+        try:
+            get_provider(notification.provider).send(notification.recipient, notification.message)
+        except Exception as e:
+            if attempts >= options['MAX_ATTEMPTS'] or isinstance(e, RejectedNotification):
+                update = {'status': 'failed'}
+                counts['failed'] += 1
+            else:
+                retry_at = timezone.now() + timedelta(seconds=options['RETRY_SECONDS'] * 2 ** (attempts - 1))
+                update = {'status': 'pending', 'next_attempt_at': retry_at}
+                counts['retried'] += 1
+            Notification.objects.filter(pk=notification.pk).update(last_error=str(e)[:1000], **update)
+            continue
+
+        Notification.objects.filter(pk=notification.pk).update(status='sent', sent_at=timezone.now(), last_error='')
+        counts['sent'] += 1
+
+    return counts
@@ -0,0 +1,154 @@
+"""Transactional outbox for booking and slot changes.
+
+State-changing code records a compact OutboxEvent in the same transaction
+as the change, so an event exists exactly when its change was committed.
+Consumers tail a lot's events by id, either through the change-feed
+endpoint (`?after=<cursor>`) or with the `drain_outbox` command, which
+keeps a per-consumer position in OutboxConsumer.
+
+Ids are handed out at insert but become visible at commit. On databases
+with concurrent writers set OUTBOX_SETTLE_SECONDS so a reader never moves
+past an id whose transaction is still open; SQLite serialises writers.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .lots import current_database
+from .models import OutboxEvent, OutboxConsumer
+
+DEFAULT_FEED_LIMIT = 100
+MAX_FEED_LIMIT = 1000
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_SETTLE_SECONDS = 0
+
+
+class ConcurrentDrain(Exception):
+    """Another drainer moved the consumer's position underneath us"""
+
+
+def _timestamp(value):
+    return value.isoformat() if value else None
+
+
+def booking_payload(booking):
+    return {
+        'bill_number': booking.bill_number,
+        'status': booking.status,
+        'vehicle_number': booking.vehicle_number,
+        'parking_slot': booking.parking_slot,
+        'floor_number': booking.floor_number,
+        'booked_from': _timestamp(booking.booked_from),
+        'booked_until': _timestamp(booking.booked_until),
+        'total_amount': float(booking.total_amount),
+        'is_paid': booking.is_paid,
+        'version': booking.version,
+    }
+
+
+def record_booking_event(event_type, booking, **extra):
+    """Record a booking change; call inside the transaction that saved it"""
+    return OutboxEvent.objects.using(booking._state.db).create(
+        lot=booking.lot, event_type=event_type, key=booking.bill_number,
+        payload={**booking_payload(booking), **extra}
+    )
+
+
+def record_booking_events(event_type, bookings, **extra):
+    """Bulk variant for bookings changed together, e.g. a group booking or an admin action"""
+    return OutboxEvent.objects.using(current_database()).bulk_create([
+        OutboxEvent(lot=booking.lot, event_type=event_type, key=booking.bill_number,
+                    payload={**booking_payload(booking), **extra})
+        for booking in bookings
+    ])
+
+
+def record_slot_event(slot):
+    """Record a slot occupancy/reservation change"""
+    return OutboxEvent.objects.using(slot._state.db).create(
+        lot=slot.lot, event_type='slot.updated', key=slot.slot_number,
+        payload={
+            'slot_number': slot.slot_number,
+            'floor_number': slot.floor_number,
+            'sensor_id': slot.sensor_id,
+            'is_occupied': slot.is_occupied,
+            'is_reserved': slot.is_reserved,
+        }
+    )
+
+
+def serialize_event(event):
+    return {
+        'id': event.pk,
+        'lot': event.lot,
+        'type': event.event_type,
+        'key': event.key,
+        'created_at': event.created_at.isoformat(),
+        'payload': event.payload,
+    }
+
+
+def read_events(after=0, limit=DEFAULT_FEED_LIMIT, types=None):
+    """Events with id > after, oldest first; a primary-key range scan"""
+    events = OutboxEvent.objects.filter(pk__gt=after)
+    settle = getattr(settings, 'OUTBOX_SETTLE_SECONDS', DEFAULT_SETTLE_SECONDS)
+    if settle:
+        events = events.filter(created_at__lte=timezone.now() - timedelta(seconds=settle))
+    if types:
+        # 'booking' matches booking.created, booking.paid, ...
+        matches = Q()
+        for event_type in types:
+            matches |= Q(event_type=event_type) if '.' in event_type else Q(event_type__startswith=f'{event_type}.')
+        events = events.filter(matches)
+    return list(events.order_by('pk')[:limit])
+
+
+def change_feed(after=0, limit=DEFAULT_FEED_LIMIT, types=None):
+    """One page of the change feed plus the cursor to resume from"""
+    limit = max(1, min(limit, MAX_FEED_LIMIT))
+    # Fetch one extra row to know whether another page is waiting
+    events = read_events(after, limit + 1, types)
+    has_more = len(events) > limit
+    events = events[:limit]
+    return {
+        'events': [serialize_event(event) for event in events],
+        'next_cursor': events[-1].pk if events else after,
+        'has_more': has_more,
+    }
+
+
+def drain(consumer_name, batch_size, handle):
+    """Hand the consumer's next batch to handle(events), then advance its position.
+
+    The position only moves after handle() returns, so delivery is
+    at-least-once. Returns the number of events drained.
+    """
+    consumer, _ = OutboxConsumer.objects.get_or_create(name=consumer_name)
+    events = read_events(consumer.position, batch_size)
+    if not events:
+        return 0
+
+    handle(events)
+
+    with transaction.atomic(using=current_database()):
+        moved = OutboxConsumer.objects.filter(pk=consumer.pk, position=consumer.position).update(
+            position=events[-1].pk, updated_at=timezone.now()
+        )
+        if not moved:
+            raise ConcurrentDrain(f'Consumer {consumer_name} was drained concurrently')
+    return len(events)
+
+
+def prune(retention_days=None):
+    """Delete events every consumer has drained and that are older than the retention"""
+    if retention_days is None:
+        retention_days = getattr(settings, 'OUTBOX_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    positions = list(OutboxConsumer.objects.values_list('position', flat=True))
+    if not positions:
+        return 0
+    deleted, _ = OutboxEvent.objects.filter(pk__lte=min(positions), created_at__lt=cutoff).delete()
+    return deleted
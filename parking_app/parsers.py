@@ -0,0 +1,56 @@
+import struct
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+# Frame layout (big endian):
+#   header  : version (u8), record count (u16)
+#   records : sensor index (u16), state (u8), sequence (u32), timestamp (u32)
+# A four-sensor update is 3 + 4 * 11 = 47 bytes, versus ~50 bytes of JSON per sensor.
+FRAME_VERSION = 1
+HEADER = struct.Struct('>BH')
+RECORD = struct.Struct('>HBII')
+MAX_RECORDS = 4096
+
+
+class SensorFrameParser(BaseParser):
+    """Decode packed binary sensor frames sent by constrained gateways"""
+    media_type = 'application/vnd.parking.sensor-frame'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read() if stream is not None else b''
+        return decode_frame(body)
+
+
+def decode_frame(body):
+    if len(body) < HEADER.size:
+        raise ParseError('Sensor frame is too short')
+
+    version, count = HEADER.unpack_from(body, 0)
+    if version != FRAME_VERSION:
+        raise ParseError(f'Unsupported sensor frame version {version}')
+    if count > MAX_RECORDS:
+        raise ParseError(f'Sensor frame has more than {MAX_RECORDS} records')
+    if len(body) != HEADER.size + count * RECORD.size:
+        raise ParseError('Sensor frame length does not match its record count')
+
+    records = [
+        {
+            'sensor_index': sensor_index,
+            'is_occupied': bool(state),
+            'sequence': sequence,
+            'timestamp': timestamp,
+        }
+        for sensor_index, state, sequence, timestamp in RECORD.iter_unpack(body[HEADER.size:])
+    ]
+    return {'version': version, 'records': records}
+
+
+def encode_frame(records):
+    """Build a frame from (sensor_index, is_occupied, sequence, timestamp) tuples"""
+    parts = [HEADER.pack(FRAME_VERSION, len(records))]
+    parts.extend(
+        RECORD.pack(sensor_index, int(bool(is_occupied)), sequence, timestamp)
+        for sensor_index, is_occupied, sequence, timestamp in records
+    )
+    return b''.join(parts)
@@ -0,0 +1,151 @@
+"""In-process index of vehicle plates to open bookings, for gate barriers.
+
+Plate readers report plates with arbitrary spacing and case, so plates are
+normalised to upper-case alphanumerics. The index maps a normalised plate
+to the bill numbers of its open bookings (reserved, active, or completed
+but unpaid) and is warmed from the database once per process, then kept
+current by the save signal and group bookings. Each lot has its own
+index over its own database. A hit is always re-checked
+with one lookup on the unique bill_number index, so entries made stale by
+other workers or set-based updates are dropped on read; a miss, or a hit
+whose entries all turn out stale, only scans bookings created around or
+after the last sync, which picks up other workers' new bookings by
+primary key.
+"""
+import re
+import threading
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .lots import current_lot, database_for
+from .models import ParkingBooking
+
+OPEN_STATUSES = ['reserved', 'active']
+# Rows just below the high-water mark are rescanned in case they were
+# still uncommitted in another worker when a later row was seen
+SYNC_OVERLAP = 200
+_NON_ALPHANUMERIC = re.compile(r'[^A-Z0-9]')
+
+
+def normalize_plate(plate):
+    return _NON_ALPHANUMERIC.sub('', str(plate or '').upper())
+
+
+def is_open(booking):
+    """Still relevant at a gate: not yet left, or left without paying"""
+    return booking.status in OPEN_STATUSES or (booking.status == 'completed' and not booking.is_paid)
+
+
+def open_bookings(lot):
+    return ParkingBooking.objects.using(database_for(lot)).filter(Q(status__in=OPEN_STATUSES) | Q(status='completed', is_paid=False))
+
+
+class PlateIndex:
+    def __init__(self, lot):
+        self.lot = lot
+        self._bills = {}
+        self._high_water = 0
+        self._warm = False
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """Load every open booking; safe to call more than once"""
+        with self._lock:
+            if self._warm:
+                return
+            self._bills = {}
+            self._high_water = 0
+            self._sync(open_bookings(self.lot))
+            self._warm = True
+
+    def _sync(self, bookings):
+        # Caller holds the lock
+        for pk, bill_number, vehicle_number in bookings.values_list('pk', 'bill_number', 'vehicle_number').iterator():
+            self._bills.setdefault(normalize_plate(vehicle_number), set()).add(bill_number)
+            self._high_water = max(self._high_water, pk)
+
+    def sync_new(self):
+        """Pick up bookings created since the last sync, e.g. by other workers"""
+        self.warm()
+        with self._lock:
+            self._sync(open_bookings(self.lot).filter(pk__gt=self._high_water - SYNC_OVERLAP))
+
+    def update(self, booking):
+        """Add or drop a booking after it was saved"""
+        if not self._warm:
+            return
+        plate = normalize_plate(booking.vehicle_number)
+        with self._lock:
+            if is_open(booking):
+                self._bills.setdefault(plate, set()).add(booking.bill_number)
+                if booking.pk:
+                    self._high_water = max(self._high_water, booking.pk)
+            else:
+                self._discard(plate, booking.bill_number)
+
+    def update_many(self, bookings):
+        """Add bookings created without save(), e.g. by bulk_create"""
+        for booking in bookings:
+            self.update(booking)
+
+    def _discard(self, plate, bill_number):
+        bills = self._bills.get(plate)
+        if bills is not None:
+            bills.discard(bill_number)
+            if not bills:
+                del self._bills[plate]
+
+    def lookup(self, plate):
+        """Open bookings for a plate, oldest first, verified against the database"""
+        self.warm()
+        plate = normalize_plate(plate)
+        if not plate:
+            return []
+        bookings = self._verified(plate)
+        if not bookings:
+            # Another worker may have booked this plate since the last sync
+            self.sync_new()
+            bookings = self._verified(plate)
+        return bookings
+
+    def _verified(self, plate):
+        with self._lock:
+            bills = set(self._bills.get(plate, ()))
+        if not bills:
+            return []
+
+        bookings = []
+        for booking in open_bookings(self.lot).filter(bill_number__in=bills):
+            if is_open(booking) and normalize_plate(booking.vehicle_number) == plate:
+                bookings.append(booking)
+                bills.discard(booking.bill_number)
+        with self._lock:
+            # Whatever did not verify was closed, archived or re-plated elsewhere
+            for bill_number in bills:
+                self._discard(plate, bill_number)
+        return sorted(bookings, key=lambda b: (b.booked_from, b.pk))
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(bills) for bills in self._bills.values())
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def plate_index_for(lot=None):
+    lot = lot or current_lot()
+    with _indexes_lock:
+        if lot not in _indexes:
+            _indexes[lot] = PlateIndex(lot)
+        return _indexes[lot]
+
+
+@receiver(post_save, sender=ParkingBooking, dispatch_uid='plate_index_update')
+def update_plate_index(sender, instance, using, **kwargs):
+    # Only once the write is durable, so a rolled-back cancel doesn't drop the entry
+    transaction.on_commit(lambda: plate_index_for(instance.lot).update(instance), using=using)
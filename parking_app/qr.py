@@ -0,0 +1,34 @@
+"""UPI payment QR codes.
+
+qrcode, and PIL behind it, is only imported when the first code is
+rendered, so workers that never serve a QR don't load it at boot.
+"""
+from io import BytesIO
+
+UPI_ID = "ravirajvibhute09@okicici"  # Replace with your actual UPI ID
+PAYEE_NAME = 'Smart Parking System'
+
+
+def payment_url(booking):
+    """UPI payment URL: upi://pay?pa=UPI_ID&pn=MerchantName&am=Amount&tn=TransactionNote"""
+    amount = float(booking.total_amount)
+    return f"upi://pay?pa={UPI_ID}&pn=Smart%20Parking%20System&am={amount}&tn=Parking%20Bill%20{booking.bill_number}"
+
+
+def render_png(data):
+    """Render `data` as a QR code PNG and return the bytes"""
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -0,0 +1,101 @@
+"""Sliding-window rate limits on atomic cache counters.
+
+A limit of `rate` hits per second with a `burst` allowance counts hits in
+windows of burst / rate seconds. A hit is admitted while the current
+window's count, plus the previous window's weighted by how much of it the
+trailing window still covers, stays within the burst. Like a token bucket
+this frees room at about `rate` hits per second once traffic stops, and
+unlike plain fixed windows it does not admit a second full burst just
+after a window boundary. It assumes the previous window's hits were
+spread evenly, so a burst packed into its last moments is under-weighted.
+
+Each hit is a cache.add() that creates the window's counter if needed and
+a cache.incr(), so concurrent workers never lose an update the way a
+read-modify-write bucket does. That takes a cache whose incr() is atomic
+and which every worker shares: Memcached, Redis, or parking_app.cache's
+SQLite cache on a single host; counter_cache() refuses backends whose
+incr() is a get() and a set(). Hits that a limit turns away are handed
+back with decr(), so rejected requests use no quota.
+"""
+import math
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+# Counters outlive the window after theirs by this much, so a late read still finds them
+EXPIRY_SLACK = 5
+
+
+def counter_cache(alias):
+    """The cache `alias`, provided it can count hits atomically"""
+    cache = caches[alias]
+    if type(cache).incr is BaseCache.incr:
+        raise ImproperlyConfigured(
+            f"Cache '{alias}' cannot hold rate limits: its incr() is not atomic. "
+            "Use Memcached, Redis or parking_app.cache.SQLiteCache."
+        )
+    return cache
+
+
+def window_seconds(limits):
+    return max(limits['burst'] / limits['rate'], 1.0)
+
+
+def _counter(key, index):
+    return f'ratelimit:{key}:{index}'
+
+
+def _count(cache, counter, window):
+    """Add one hit to `counter`; returns the new count"""
+    timeout = math.ceil(2 * window) + EXPIRY_SLACK
+    cache.add(counter, 0, timeout)
+    try:
+        return cache.incr(counter)
+    except ValueError:
+        # Evicted between add() and incr(); start the window over
+        cache.set(counter, 1, timeout)
+        return 1
+
+
+def _wait(held, previous, allowed, window, offset):
+    """Seconds until `held` hits in this window and `previous` in the last leave room for one more"""
+    remaining = window - offset
+    excess = held + previous * remaining / window - allowed
+    if previous and excess <= previous * remaining / window:
+        return excess * window / previous
+    if held <= allowed:
+        return remaining
+    # This window's hits become the previous window's and fade in turn
+    return min(remaining + window * (1 - max(allowed, 0) / held), remaining + window)
+
+
+def acquire(cache, buckets, now=None):
+    """Count one hit in every (key, limits, reserve) bucket, all or nothing.
+
+    A bucket admits the hit while its sliding count stays within
+    burst - reserve, so low-priority callers can be kept out of the top of
+    a shared limit. Returns None when admitted, otherwise whole seconds
+    until the bucket that refused the hit has room again.
+    """
+    now = time.time() if now is None else now
+    taken = []
+    for key, limits, reserve in buckets:
+        window = window_seconds(limits)
+        index = int(now // window)
+        offset = now - index * window
+        counter = _counter(key, index)
+        count = _count(cache, counter, window)
+        taken.append(counter)
+        previous = cache.get(_counter(key, index - 1), 0)
+        limit = limits['burst'] - reserve
+        if count + previous * (window - offset) / window > limit:
+            for counter in taken:
+                try:
+                    cache.decr(counter)
+                except ValueError:
+                    pass
+            # Rounded so float noise never adds a whole second
+            return max(1, math.ceil(round(_wait(count - 1, previous, limit - 1, window, offset), 6)))
+    return None
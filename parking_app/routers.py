@@ -0,0 +1,35 @@
+from .lots import current_database, database_for, lot_databases
+
+APP_LABEL = 'parking_app'
+
+
+class LotRouter:
+    """Route parking_app models to the current lot's database.
+
+    Saving an instance follows its own `lot`, so a booking is always written
+    where it belongs. Everything else (auth, admin, sessions) stays on the
+    default database.
+    """
+
+    def _database(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return None
+        instance = hints.get('instance')
+        lot = getattr(instance, 'lot', None)
+        if lot:
+            return database_for(lot)
+        return current_database()
+
+    db_for_read = _database
+    db_for_write = _database
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if APP_LABEL in (obj1._meta.app_label, obj2._meta.app_label):
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == APP_LABEL:
+            return db in lot_databases()
+        # Only the default database carries the shared Django apps
+        return db == 'default'
@@ -0,0 +1,177 @@
+"""Applying sensor readings to slots and bookings.
+
+Shared by the JSON `sensor_data` endpoint and the compact binary
+`sensor_frame` endpoint used by gateways.
+"""
+import math
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ParkingSlot, ParkingBooking, SensorSequence
+from .liveness import tracker as heartbeat_tracker
+from .lots import current_database, current_lot, use_lot
+from .outbox import record_booking_event, record_slot_event
+
+# Sequence numbers are u32 on the wire and wrap around
+SEQUENCE_MODULUS = 2 ** 32
+
+
+def apply_sensor_state(slot, is_occupied):
+    """Update a slot from a sensor reading and start/complete its booking"""
+    with transaction.atomic(using=current_database()):
+        # Lock the slot, then its booking: the same order as the gates, so
+        # a sensor and a gate never both start or complete one booking
+        slot.refresh_from_db(from_queryset=ParkingSlot.objects.select_for_update())
+        changed = slot.is_occupied != is_occupied
+        
+        # Update slot status; most readings repeat the current state
+        if changed:
+            slot.is_occupied = is_occupied
+            slot.save(update_fields=['is_occupied'])
+        
+        # Handle vehicle entry
+        if is_occupied:
+            # Find active booking for this slot
+            active_booking = ParkingBooking.objects.select_for_update().filter(
+                parking_slot=slot.slot_number,
+                status='reserved',
+                booked_from__lte=timezone.now(),
+                booked_until__gte=timezone.now()
+            ).first()
+            
+            if active_booking:
+                active_booking.status = 'active'
+                active_booking.actual_entry_time = timezone.now()
+                active_booking.save()
+                record_booking_event('booking.started', active_booking)
+                
+        # Handle vehicle exit
+        else:
+            # Find active booking for this slot
+            active_booking = ParkingBooking.objects.select_for_update().filter(
+                parking_slot=slot.slot_number,
+                status='active'
+            ).first()
+            
+            if active_booking:
+                # Records the slot change along with the completion
+                complete_booking(active_booking, slot)
+                return
+        
+        if changed:
+            record_slot_event(slot)
+
+
+def complete_booking(booking, slot, exit_time=None):
+    """Close an active booking, price the actual stay and release its slot.
+
+    Call inside a transaction on the lot database, holding the slot's row
+    lock and then the booking's, so the outbox events commit with the
+    change and a booking is completed only once.
+    """
+    # Complete the booking
+    booking.status = 'completed'
+    booking.actual_exit_time = exit_time or timezone.now()
+    
+    # Calculate actual amount
+    entry_time = booking.actual_entry_time or booking.booked_from
+    duration = (booking.actual_exit_time - entry_time).total_seconds() / 60
+    booking.duration_minutes = int(duration)
+    
+    # Calculate with fixed rate of ₹10 per hour, NO FREE MINUTES
+    hours = math.ceil(duration / 60)
+    booking.total_amount = round(float(hours) * 10.00, 2)
+    
+    booking.save()
+    
+    # Free the slot unless a later booking (e.g. from a group) still holds it
+    slot.is_reserved = ParkingBooking.objects.filter(
+        parking_slot=slot.slot_number,
+        status='reserved'
+    ).exists()
+    slot.is_occupied = False
+    slot.save()
+    
+    record_booking_event('booking.completed', booking)
+    record_slot_event(slot)
+
+
+def is_newer_sequence(sequence, last):
+    """True if `sequence` is ahead of `last` by less than half the ring"""
+    delta = (sequence - last) % SEQUENCE_MODULUS
+    return 0 < delta < SEQUENCE_MODULUS // 2
+
+
+def is_newer_reading(timestamp, sequence, mark):
+    """True if a record is later than the last one applied for its sensor.
+
+    Records are ordered by the gateway's clock, then by sequence within one
+    second. A rebooted gateway starts its sequences over but its clock keeps
+    going, so its readings are accepted again at once; duplicates and
+    replays are never later than the mark. A gateway without a clock sends
+    timestamp 0 and is ordered by sequence alone.
+    """
+    if timestamp != mark.last_timestamp:
+        return timestamp > mark.last_timestamp
+    return is_newer_sequence(sequence, mark.last_sequence)
+
+
+def apply_sequenced_reading(gateway_id, sensor_index, sequence, timestamp, slot, is_occupied):
+    """Apply a gateway reading unless it is no later than the last one applied.
+
+    The mark is locked, compared and advanced in the same transaction as
+    the reading, so concurrent deliveries of one frame apply it once and a
+    failed apply leaves the reading unmarked. Returns False for duplicates
+    and replays.
+    """
+    with transaction.atomic(using=current_database()):
+        mark, created = SensorSequence.objects.select_for_update().get_or_create(
+            gateway_id=gateway_id, sensor_index=sensor_index,
+            defaults={'last_sequence': sequence, 'last_timestamp': timestamp},
+        )
+        if not created and not is_newer_reading(timestamp, sequence, mark):
+            return False
+
+        apply_sensor_state(slot, is_occupied)
+
+        if not created:
+            mark.last_sequence = sequence
+            mark.last_timestamp = timestamp
+            mark.save(update_fields=['last_sequence', 'last_timestamp', 'updated_at'])
+    return True
+
+
+def ingest_frame(gateway, records):
+    """Apply the records of a decoded sensor frame from an authenticated gateway"""
+    # A gateway only ever reports for the lot it is installed in
+    with use_lot(gateway.get('lot') or current_lot()):
+        return _ingest_records(gateway, records)
+
+
+def _ingest_records(gateway, records):
+    sensors = gateway.get('sensors', [])
+    gateway_id = gateway['gateway_id']
+    result = {'accepted': 0, 'duplicates': 0, 'unknown': 0, 'last_sequence': None}
+
+    wanted = {sensors[r['sensor_index']] for r in records if r['sensor_index'] < len(sensors)}
+    slots = {slot.sensor_id: slot for slot in ParkingSlot.objects.filter(sensor_id__in=wanted)}
+
+    # Records are applied in frame order, which is the order the gateway saw them
+    for record in records:
+        index = record['sensor_index']
+        slot = slots.get(sensors[index]) if index < len(sensors) else None
+        if slot is None:
+            result['unknown'] += 1
+            continue
+        heartbeat_tracker.touch(slot.sensor_id)
+
+        if not apply_sequenced_reading(gateway_id, index, record['sequence'], record['timestamp'],
+                                       slot, record['is_occupied']):
+            result['duplicates'] += 1
+            continue
+
+        result['accepted'] += 1
+        result['last_sequence'] = record['sequence']
+
+    return result
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ParkingSlot, ParkingBooking
+from .models import ParkingSlot, ParkingBooking, ArchivedBooking
 import math
 
 class ParkingSlotSerializer(serializers.ModelSerializer):
@@ -22,4 +22,20 @@ class ParkingBookingSerializer(serializers.ModelSerializer):
         hours = math.ceil(duration / 60)
         validated_data['total_amount'] = round(float(hours) * 10.00, 2)
         
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+class ArchivedBookingSerializer(serializers.ModelSerializer):
+    # Expose the id the booking had in the live table so history stays stable
+    id = serializers.IntegerField(source='original_id', read_only=True)
+
+    class Meta:
+        model = ArchivedBooking
+        exclude = ['original_id']
+
+
+def serialize_booking_history(pairs):
+    """Serialize (booking, is_archived) pairs from archive.merged_history"""
+    return [
+        ArchivedBookingSerializer(booking).data if is_archived else ParkingBookingSerializer(booking).data
+        for booking, is_archived in pairs
+    ]
\ No newline at end of file
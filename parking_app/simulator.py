@@ -0,0 +1,225 @@
+"""Deterministic sensor-fleet simulator.
+
+Generates arrival/departure events for many virtual sensors from a seed
+(non-homogeneous Poisson arrivals with flight-bank surges, log-normal
+dwell times and sensor flicker), records them as JSON lines, and replays
+them against the real ingestion endpoints over HTTP with a pool of
+threads. Events for one sensor always go through the same thread, so
+per-sensor ordering matches the log.
+"""
+import http.client
+import json
+import math
+import queue
+import random
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+from .authentication import sign_body
+from .parsers import SensorFrameParser, encode_frame
+
+
+class FleetModel:
+    """Parameters of the simulated car park"""
+
+    def __init__(self, duration=3600, arrivals_per_hour=1.5, dwell_minutes=90, dwell_sigma=0.6,
+                 flicker_probability=0.05, flight_banks=3, bank_minutes=20, bank_multiplier=4.0):
+        self.duration = duration
+        self.arrivals_per_hour = arrivals_per_hour
+        self.dwell_minutes = dwell_minutes
+        self.dwell_sigma = dwell_sigma
+        self.flicker_probability = flicker_probability
+        self.flight_banks = flight_banks
+        self.bank_seconds = bank_minutes * 60
+        self.bank_multiplier = bank_multiplier
+
+
+def generate_events(sensor_ids, model, seed):
+    """Return the time-ordered event list [(t, sensor_id, is_occupied), ...]"""
+    rng = random.Random(seed)
+    banks = sorted(rng.uniform(0, model.duration) for _ in range(model.flight_banks))
+    base_rate = model.arrivals_per_hour / 3600
+    max_rate = base_rate * max(model.bank_multiplier, 1)
+    dwell_mu = math.log(model.dwell_minutes * 60)
+
+    def rate(t):
+        in_bank = any(start <= t < start + model.bank_seconds for start in banks)
+        return base_rate * model.bank_multiplier if in_bank else base_rate
+
+    events = []
+
+    def emit(t, sensor_id, is_occupied):
+        events.append((round(t, 3), sensor_id, is_occupied))
+        # A flickering IR sensor bounces to the other state and back
+        if rng.random() < model.flicker_probability:
+            events.append((round(t + 0.2, 3), sensor_id, not is_occupied))
+            events.append((round(t + 0.5, 3), sensor_id, is_occupied))
+
+    for sensor_id in sensor_ids:
+        t = 0.0
+        while True:
+            # Thinning: draw at the peak rate, keep with probability rate(t) / peak
+            t += rng.expovariate(max_rate)
+            if t >= model.duration:
+                break
+            if rng.random() > rate(t) / max_rate:
+                continue
+            emit(t, sensor_id, True)
+            t += rng.lognormvariate(dwell_mu, model.dwell_sigma)
+            if t >= model.duration:
+                break
+            emit(t, sensor_id, False)
+
+    events.sort()
+    return events
+
+
+def write_log(path, meta, events):
+    with open(path, 'w', encoding='utf-8') as log:
+        log.write(json.dumps({'meta': meta}) + '\n')
+        for t, sensor_id, is_occupied in events:
+            log.write(json.dumps({'t': t, 'sensor_id': sensor_id, 'is_occupied': is_occupied}) + '\n')
+
+
+def read_log(path):
+    meta, events = {}, []
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            record = json.loads(line)
+            if 'meta' in record:
+                meta = record['meta']
+            else:
+                events.append((record['t'], record['sensor_id'], record['is_occupied']))
+    return meta, events
+
+
+class Replayer:
+    """Send events to a running server, `threads` connections in parallel"""
+
+    def __init__(self, base_url, threads=8, speed=0.0, gateways=None, frame_size=32, api_path='/api'):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        # e.g. /api/lots/T2 to send JSON readings to one lot
+        self.prefix = parts.path.rstrip('/') + api_path.rstrip('/')
+        self.threads = threads
+        self.speed = speed
+        self.frame_size = frame_size
+        # sensor_id -> (gateway_id, secret, index) when replaying as binary frames
+        self.frame_routes = {}
+        for gateway_id, gateway in (gateways or {}).items():
+            if not gateway.get('secret'):
+                continue
+            for index, sensor_id in enumerate(gateway.get('sensors', [])):
+                self.frame_routes[sensor_id] = (gateway_id, gateway['secret'], index)
+        # Each run numbers readings from 1, like a freshly booted gateway
+        self.sequences = {}
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+        self.throttled = 0
+        self.sent = 0
+
+    def run(self, events):
+        queues = [queue.Queue() for _ in range(self.threads)]
+        workers = [threading.Thread(target=self.worker, args=(q,), daemon=True) for q in queues]
+        for worker in workers:
+            worker.start()
+
+        started = time.perf_counter()
+        for t, sensor_id, is_occupied in events:
+            if self.speed:
+                # Keep the recorded spacing, compressed by the speed factor
+                delay = t / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            queues[zlib.crc32(sensor_id.encode()) % self.threads].put((t, sensor_id, is_occupied))
+
+        for q in queues:
+            q.put(None)
+        for worker in workers:
+            worker.join()
+        return self.report(time.perf_counter() - started)
+
+    def worker(self, events):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        pending = []
+        while True:
+            event = events.get()
+            if event is not None and event[1] in self.frame_routes:
+                pending.append(event)
+                if len(pending) < self.frame_size and not events.empty():
+                    continue
+            if pending:
+                self.send_frames(connection, pending)
+                pending = []
+            if event is None:
+                break
+            if event[1] not in self.frame_routes:
+                self.send_json(connection, event)
+        connection.close()
+
+    def send_json(self, connection, event):
+        _, sensor_id, is_occupied = event
+        body = json.dumps({'sensor_id': sensor_id, 'is_occupied': is_occupied}).encode()
+        self.post(connection, '/sensor-data/', body, {'Content-Type': 'application/json'})
+
+    def send_frames(self, connection, events):
+        by_gateway = {}
+        for t, sensor_id, is_occupied in events:
+            gateway_id, secret, index = self.frame_routes[sensor_id]
+            with self.lock:
+                sequence = self.sequences[sensor_id] = self.sequences.get(sensor_id, 0) + 1
+            # Stamped with the wall clock when sent, as a gateway stamps its readings
+            by_gateway.setdefault((gateway_id, secret), []).append((index, is_occupied, sequence, int(time.time())))
+
+        for (gateway_id, secret), records in by_gateway.items():
+            body = encode_frame(records)
+            timestamp = str(int(time.time()))
+            self.post(connection, '/sensor-frame/', body, {
+                'Content-Type': SensorFrameParser.media_type,
+                'X-Gateway-Id': gateway_id,
+                'X-Gateway-Timestamp': timestamp,
+                'X-Gateway-Signature': sign_body(secret, body, timestamp),
+            }, count=len(records))
+
+    def post(self, connection, path, body, headers, count=1):
+        started = time.perf_counter()
+        try:
+            connection.request('POST', self.prefix + path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            status = None
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.sent += count
+            self.latencies.append(elapsed)
+            if status == 429:
+                self.throttled += 1
+            elif status is None or status >= 400:
+                self.errors += 1
+
+    def report(self, elapsed):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        return {
+            'events': self.sent,
+            'requests': len(latencies),
+            'errors': self.errors,
+            'throttled': self.throttled,
+            'seconds': elapsed,
+            'events_per_second': self.sent / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+        }
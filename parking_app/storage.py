@@ -0,0 +1,53 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always produced
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed static files with pre-compressed .gz/.br siblings written at collectstatic time"""
+
+    COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.html', '.svg', '.json', '.txt', '.map')
+    MIN_COMPRESS_SIZE = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+        if dry_run:
+            return
+
+        # Compress the final hashed files (and their unhashed originals) once
+        # hashing is done, so each variant matches what the manifest points at
+        for name in sorted(set(paths) | set(self.hashed_files.values())):
+            if name.endswith(self.COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                for compressed_name in self.compress_file(name):
+                    yield name, compressed_name, True
+
+    def compress_file(self, name):
+        with self.open(name) as original:
+            content = original.read()
+
+        if len(content) < self.MIN_COMPRESS_SIZE:
+            return []
+
+        written = []
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+
+        for suffix, compressed in variants:
+            # Only keep variants that are actually smaller than the original
+            if len(compressed) >= len(content):
+                continue
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            written.append(compressed_name)
+
+        return written
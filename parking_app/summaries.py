@@ -0,0 +1,253 @@
+"""Materialized daily booking summaries.
+
+DailySummary holds one row per stay day (local date of booked_from) x
+floor x payment method x closed status, with counts and sums of amount,
+paid amount and minutes. When a booking is saved, BookingRecord.save locks
+its stored row; what that row contributed is subtracted and the new
+contribution added with two single-row UPDATEs in the same transaction, so
+concurrent writers never apply a delta against a stale copy. Set-based
+updates bypass save(), so they rebuild the affected days from the live and
+archived tables instead, as does the backfill command.
+Reports then aggregate a few summary rows rather than millions of bookings.
+"""
+import calendar
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncYear
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .lots import current_database
+from .models import ArchivedBooking, DailySummary, ParkingBooking, ParkingSlot
+
+SUMMARY_STATUSES = ParkingBooking.CLOSED_STATUSES
+STATE_FIELDS = {'status', 'booked_from', 'floor_number', 'payment_method', 'total_amount', 'is_paid', 'duration_minutes'}
+GROUPINGS = ['day', 'month', 'year', 'floor', 'payment_method', 'status']
+MEASURES = ['bookings', 'total_amount', 'paid_amount', 'duration_minutes']
+
+
+def summary_state(booking):
+    """(key, bookings, amount, paid amount, minutes) the booking adds, or None"""
+    if booking.status not in SUMMARY_STATUSES or booking.booked_from is None:
+        return None
+    amount = Decimal(str(booking.total_amount or 0))
+    key = (timezone.localdate(booking.booked_from), booking.floor_number, booking.payment_method, booking.status)
+    return key, 1, amount, amount if booking.is_paid else Decimal('0'), booking.duration_minutes or 0
+
+
+def remember_summary_state(booking, stored):
+    """Note what the locked, stored copy of a booking contributes, for the save that follows"""
+    booking._summary_state = summary_state(stored)
+
+
+def _apply(using, state, sign):
+    key, bookings, amount, paid, minutes = state
+    day, floor_number, payment_method, status = key
+    rows = DailySummary.objects.using(using).filter(
+        day=day, floor_number=floor_number, payment_method=payment_method, status=status
+    )
+    delta = dict(
+        bookings=F('bookings') + sign * bookings,
+        total_amount=F('total_amount') + sign * amount,
+        paid_amount=F('paid_amount') + sign * paid,
+        duration_minutes=F('duration_minutes') + sign * minutes,
+    )
+    if rows.update(**delta) or sign < 0:
+        return
+    try:
+        with transaction.atomic(using=using):
+            DailySummary.objects.using(using).create(
+                day=day, floor_number=floor_number, payment_method=payment_method, status=status,
+                bookings=bookings, total_amount=amount, paid_amount=paid, duration_minutes=minutes,
+            )
+    except IntegrityError:
+        # Another worker created the row first
+        rows.update(**delta)
+
+
+@receiver(post_save, sender=ParkingBooking, dispatch_uid='daily_summary_booking')
+@receiver(post_save, sender=ArchivedBooking, dispatch_uid='daily_summary_archived')
+def update_daily_summary(sender, instance, created, using, **kwargs):
+    new = summary_state(instance)
+    if created:
+        old = None
+    elif '_summary_state' in instance.__dict__:
+        old = instance.__dict__.pop('_summary_state')
+    else:
+        # Saved without going through BookingRecord.save: recount the day from the tables
+        rebuild_days([timezone.localdate(instance.booked_from)], using=using)
+        return
+
+    if old != new:
+        if old is not None:
+            _apply(using, old, -1)
+        if new is not None:
+            _apply(using, new, 1)
+
+
+def _day_range(first, last):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(first, time.min), tz)
+    end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def rebuild_days(days, using=None):
+    """Recompute the summary rows of the given local days from raw bookings"""
+    using = using or current_database()
+    rebuilt = 0
+    for day in sorted(set(days)):
+        rebuilt += rebuild_range(day, day, using=using)
+    return rebuilt
+
+
+def _range_totals(using, start, end):
+    """Summary measures per key for stays from start to end, from both tables"""
+    totals = {}
+    for model in (ParkingBooking, ArchivedBooking):
+        rows = model.objects.using(using).filter(
+            booked_from__gte=start, booked_from__lt=end, status__in=SUMMARY_STATUSES
+        ).annotate(day=TruncDate('booked_from')).values(
+            'day', 'floor_number', 'payment_method', 'status'
+        ).annotate(
+            sum_bookings=Count('id'),
+            sum_total_amount=Sum('total_amount'),
+            sum_paid_amount=Sum('total_amount', filter=Q(is_paid=True)),
+            sum_duration_minutes=Sum('duration_minutes'),
+        )
+        for row in rows:
+            key = (row['day'], row['floor_number'], row['payment_method'], row['status'])
+            summary = totals.setdefault(key, dict.fromkeys(MEASURES, 0))
+            for measure in MEASURES:
+                summary[measure] += row[f'sum_{measure}'] or 0
+    return totals
+
+
+def rebuild_range(first, last, using=None):
+    """Replace the summaries for first..last (inclusive) in one transaction; returns rows written.
+
+    Bookings are counted only once the transaction holds off incremental
+    updates, so none can commit between the count and the replace. Writers
+    apply deltas under the booking's row lock, which is taken here first
+    where the database has row locks; on SQLite the DELETE takes the
+    database write lock.
+    """
+    using = using or current_database()
+    start, end = _day_range(first, last)
+
+    with transaction.atomic(using=using):
+        if connections[using].features.has_select_for_update:
+            list(ParkingBooking.objects.using(using).select_for_update().filter(
+                booked_from__gte=start, booked_from__lt=end
+            ).values_list('pk', flat=True))
+        DailySummary.objects.using(using).filter(day__gte=first, day__lte=last).delete()
+        totals = _range_totals(using, start, end)
+        DailySummary.objects.using(using).bulk_create([
+            DailySummary(day=day, floor_number=floor_number, payment_method=payment_method, status=status, **measures)
+            for (day, floor_number, payment_method, status), measures in totals.items()
+        ], batch_size=1000)
+    return len(totals)
+
+
+def parse_day(value):
+    return date.fromisoformat(value) if value else None
+
+
+def _bucket_days(period, granularity, first, last):
+    """Days of a month/year/day bucket that fall inside first..last"""
+    if granularity == 'day':
+        return 1
+    if granularity == 'month':
+        start = period
+        end = period.replace(day=calendar.monthrange(period.year, period.month)[1])
+    elif granularity == 'year':
+        start, end = period.replace(month=1, day=1), period.replace(month=12, day=31)
+    else:
+        start, end = first, last
+    start, end = max(start, first), min(end, last)
+    return max((end - start).days + 1, 0)
+
+
+def daily_report(date_from=None, date_to=None, group_by=('day',), floor_number=None,
+                 payment_method=None, status=None):
+    """Aggregate summary rows of the current lot.
+
+    group_by takes at most one of day/month/year plus any of floor,
+    payment_method and status. When grouped by floor, utilization is the
+    share of the floor's bay-minutes covered by completed stays.
+    """
+    unknown = [g for g in group_by if g not in GROUPINGS]
+    if unknown:
+        raise ValueError(f"Unknown group_by: {', '.join(unknown)}")
+    periods = [g for g in group_by if g in ('day', 'month', 'year')]
+    if len(periods) > 1:
+        raise ValueError('Group by only one of day, month or year')
+
+    rows = DailySummary.objects.all()
+    if date_from:
+        rows = rows.filter(day__gte=date_from)
+    if date_to:
+        rows = rows.filter(day__lte=date_to)
+    if floor_number is not None:
+        rows = rows.filter(floor_number=floor_number)
+    if payment_method:
+        rows = rows.filter(payment_method=payment_method)
+    if status:
+        rows = rows.filter(status=status)
+
+    granularity = periods[0] if periods else None
+    truncate = {'day': F('day'), 'month': TruncMonth('day'), 'year': TruncYear('day')}
+    columns = []
+    if granularity:
+        rows = rows.annotate(period=truncate[granularity])
+        columns.append('period')
+    columns += [{'floor': 'floor_number'}.get(g, g) for g in group_by if g not in periods]
+
+    span = rows.aggregate(first=Min('day'), last=Max('day'))
+    first, last = date_from or span['first'], date_to or span['last']
+    rows = rows.values(*columns).annotate(
+        **{f'sum_{measure}': Sum(measure) for measure in MEASURES},
+        # Cancelled bookings never occupied their bay
+        occupied_minutes=Sum('duration_minutes', filter=~Q(status='cancelled')),
+    ).order_by(*columns)
+
+    capacity = {}
+    if 'floor' in group_by:
+        capacity = dict(ParkingSlot.objects.values_list('floor_number').annotate(Count('id')))
+
+    labels = {'day': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+    report, totals = [], dict.fromkeys(MEASURES, 0)
+    for row in rows:
+        entry = {column: row[column] for column in columns}
+        if granularity:
+            entry['period'] = row['period'].strftime(labels[granularity])
+        bookings, minutes = row['sum_bookings'] or 0, row['sum_duration_minutes'] or 0
+        entry.update(
+            bookings=bookings,
+            total_amount=float(row['sum_total_amount'] or 0),
+            paid_amount=float(row['sum_paid_amount'] or 0),
+            duration_minutes=minutes,
+            average_stay_minutes=round(minutes / bookings, 1) if bookings else 0,
+        )
+        if 'floor' in group_by and first and last:
+            bay_minutes = capacity.get(row['floor_number'], 0) * 1440 * _bucket_days(
+                row.get('period'), granularity, first, last)
+            occupied = row['occupied_minutes'] or 0
+            entry['utilization'] = round(occupied / bay_minutes, 4) if bay_minutes else None
+        for measure in MEASURES:
+            totals[measure] += entry[measure]
+        report.append(entry)
+
+    totals['total_amount'] = round(totals['total_amount'], 2)
+    totals['paid_amount'] = round(totals['paid_amount'], 2)
+    return {
+        'date_from': first.isoformat() if first else None,
+        'date_to': last.isoformat() if last else None,
+        'group_by': list(group_by),
+        'rows': report,
+        'totals': totals,
+    }
@@ -1,3 +1,1345 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import ParkingSlot, ParkingBooking
+
+# Per-process caches so tests never share state with a running server
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'parking-tests-{alias}'}
+    for alias in ('default', 'admission', 'notifications')
+}
+
+# Templates render without a collected static manifest
+PLAIN_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+# No background heartbeat flusher writing outside the test transaction
+@override_settings(CACHES=TEST_CACHES, ADMISSION_CONTROL={'ENABLED': False}, SENSOR_HEARTBEAT_FLUSH_SECONDS=0)
+class ParkingTestCase(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+
+def make_slots(count=4, floor_number=1, prefix='A'):
+    return [
+        ParkingSlot.objects.create(
+            slot_number=f'{prefix}{index:02d}', sensor_id=f'SENSOR_{prefix}{index:03d}', floor_number=floor_number
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def make_booking(**fields):
+    now = timezone.now()
+    values = {
+        'vehicle_number': 'KA01AB1234',
+        'owner_name': 'Owner',
+        'phone_number': '9999999999',
+        'parking_slot': 'A01',
+        'booked_from': now,
+        'booked_until': now + timedelta(hours=2),
+    }
+    values.update(fields)
+    return ParkingBooking.objects.create(**values)
+
+
+class StaticDeliveryTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    def collect(self):
+        # Only the project's own assets, not every app's
+        finders = ['django.contrib.staticfiles.finders.FileSystemFinder']
+        with override_settings(STATIC_ROOT=self.static_root, STATICFILES_FINDERS=finders):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(self.static_root, 'staticfiles.json')) as manifest:
+            return json.load(manifest)['paths']
+
+    def test_collectstatic_writes_compressed_variants(self):
+        hashed = self.collect()['css/dashboard.css']
+        path = os.path.join(self.static_root, hashed)
+        with open(path, 'rb') as original, open(path + '.gz', 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), original.read())
+
+    def test_hashed_files_are_served_precompressed_and_immutable(self):
+        hashed = self.collect()['css/dashboard.css']
+        with override_settings(DEBUG=False, STATIC_ROOT=self.static_root):
+            response = self.client.get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip')
+            plain = self.client.get('/static/css/dashboard.css')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertNotIn('immutable', plain['Cache-Control'])
+
+    @override_settings(STORAGES=PLAIN_STORAGES)
+    def test_dashboard_revalidates_with_etag(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+
+        again = self.client.get('/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+
+class ForecastTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        make_slots(2)
+        # Slot A01 is taken 10:00-12:00 local time every day for four weeks
+        self.now = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        for days_ago in range(1, 29):
+            start = self.now - timedelta(days=days_ago) + timedelta(hours=10)
+            make_booking(
+                bill_number=f'HIST-{days_ago}', booked_from=start, booked_until=start + timedelta(hours=2),
+                actual_entry_time=start, actual_exit_time=start + timedelta(hours=2), status='paid', is_paid=True,
+            )
+
+    def test_occupancy_matrix_marks_booked_hours(self):
+        from .forecasting import load_history, occupancy_matrix
+
+        start = self.now - timedelta(days=1)
+        history = load_history(start, self.now)
+        slots, _, buckets, matrix = occupancy_matrix(history, start, self.now)
+
+        self.assertEqual(list(slots), ['A01'])
+        occupied = [timezone.localtime(datetime.fromtimestamp(b, tz=dt_timezone.utc)).hour
+                    for b, taken in zip(buckets, matrix[0]) if taken]
+        self.assertEqual(occupied, [10, 11])
+
+    def test_forecast_repeats_the_weekly_pattern(self):
+        from .forecasting import forecast_occupancy
+
+        forecast = forecast_occupancy(days=1, history_days=28, now=self.now)
+        floor = forecast['floors'][0]
+        by_hour = {datetime.fromisoformat(h['time']).hour: h['expected_occupied'] for h in floor['hourly']}
+
+        self.assertEqual(floor['capacity'], 2)
+        self.assertAlmostEqual(by_hour[10], 1.0)
+        self.assertAlmostEqual(by_hour[11], 1.0)
+        self.assertEqual(by_hour[15], 0.0)
+
+    def test_forecast_includes_archived_history(self):
+        from .archive import archive_closed_bookings
+        from .forecasting import forecast_occupancy, load_history
+        from .models import ArchivedBooking
+
+        # Everything but the last week or so moves to the archive
+        self.assertGreaterEqual(archive_closed_bookings(days=7), 21)
+        self.assertGreaterEqual(ArchivedBooking.objects.count(), 21)
+
+        history = load_history(self.now - timedelta(days=28), self.now)
+        self.assertEqual(len(history['starts']), 28)
+        floor = forecast_occupancy(days=1, history_days=28, now=self.now)['floors'][0]
+        by_hour = {datetime.fromisoformat(h['time']).hour: h['expected_occupied'] for h in floor['hourly']}
+        self.assertAlmostEqual(by_hour[10], 1.0)
+
+    def test_forecast_endpoint_validates_ranges(self):
+        self.assertEqual(self.client.get('/api/forecast/?days=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/forecast/?days=2&history_days=30').status_code, 200)
+
+
+class GroupBookingTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        from . import plates
+        plates._indexes.clear()
+        make_slots(3)
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def window(self, start_hours, end_hours):
+        return {
+            'booked_from': (self.start + timedelta(hours=start_hours)).isoformat(),
+            'booked_until': (self.start + timedelta(hours=end_hours)).isoformat(),
+        }
+
+    def book(self, items):
+        payload = {'owner_name': 'Tour', 'phone_number': '9999999999', 'bookings': items}
+        return self.client.post('/api/create-group-booking/', payload, content_type='application/json')
+
+    def test_pack_intervals_reuses_the_best_fitting_bay(self):
+        from .group_booking import pack_intervals
+
+        items = [
+            {'index': 0, 'booked_from': 0, 'booked_until': 2},
+            {'index': 1, 'booked_from': 1, 'booked_until': 3},
+            {'index': 2, 'booked_from': 2, 'booked_until': 4},
+            {'index': 3, 'booked_from': 3, 'booked_until': 5},
+        ]
+        self.assertEqual(pack_intervals(items, ['A', 'B', 'C']), {0: 'A', 1: 'B', 2: 'A', 3: 'B'})
+        with self.assertRaises(ValueError):
+            pack_intervals(items, ['A'])
+
+    def test_back_to_back_bookings_share_bays(self):
+        items = [{'vehicle_number': f'KA01AB{n:04d}', **self.window(2 * (n % 2), 2 * (n % 2) + 2)}
+                 for n in range(4)]
+        response = self.book(items)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['slots_used'], ['A01', 'A02'])
+        self.assertEqual(ParkingSlot.objects.filter(is_reserved=True).count(), 2)
+
+    def test_group_larger_than_the_lot_is_rejected(self):
+        items = [{'vehicle_number': f'KA01AB{n:04d}', **self.window(0, 2)} for n in range(4)]
+        response = self.book(items)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(ParkingBooking.objects.exists())
+
+    def test_malformed_items_are_reported_not_crashed_on(self):
+        response = self.book(['KA01AB0001', {'vehicle_number': 'KA01AB0002', **self.window(0, 2)}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['bookings'][0]['errors'], ['Each booking must be an object'])
+        self.assertEqual(response.json()['bookings'][1]['status'], 'ok')
+
+    def test_bulk_create_replicates_the_save_hooks(self):
+        from .models import DailySummary, OutboxEvent
+        from .plates import plate_index_for
+
+        items = [{'vehicle_number': f'KA01AB{n:04d}', **self.window(0, 2)} for n in range(2)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.book(items)
+        self.assertEqual(response.status_code, 201)
+        bills = [entry['bill_number'] for entry in response.json()['bookings']]
+
+        self.assertEqual(set(ParkingBooking.objects.values_list('version', flat=True)), {1})
+        created = OutboxEvent.objects.filter(event_type='booking.created').order_by('pk')
+        self.assertEqual(list(created.values_list('key', flat=True)), bills)
+        self.assertFalse(DailySummary.objects.exists())
+        self.assertEqual([b.bill_number for b in plate_index_for().lookup('KA01AB0001')], bills[1:])
+
+
+class ArchiveTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        make_slots(1)
+        old = timezone.now() - timedelta(days=200)
+        self.paid = make_booking(bill_number='OLD-PAID', booked_from=old, booked_until=old + timedelta(hours=2),
+                                 status='paid', is_paid=True)
+        self.unpaid = make_booking(bill_number='OLD-UNPAID', booked_from=old, booked_until=old + timedelta(hours=2),
+                                   status='completed')
+        self.recent = make_booking(bill_number='NEW-PAID', status='paid', is_paid=True)
+
+    def test_only_settled_old_bookings_are_archived(self):
+        from .archive import archive_closed_bookings
+        from .models import ArchivedBooking
+
+        self.assertEqual(archive_closed_bookings(days=90), 1)
+        self.assertEqual(list(ArchivedBooking.objects.values_list('bill_number', flat=True)), ['OLD-PAID'])
+        self.assertEqual(set(ParkingBooking.objects.values_list('bill_number', flat=True)), {'OLD-UNPAID', 'NEW-PAID'})
+
+    def test_archived_bookings_round_trip_through_history_and_lookup(self):
+        from .archive import archive_closed_bookings, find_booking, merged_history
+        from .models import ArchivedBooking
+
+        archive_closed_bookings(days=90)
+        archived = find_booking('OLD-PAID')
+
+        self.assertIsInstance(archived, ArchivedBooking)
+        self.assertEqual(archived.original_id, self.paid.pk)
+        self.assertEqual(archived.created_at, self.paid.created_at)
+        self.assertEqual(
+            [(booking.bill_number, is_archived) for booking, is_archived in merged_history()],
+            [('NEW-PAID', False), ('OLD-UNPAID', False), ('OLD-PAID', True)],
+        )
+
+    def test_archived_bookings_are_read_only(self):
+        from .archive import archive_closed_bookings, find_booking
+
+        archive_closed_bookings(days=90)
+        response = self.client.post('/api/confirm-payment/', {'bill_number': 'OLD-PAID'}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(ValueError):
+            find_booking('OLD-PAID').save()
+
+    @override_settings(DEBUG=True)
+    def test_hand_set_bill_numbers_are_checked_against_the_archive_in_debug(self):
+        from django.db import IntegrityError
+        from .archive import archive_closed_bookings
+
+        archive_closed_bookings(days=90)
+        with self.assertRaises(IntegrityError):
+            make_booking(bill_number='OLD-PAID')
+
+
+GATEWAYS = {
+    'GW-T': {'lot': 'T1', 'secret': 'test-secret', 'sensors': ['SENSOR_A001', 'SENSOR_A002']},
+    'GW-UNSET': {'lot': 'T1', 'secret': None, 'sensors': ['SENSOR_A001']},
+}
+
+
+@override_settings(SENSOR_GATEWAYS=GATEWAYS, SENSOR_FRAME_MAX_SKEW_SECONDS=300)
+class SensorFrameTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.slots = make_slots(2)
+
+    def post_frame(self, records, gateway_id='GW-T', secret='test-secret', timestamp=None, signature=None):
+        from .authentication import sign_body
+        from .parsers import SensorFrameParser, encode_frame
+
+        body = encode_frame(records)
+        timestamp = str(int(time.time()) if timestamp is None else timestamp)
+        return self.client.generic(
+            'POST', '/api/sensor-frame/', body, content_type=SensorFrameParser.media_type,
+            HTTP_X_GATEWAY_ID=gateway_id, HTTP_X_GATEWAY_TIMESTAMP=timestamp,
+            HTTP_X_GATEWAY_SIGNATURE=signature or sign_body(secret or '', body, timestamp),
+        )
+
+    def test_signed_frame_is_applied(self):
+        response = self.post_frame([(0, True, 1, 0)])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['accepted'], 1)
+        self.assertTrue(ParkingSlot.objects.get(slot_number='A01').is_occupied)
+
+    def test_bad_signature_and_unset_secret_are_rejected(self):
+        self.assertEqual(self.post_frame([(0, True, 1, 0)], signature='0' * 64).status_code, 401)
+        self.assertEqual(self.post_frame([(0, True, 1, 0)], secret='wrong').status_code, 401)
+        self.assertEqual(self.post_frame([(0, True, 1, 0)], gateway_id='GW-UNSET', secret='').status_code, 401)
+        self.assertFalse(ParkingSlot.objects.get(slot_number='A01').is_occupied)
+
+    def test_stale_timestamp_is_rejected(self):
+        response = self.post_frame([(0, True, 1, 0)], timestamp=int(time.time()) - 301)
+        self.assertEqual(response.status_code, 401)
+
+    def test_duplicate_and_older_sequences_are_dropped(self):
+        self.post_frame([(0, True, 5, 0)])
+        response = self.post_frame([(0, False, 5, 0), (0, False, 4, 0), (1, True, 1, 0)])
+
+        self.assertEqual(response.json()['duplicates'], 2)
+        self.assertEqual(response.json()['accepted'], 1)
+        self.assertTrue(ParkingSlot.objects.get(slot_number='A01').is_occupied)
+
+    def test_sequence_wraps_around(self):
+        from .sensors import SEQUENCE_MODULUS, is_newer_sequence
+
+        self.assertTrue(is_newer_sequence(1, SEQUENCE_MODULUS - 1))
+        self.assertFalse(is_newer_sequence(SEQUENCE_MODULUS - 1, 1))
+
+    def test_failed_apply_does_not_mark_the_sequence(self):
+        from .models import SensorSequence
+        from .sensors import apply_sequenced_reading
+
+        slot = self.slots[0]
+        with mock.patch('parking_app.sensors.apply_sensor_state', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                apply_sequenced_reading('GW-T', 0, 7, 0, slot, True)
+        self.assertFalse(SensorSequence.objects.exists())
+
+        self.assertTrue(apply_sequenced_reading('GW-T', 0, 7, 0, slot, True))
+        self.assertFalse(apply_sequenced_reading('GW-T', 0, 7, 0, slot, True))
+
+    def test_rebooted_gateway_is_accepted_again(self):
+        self.post_frame([(0, True, 900, 1000)])
+        # Sequences start over after a reboot, but the gateway clock moved on
+        response = self.post_frame([(0, False, 1, 1005)])
+
+        self.assertEqual(response.json()['accepted'], 1)
+        self.assertFalse(ParkingSlot.objects.get(slot_number='A01').is_occupied)
+
+    def test_readings_from_before_a_reboot_are_dropped(self):
+        self.post_frame([(0, True, 900, 1000)])
+        self.post_frame([(0, False, 1, 1005)])
+        # Ahead of the new sequence, but recorded before the reboot
+        response = self.post_frame([(0, True, 901, 1001)])
+
+        self.assertEqual(response.json()['duplicates'], 1)
+        self.assertFalse(ParkingSlot.objects.get(slot_number='A01').is_occupied)
+
+    def test_repeated_state_does_not_write_the_slot(self):
+        from .sensors import apply_sensor_state
+
+        slot = self.slots[0]
+        apply_sensor_state(slot, True)
+        with mock.patch.object(ParkingSlot, 'save') as save:
+            apply_sensor_state(slot, True)
+        save.assert_not_called()
+
+
+class LivenessTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        from .liveness import HeartbeatTracker, tracker
+        # Drop heartbeats other tests left in the shared tracker
+        tracker._pending.clear()
+        self.tracker = HeartbeatTracker(flush_seconds=0)
+        self.slots = make_slots(3)
+
+    def test_flush_writes_pending_heartbeats_once(self):
+        self.tracker.touch('SENSOR_A001')
+        self.tracker.touch('SENSOR_A002')
+
+        self.assertEqual(self.tracker.flush(), 2)
+        self.assertEqual(self.tracker.flush(), 0)
+        self.assertEqual(ParkingSlot.objects.filter(last_seen_at__isnull=False).count(), 2)
+
+    def test_late_flush_never_moves_last_seen_backwards(self):
+        newer = timezone.now() + timedelta(minutes=5)
+        ParkingSlot.objects.filter(slot_number='A01').update(last_seen_at=newer)
+
+        self.tracker.touch('SENSOR_A001')
+        self.tracker.flush()
+
+        self.assertEqual(ParkingSlot.objects.get(slot_number='A01').last_seen_at, newer)
+
+    def test_touch_does_not_query_the_database(self):
+        with self.assertNumQueries(0):
+            self.tracker.touch('SENSOR_A001')
+
+    def test_flush_writes_one_update_per_second_in_chunks(self):
+        from . import liveness
+
+        # Three sensors seen in one second, one in the next
+        self.tracker._pending = {
+            ('T1', 'SENSOR_A001'): 1000.2, ('T1', 'SENSOR_A002'): 1000.7,
+            ('T1', 'SENSOR_A003'): 1000.9, ('T1', 'SENSOR_A004'): 1001.1,
+        }
+        make_slots(1, prefix='B')
+        ParkingSlot.objects.filter(slot_number='B01').update(sensor_id='SENSOR_A004')
+        with mock.patch.object(liveness, 'FLUSH_BATCH_SIZE', 2), self.assertNumQueries(3):
+            self.assertEqual(self.tracker.flush(), 4)
+
+        seen = dict(ParkingSlot.objects.values_list('sensor_id', 'last_seen_at'))
+        self.assertEqual(seen['SENSOR_A001'], datetime.fromtimestamp(1000, tz=dt_timezone.utc))
+        self.assertEqual(seen['SENSOR_A004'], datetime.fromtimestamp(1001, tz=dt_timezone.utc))
+
+    def test_failed_flush_keeps_the_times(self):
+        self.tracker.touch('SENSOR_A001')
+        with mock.patch('parking_app.liveness.ParkingSlot.objects.using', side_effect=RuntimeError('locked')):
+            with self.assertRaises(RuntimeError):
+                self.tracker.flush()
+
+        self.assertEqual(self.tracker.flush(), 1)
+        self.assertIsNotNone(ParkingSlot.objects.get(slot_number='A01').last_seen_at)
+
+    def test_background_flusher_starts_once_per_process(self):
+        from .liveness import HeartbeatTracker
+
+        tracker = HeartbeatTracker(flush_seconds=60)
+        with mock.patch('parking_app.liveness.threading.Thread') as thread:
+            tracker.touch('SENSOR_A001')
+            tracker.touch('SENSOR_A002')
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once_with()
+
+    @override_settings(SENSOR_STALE_AFTER_SECONDS=60)
+    def test_sensor_health_reports_stale_and_never_seen(self):
+        ParkingSlot.objects.filter(slot_number='A01').update(last_seen_at=timezone.now() - timedelta(minutes=5))
+        ParkingSlot.objects.filter(slot_number='A02').update(last_seen_at=timezone.now())
+
+        data = self.client.get('/api/sensor-health/').json()
+
+        self.assertEqual([s['sensor_id'] for s in data['stale']], ['SENSOR_A001'])
+        self.assertEqual([s['sensor_id'] for s in data['never_seen']], ['SENSOR_A003'])
+
+
+class SimulatorTests(ParkingTestCase):
+    sensors = ['SENSOR_A001', 'SENSOR_A002', 'SENSOR_A003']
+
+    def test_same_seed_gives_the_same_events(self):
+        from .simulator import FleetModel, generate_events
+
+        model = FleetModel(duration=6 * 3600, arrivals_per_hour=2)
+        events = generate_events(self.sensors, model, seed=42)
+
+        self.assertTrue(events)
+        self.assertEqual(events, generate_events(self.sensors, model, seed=42))
+        self.assertNotEqual(events, generate_events(self.sensors, model, seed=43))
+        self.assertEqual(events, sorted(events))
+
+    def test_without_flicker_each_sensor_alternates(self):
+        from .simulator import FleetModel, generate_events
+
+        model = FleetModel(duration=6 * 3600, arrivals_per_hour=2, flicker_probability=0)
+        events = generate_events(self.sensors, model, seed=7)
+        for sensor_id in self.sensors:
+            states = [occupied for _, sensor, occupied in events if sensor == sensor_id]
+            # Without flicker a sensor strictly alternates arrival/departure
+            self.assertEqual(states, [index % 2 == 0 for index in range(len(states))])
+
+    def test_log_round_trip(self):
+        from .simulator import FleetModel, generate_events, read_log, write_log
+
+        events = generate_events(self.sensors, FleetModel(duration=3600), seed=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.jsonl')
+            write_log(path, {'seed': 1}, events)
+            self.assertEqual(read_log(path), ({'seed': 1}, events))
+
+    @override_settings(SENSOR_GATEWAYS=GATEWAYS)
+    def test_replayed_frames_are_signed_and_accepted(self):
+        from .simulator import Replayer
+
+        make_slots(2)
+        test = self
+
+        class Connection:
+            def request(self, method, path, body, headers):
+                meta = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()
+                        if name != 'Content-Type'}
+                self.response = test.client.generic(method, path, body, content_type=headers['Content-Type'], **meta)
+
+            def getresponse(self):
+                response = self.response
+                response.status = response.status_code
+                response.read = lambda: response.content
+                return response
+
+        replayer = Replayer('http://testserver', gateways=GATEWAYS)
+        replayer.send_frames(Connection(), [(1.0, 'SENSOR_A001', True), (2.0, 'SENSOR_A002', True)])
+
+        self.assertEqual(replayer.errors, 0)
+        self.assertEqual(ParkingSlot.objects.filter(is_occupied=True).count(), 2)
+
+        # A later run numbers its readings from 1 again and is still applied
+        from django.db.models import F
+        from .models import SensorSequence
+        SensorSequence.objects.update(last_timestamp=F('last_timestamp') - 60)
+        rerun = Replayer('http://testserver', gateways=GATEWAYS)
+        rerun.send_frames(Connection(), [(1.0, 'SENSOR_A001', False)])
+        self.assertFalse(ParkingSlot.objects.get(slot_number='A01').is_occupied)
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class AdminTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        make_slots(3)
+
+    def test_plate_is_normalised_on_save(self):
+        booking = make_booking(vehicle_number='ka 01 ab-1234')
+        self.assertEqual(booking.plate, 'KA01AB1234')
+
+    def test_search_matches_bill_numbers_and_plate_prefixes(self):
+        make_booking(bill_number='B-1', vehicle_number='KA01AB1234')
+        make_booking(bill_number='B-2', vehicle_number='KA02CD5678')
+        make_booking(bill_number='B-3', vehicle_number='MH01EF0001')
+        url = '/admin/parking_app/parkingbooking/'
+
+        def found(term):
+            response = self.client.get(url, {'q': term})
+            return sorted(booking.bill_number for booking in response.context['cl'].result_list)
+
+        self.assertEqual(found('ka 0'), ['B-1', 'B-2'])
+        self.assertEqual(found('ka01'), ['B-1'])
+        self.assertEqual(found('B-3'), ['B-3'])
+        self.assertEqual(found('AB1234'), [])
+
+    def test_row_estimates_come_from_the_lot_database(self):
+        from .admin import EstimatedCountPaginator
+
+        lot_connection = mock.MagicMock(vendor='sqlite')
+        lot_connection.cursor.return_value.__enter__.return_value.fetchone.return_value = ('42 1',)
+        with mock.patch('parking_app.admin.connections', {'lot_t2': lot_connection}):
+            estimate = EstimatedCountPaginator.estimate_table_rows(ParkingBooking.objects.using('lot_t2'))
+
+        self.assertEqual(estimate, 42)
+
+    def test_release_slots_keeps_slots_with_open_bookings(self):
+        done = make_booking(bill_number='B-1', parking_slot='A01', status='paid', is_paid=True)
+        make_booking(bill_number='B-2', parking_slot='A02', status='active')
+        taken = make_booking(bill_number='B-3', parking_slot='A02', status='completed')
+        ParkingSlot.objects.update(is_reserved=True, is_occupied=True)
+
+        self.client.post('/admin/parking_app/parkingbooking/', {
+            'action': 'release_slots', '_selected_action': [done.pk, taken.pk],
+        })
+
+        self.assertFalse(ParkingSlot.objects.get(slot_number='A01').is_occupied)
+        self.assertTrue(ParkingSlot.objects.get(slot_number='A02').is_occupied)
+
+
+ADMISSION = {
+    'ENABLED': True,
+    'CACHE': 'admission',
+    'DEFAULT_CLASS': 'dashboard',
+    'ROUTES': {'sensor_data': 'sensor'},
+    'CLASSES': {
+        'dashboard': {'rate': 1, 'burst': 3},
+        'sensor': {'rate': 1, 'burst': 3},
+    },
+    'GLOBAL': {'rate': 5, 'burst': 5},
+    'RESERVE': {'dashboard': 0.4},
+}
+
+
+@override_settings(ADMISSION_CONTROL=ADMISSION, SENSOR_GATEWAYS=GATEWAYS)
+class AdmissionControlTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        make_slots(1)
+        # Every request lands in the same rate-limit window
+        clock = mock.patch('parking_app.ratelimit.time', **{'time.return_value': 1000.0})
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def dashboard(self, ip='10.0.0.1', **headers):
+        return self.client.get('/api/slots/available/', REMOTE_ADDR=ip, **headers)
+
+    def test_client_over_its_limit_gets_429(self):
+        statuses = [self.dashboard().status_code for _ in range(4)]
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        # 1 s into a 3 s window: the three hits weigh in fully at the next
+        # window's start and leave room for one more a second after that
+        self.assertEqual(self.dashboard()['Retry-After'], '3')
+
+    def test_dashboard_traffic_leaves_the_reserve_to_sensors(self):
+        statuses = [self.dashboard(ip=f'10.0.1.{n}').status_code for n in range(4)]
+        sensor = self.client.post('/api/sensor-data/', {'sensor_id': 'SENSOR_A001', 'is_occupied': True},
+                                  content_type='application/json', REMOTE_ADDR='10.0.2.1')
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(sensor.status_code, 200)
+
+    def test_unsigned_gateway_id_does_not_get_its_own_limit(self):
+        statuses = [self.dashboard(HTTP_X_GATEWAY_ID=f'GW-{n}').status_code for n in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_rejected_hits_are_refunded(self):
+        from .ratelimit import acquire
+
+        cache = caches['admission']
+        roomy, tight = {'rate': 1, 'burst': 5}, {'rate': 1, 'burst': 1}
+        self.assertIsNone(acquire(cache, [('client', roomy, 0), ('global', tight, 0)]))
+        for _ in range(3):
+            self.assertIsNotNone(acquire(cache, [('client', roomy, 0), ('global', tight, 0)]))
+
+        # Only the admitted hit counts against the client
+        self.assertEqual(cache.get('ratelimit:client:200'), 1)
+
+
+# Counts 200 hits against one shared limit in a separate process
+SHARED_LIMIT_WORKER = r"""
+import sys
+from parking_app.cache import SQLiteCache
+from parking_app.ratelimit import acquire
+cache = SQLiteCache(sys.argv[1], {})
+limits = {'rate': 1, 'burst': 50}
+print(sum(acquire(cache, [('shared', limits, 0)], now=1000.0) is None for _ in range(200)))
+"""
+
+
+class RateLimitTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'counters.sqlite3')
+
+    def test_no_second_burst_after_a_window_boundary(self):
+        from .ratelimit import acquire
+
+        cache = caches['admission']
+        limits = {'rate': 1, 'burst': 4}
+        # Four hits at the end of one window, then as many as allowed just after it
+        late = [acquire(cache, [('client', limits, 0)], now=1003.9) for _ in range(4)]
+        early = [acquire(cache, [('client', limits, 0)], now=1004.1) for _ in range(4)]
+
+        self.assertEqual(late, [None] * 4)
+        self.assertEqual(early.count(None), 0)
+        self.assertEqual(early[0], 1)
+
+    def test_room_frees_at_the_configured_rate(self):
+        from .ratelimit import acquire
+
+        cache = caches['admission']
+        limits = {'rate': 2, 'burst': 4}
+        for _ in range(4):
+            self.assertIsNone(acquire(cache, [('client', limits, 0)], now=1000.0))
+        # The full window fades over the next one, one hit per 1 / rate seconds
+        self.assertIsNotNone(acquire(cache, [('client', limits, 0)], now=1002.0))
+        self.assertIsNone(acquire(cache, [('client', limits, 0)], now=1002.5))
+        self.assertIsNotNone(acquire(cache, [('client', limits, 0)], now=1002.5))
+        self.assertIsNone(acquire(cache, [('client', limits, 0)], now=1003.0))
+
+    def test_refuses_caches_without_atomic_increments(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from .ratelimit import counter_cache
+
+        file_cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': self.path}
+        with override_settings(CACHES=dict(TEST_CACHES, files=file_cache)):
+            with self.assertRaises(ImproperlyConfigured):
+                counter_cache('files')
+
+    def test_sqlite_cache(self):
+        from .cache import SQLiteCache
+
+        cache = SQLiteCache(self.path, {})
+        self.assertTrue(cache.add('hits', 0, 10))
+        self.assertFalse(cache.add('hits', 5, 10))
+        self.assertEqual(cache.incr('hits', 3), 3)
+        self.assertEqual(cache.decr('hits'), 2)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+        cache.set('bundle', {'bill_number': 'B-1'}, 10)
+        self.assertEqual(cache.get('bundle'), {'bill_number': 'B-1'})
+        cache.set('gone', 1, 0)
+        self.assertIsNone(cache.get('gone'))
+        self.assertTrue(cache.add('gone', 2, 10))
+        self.assertTrue(cache.delete('bundle'))
+        self.assertFalse(cache.has_key('bundle'))
+
+    def test_worker_processes_share_one_limit(self):
+        import subprocess
+        import sys
+        from django.conf import settings
+
+        workers = [
+            subprocess.Popen([sys.executable, '-c', SHARED_LIMIT_WORKER, self.path],
+                             cwd=settings.BASE_DIR, stdout=subprocess.PIPE, text=True)
+            for _ in range(2)
+        ]
+        admitted = [int(worker.communicate(timeout=60)[0]) for worker in workers]
+
+        self.assertEqual(sum(admitted), 50)
+
+
+@override_settings(BILL_NUMBER_BLOCK_SIZE=3)
+class BillNumberTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        from .billing import BillNumberAllocator
+        self.allocator = BillNumberAllocator()
+
+    def sequence_numbers(self, allocator, count):
+        return [int(allocator.next_bill_number('T1').rsplit('-', 1)[1]) for _ in range(count)]
+
+    def test_numbers_carry_day_lot_and_sequence(self):
+        day = timezone.localdate().strftime('%y%m%d')
+        self.assertEqual(self.allocator.next_bill_number('T1'), f'BILL-{day}-T1-000001')
+
+    def test_blocks_are_refilled_without_gaps(self):
+        from .models import BillSequence
+
+        self.assertEqual(self.sequence_numbers(self.allocator, 7), [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(BillSequence.objects.get().next_value, 10)
+
+    def test_workers_never_share_numbers(self):
+        from .billing import BillNumberAllocator
+
+        other = BillNumberAllocator()
+        first = self.sequence_numbers(self.allocator, 4) + self.sequence_numbers(other, 4)
+        first += self.sequence_numbers(self.allocator, 2)
+        self.assertEqual(len(set(first)), len(first))
+
+    def test_block_from_a_rolled_back_transaction_is_not_reused(self):
+        from django.db import transaction
+        from .billing import BillNumberAllocator
+        from .models import BillSequence
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.sequence_numbers(self.allocator, 1)
+                raise RuntimeError('booking failed')
+        self.assertFalse(BillSequence.objects.exists())
+
+        # The rolled-back block is dropped and reserved again from the restored counter
+        self.assertEqual(self.sequence_numbers(self.allocator, 1), [1])
+        self.assertEqual(self.sequence_numbers(BillNumberAllocator(), 1), [4])
+        self.assertEqual(BillSequence.objects.get().next_value, 7)
+
+
+class ConditionalBookingTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        make_slots(1)
+        self.booking = make_booking(bill_number='B-1')
+        self.url = '/api/booking/B-1/'
+
+    def test_unchanged_booking_answers_304(self):
+        first = self.client.get(self.url)
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['ETag'], '"detail-B-1-v1"')
+        self.assertEqual(again.status_code, 304)
+
+    def test_saved_change_gets_a_new_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.booking.owner_name = 'Someone else'
+        self.booking.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"detail-B-1-v2"')
+        self.assertEqual(self.booking.version, 2)
+
+    def test_set_based_update_gets_a_new_etag(self):
+        from django.db.models import F
+
+        etag = self.client.get(self.url)['ETag']
+        ParkingBooking.objects.filter(pk=self.booking.pk).update(is_paid=True, version=F('version') + 1)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_paid'])
+
+
+class GateTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        from . import plates
+        plates._indexes.clear()
+        make_slots(2)
+        ParkingSlot.objects.filter(slot_number='A01').update(is_reserved=True)
+        self.booking = make_booking(bill_number='B-1', vehicle_number='KA01AB1234')
+
+    def gate(self, name, plate='ka01 ab 1234'):
+        return self.client.post(f'/api/gate/{name}/', {'vehicle_number': plate}, content_type='application/json')
+
+    def events(self, event_type):
+        from .models import OutboxEvent
+        return OutboxEvent.objects.filter(event_type=event_type).count()
+
+    def test_entry_then_exit(self):
+        entry = self.gate('entry')
+        self.assertEqual(entry.status_code, 200)
+        self.assertTrue(entry.json()['open_barrier'])
+
+        exit_ = self.gate('exit')
+        self.booking.refresh_from_db()
+        self.assertEqual(exit_.status_code, 200)
+        self.assertEqual(self.booking.status, 'completed')
+        self.assertFalse(ParkingSlot.objects.get(slot_number='A01').is_reserved)
+
+    def test_unknown_plate_is_404(self):
+        self.assertEqual(self.gate('entry', plate='XX00XX0000').status_code, 404)
+        self.assertEqual(self.gate('exit', plate='XX00XX0000').status_code, 404)
+
+    def test_exit_after_sensor_completed_the_booking_does_not_complete_it_again(self):
+        from .plates import PlateIndex
+        from .sensors import apply_sensor_state
+
+        ParkingBooking.objects.filter(pk=self.booking.pk).update(status='active')
+        stale = ParkingBooking.objects.get(pk=self.booking.pk)
+        slot = ParkingSlot.objects.get(slot_number='A01')
+        apply_sensor_state(slot, True)
+        apply_sensor_state(slot, False)
+        exit_time = ParkingBooking.objects.get(pk=self.booking.pk).actual_exit_time
+
+        # The gate read the booking as active just before the sensor completed it
+        with mock.patch.object(PlateIndex, 'lookup', return_value=[stale]):
+            response = self.gate('exit')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.events('booking.completed'), 1)
+        self.assertEqual(ParkingBooking.objects.get(pk=self.booking.pk).actual_exit_time, exit_time)
+
+    def test_entry_rechecks_the_status_under_the_lock(self):
+        from .plates import PlateIndex
+
+        stale = ParkingBooking.objects.get(pk=self.booking.pk)
+        ParkingBooking.objects.filter(pk=self.booking.pk).update(status='cancelled')
+
+        with mock.patch.object(PlateIndex, 'lookup', return_value=[stale]):
+            response = self.gate('entry')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.events('booking.started'), 0)
+
+    def test_lookup_resyncs_when_every_entry_is_stale(self):
+        from .plates import plate_index_for
+
+        index = plate_index_for()
+        self.assertEqual([b.bill_number for b in index.lookup('KA01AB1234')], ['B-1'])
+
+        # Another worker cancels B-1 and books the same plate again
+        ParkingBooking.objects.filter(pk=self.booking.pk).update(status='cancelled')
+        make_booking(bill_number='B-2', vehicle_number='KA01AB1234', parking_slot='A02')
+
+        self.assertEqual([b.bill_number for b in index.lookup('KA01AB1234')], ['B-2'])
+
+
+# Lots sharing the test database, for configuration checks and routing tests
+SHARED_LOTS = {
+    'T1': {'name': 'Terminal 1', 'database': 'default'},
+    'T2': {'name': 'Terminal 2', 'database': 'default'},
+}
+
+
+class LotTests(ParkingTestCase):
+    def test_unknown_lot_prefix_is_404(self):
+        response = self.client.get('/api/lots/ZZ/slots/available/')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['error'], 'Unknown parking lot: ZZ')
+
+    def test_lots_must_not_share_a_database(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from .lots import validate_lots
+
+        validate_lots()
+        with override_settings(PARKING_LOTS=SHARED_LOTS), self.assertRaises(ImproperlyConfigured):
+            validate_lots()
+        with override_settings(PARKING_LOTS={'T9': {'database': 'missing'}}), self.assertRaises(ImproperlyConfigured):
+            validate_lots()
+
+    @override_settings(PARKING_LOTS={'T1': {'database': 'default'}, 'T2': {'database': 'lot_t2'}})
+    def test_router_sends_lot_data_to_the_lot_database(self):
+        from django.contrib.auth.models import User
+        from django.db import router
+        from .lots import use_lot
+
+        with use_lot('T2'):
+            self.assertEqual(router.db_for_read(ParkingBooking), 'lot_t2')
+            self.assertEqual(router.db_for_write(ParkingSlot), 'lot_t2')
+            self.assertEqual(router.db_for_read(User), 'default')
+        self.assertEqual(router.db_for_read(ParkingBooking), 'default')
+
+    @override_settings(PARKING_LOTS=SHARED_LOTS, DEFAULT_LOT='T1')
+    def test_body_bill_numbers_are_served_by_their_lot(self):
+        from .lots import current_lot, use_lot
+
+        with use_lot('T2'):
+            make_slots(1)
+            make_booking(bill_number='BILL-261019-T2-000001')
+
+        # Record which lot the view opens its transaction in
+        lots = []
+        def database():
+            lots.append(current_lot())
+            return 'default'
+
+        with mock.patch('parking_app.views.current_database', side_effect=database):
+            response = self.client.post('/api/cancel-booking/', {'bill_number': 'BILL-261019-T2-000001'},
+                                        content_type='application/json')
+            self.client.post('/api/lots/T1/cancel-booking/', {'bill_number': 'BILL-261019-T2-000001'},
+                             content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        # A lot named in the URL wins over the bill number
+        self.assertEqual(lots, ['T2', 'T1'])
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class OutboxTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        make_slots(2)
+        start = timezone.now() + timedelta(hours=1)
+        self.payload = {
+            'vehicle_number': 'KA01AB1234', 'owner_name': 'Owner', 'phone_number': '9999999999',
+            'parking_slot': 'A01', 'booked_from': start.isoformat(), 'booked_until': (start + timedelta(hours=2)).isoformat(),
+        }
+
+    def book(self, **fields):
+        return self.client.post('/api/create-booking/', {**self.payload, **fields}, content_type='application/json')
+
+    def feed(self, **params):
+        return self.client.get('/api/events/', params).json()
+
+    def test_events_follow_the_order_of_changes(self):
+        bill = self.book().json()['bill_number']
+        self.client.post('/api/cancel-booking/', {'bill_number': bill}, content_type='application/json')
+
+        events = self.feed()['events']
+        self.assertEqual([(e['type'], e['key']) for e in events], [
+            ('booking.created', bill), ('slot.updated', 'A01'),
+            ('booking.cancelled', bill), ('slot.updated', 'A01'),
+        ])
+        self.assertEqual([e['payload']['is_reserved'] for e in events if e['type'] == 'slot.updated'], [True, False])
+
+    def test_feed_resumes_from_the_cursor(self):
+        self.book()
+        first = self.feed(limit=1)
+        rest = self.feed(after=first['next_cursor'])
+
+        self.assertTrue(first['has_more'])
+        self.assertEqual([e['type'] for e in rest['events']], ['slot.updated'])
+        self.assertFalse(rest['has_more'])
+
+    def test_failed_booking_leaves_the_slot_free(self):
+        with mock.patch('parking_app.views.record_booking_event', side_effect=RuntimeError('outbox down')):
+            self.assertEqual(self.book().status_code, 500)
+        self.assertEqual(self.book(phone_number='9' * 20).status_code, 400)
+
+        self.assertFalse(ParkingSlot.objects.get(slot_number='A01').is_reserved)
+        self.assertFalse(ParkingBooking.objects.exists())
+        self.assertEqual(self.feed()['events'], [])
+
+    def test_admin_actions_write_events(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        open_booking = make_booking(bill_number='B-1', parking_slot='A01')
+        done = make_booking(bill_number='B-2', parking_slot='A02', status='completed')
+        ParkingSlot.objects.filter(slot_number='A01').update(is_reserved=True)
+
+        for action, booking in (('cancel_bookings', open_booking), ('mark_paid', done)):
+            self.client.post('/admin/parking_app/parkingbooking/', {
+                'action': action, '_selected_action': [booking.pk],
+            })
+
+        events = [(e['type'], e['key']) for e in self.feed()['events']]
+        self.assertEqual(events, [('booking.cancelled', 'B-1'), ('slot.updated', 'A01'), ('booking.paid', 'B-2')])
+        self.assertEqual(self.feed(types='booking.paid')['events'][0]['payload']['status'], 'paid')
+
+
+class DailySummaryTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        make_slots(2)
+        self.start = timezone.now().replace(microsecond=0) - timedelta(days=2)
+
+    def rows(self):
+        from .models import DailySummary
+        # Subtracting a booking's contribution can leave all-zero rows that a rebuild omits
+        return sorted(DailySummary.objects.filter(bookings__gt=0).values_list(
+            'day', 'floor_number', 'payment_method', 'status', 'bookings', 'total_amount', 'paid_amount', 'duration_minutes'
+        ))
+
+    def rebuilt(self):
+        from .summaries import rebuild_range
+        incremental = self.rows()
+        day = timezone.localdate(self.start)
+        rebuild_range(day - timedelta(days=1), day + timedelta(days=1))
+        return incremental, self.rows()
+
+    def close(self, booking, **fields):
+        for name, value in fields.items():
+            setattr(booking, name, value)
+        booking.save()
+
+    def test_incremental_updates_match_a_rebuild(self):
+        first = make_booking(bill_number='B-1', booked_from=self.start, booked_until=self.start + timedelta(hours=2))
+        second = make_booking(bill_number='B-2', parking_slot='A02', booked_from=self.start,
+                              booked_until=self.start + timedelta(hours=3))
+        self.close(first, status='completed', duration_minutes=120, total_amount=20)
+        self.close(first, status='paid', is_paid=True, payment_method='upi')
+        self.close(second, status='cancelled')
+
+        incremental, rebuilt = self.rebuilt()
+        self.assertEqual(len(incremental), 2)
+        self.assertEqual(incremental, rebuilt)
+
+    def test_saving_a_stale_copy_does_not_drift(self):
+        booking = make_booking(bill_number='B-1', booked_from=self.start, booked_until=self.start + timedelta(hours=2))
+        stale = ParkingBooking.objects.get(pk=booking.pk)
+        # Another writer completes and is paid for the booking in the meantime
+        self.close(booking, status='completed', duration_minutes=120, total_amount=20)
+        self.close(ParkingBooking.objects.get(pk=booking.pk), status='paid', is_paid=True)
+
+        self.close(stale, status='completed', duration_minutes=120, total_amount=20)
+
+        incremental, rebuilt = self.rebuilt()
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(ParkingBooking.objects.get(pk=booking.pk).version, 4)
+
+    def test_rebuild_counts_bookings_after_taking_the_write_lock(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .summaries import rebuild_range
+
+        make_booking(bill_number='B-1', booked_from=self.start, booked_until=self.start + timedelta(hours=2),
+                     status='cancelled')
+        day = timezone.localdate(self.start)
+        with CaptureQueriesContext(connection) as queries:
+            rebuild_range(day, day)
+
+        statements = [query['sql'].split()[0] for query in queries.captured_queries]
+        self.assertLess(statements.index('DELETE'), statements.index('SELECT'))
+
+    def test_backfill_command_rebuilds_from_scratch(self):
+        from .models import DailySummary
+
+        booking = make_booking(bill_number='B-1', booked_from=self.start, booked_until=self.start + timedelta(hours=2))
+        self.close(booking, status='completed', duration_minutes=120, total_amount=20)
+        expected = self.rows()
+        DailySummary.objects.all().delete()
+
+        call_command('backfill_summaries', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.rows(), expected)
+
+
+class WarmupTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        from . import plates, warmup
+        plates._indexes.clear()
+        warmup._warmed_pid = None
+
+    def test_warms_once_per_process(self):
+        from .plates import plate_index_for
+        from .warmup import STEPS, warm_up
+
+        make_slots(1)
+        make_booking(bill_number='B-1')
+        timings = warm_up()
+        self.assertEqual(set(timings), {name for name, step in STEPS})
+        self.assertTrue(plate_index_for('T1')._warm)
+
+        self.assertEqual(warm_up(), {})
+        self.assertEqual(set(warm_up(force=True)), set(timings))
+
+    def test_closes_the_connections_it_opened(self):
+        from .warmup import warm_up
+
+        idle, in_transaction = mock.Mock(in_atomic_block=False), mock.Mock(in_atomic_block=True)
+        with mock.patch('parking_app.warmup.connections') as connections:
+            connections.all.return_value = [idle, in_transaction]
+            warm_up()
+        idle.close.assert_called_once_with()
+        in_transaction.close.assert_not_called()
+
+    @override_settings(PARKING_WARMUP=False)
+    def test_can_be_switched_off(self):
+        from .warmup import warm_up
+        self.assertEqual(warm_up(), {})
+
+    def test_a_failing_step_does_not_stop_the_others(self):
+        from . import warmup
+
+        ran = []
+        steps = [('broken', mock.Mock(side_effect=RuntimeError('cold'))), ('next', lambda: ran.append(True))]
+        with mock.patch.object(warmup, 'STEPS', steps), self.assertLogs('parking_app.warmup', 'ERROR'):
+            timings = warmup.warm_up()
+        self.assertEqual(set(timings), {'broken', 'next'})
+        self.assertEqual(ran, [True])
+
+    def test_loads_the_static_manifest(self):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        from .warmup import _load_static_manifest
+
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with open(os.path.join(root, 'staticfiles.json'), 'w') as manifest:
+            json.dump({'version': '1.1', 'paths': {'app.css': 'app.1234.css'}, 'hash': '1234'}, manifest)
+        storages = dict(PLAIN_STORAGES, staticfiles={
+            'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+        })
+        with override_settings(STATIC_ROOT=root, STORAGES=storages):
+            _load_static_manifest()
+            self.assertEqual(staticfiles_storage._wrapped.hashed_files, {'app.css': 'app.1234.css'})
+
+    def test_templates_step_compiles_the_dashboard(self):
+        from django.template import engines
+        from .warmup import _load_templates
+
+        loader = engines['django'].engine.template_loaders[0]
+        loader.reset()
+        _load_templates()
+        self.assertIn('index.html', loader.get_template_cache)
+
+
+class FailingProvider:
+    """Notification provider that raises options['ERROR'] on every send"""
+
+    def __init__(self, name, options):
+        self.error = options['ERROR']
+
+    def send(self, recipient, message):
+        raise self.error
+
+
+class NotificationTests(ParkingTestCase):
+    def setUp(self):
+        super().setUp()
+        from . import notifications
+        from .notifications import NotificationError, RejectedNotification
+
+        notifications._providers.clear()
+        self.addCleanup(notifications._providers.clear)
+        self.sink = os.path.join(tempfile.mkdtemp(), 'sent.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.sink))
+        settings = override_settings(NOTIFICATIONS={
+            'PROVIDER': 'file',
+            'PROVIDERS': {
+                'file': {'BACKEND': 'parking_app.notifications.FileProvider', 'PATH': self.sink},
+                'limited': {'BACKEND': 'parking_app.notifications.FileProvider', 'PATH': self.sink,
+                            'RATE_LIMIT': {'rate': 1, 'burst': 2}},
+                'flaky': {'BACKEND': 'parking_app.tests.FailingProvider', 'ERROR': NotificationError('timeout')},
+                'rejecting': {'BACKEND': 'parking_app.tests.FailingProvider',
+                              'ERROR': RejectedNotification('invalid number')},
+            },
+            'MAX_ATTEMPTS': 3,
+            'RETRY_SECONDS': 60,
+            'LEASE_SECONDS': 300,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        make_slots(3)
+        self.now = timezone.now()
+
+    def ending(self, bill_number='B-1', slot='A01', **fields):
+        return make_booking(bill_number=bill_number, parking_slot=slot, status='active',
+                            booked_until=self.now + timedelta(minutes=10), **fields)
+
+    def queued(self, provider='file'):
+        from .models import Notification
+        from .notifications import schedule_due
+
+        schedule_due(self.now)
+        # Queued "at" self.now, so deliver(self.now) finds them due
+        Notification.objects.update(provider=provider, next_attempt_at=self.now)
+        return Notification.objects.order_by('pk')
+
+    def sent(self):
+        if not os.path.exists(self.sink):
+            return []
+        with open(self.sink, encoding='utf-8') as sink:
+            return [json.loads(line) for line in sink]
+
+    def test_rescans_queue_each_reminder_once(self):
+        from .models import Notification
+        from .notifications import schedule_due
+
+        booking = self.ending()
+        make_booking(bill_number='B-2', parking_slot='A02', phone_number='', status='active',
+                     booked_until=self.now + timedelta(minutes=10))
+        self.assertEqual(schedule_due(self.now), 1)
+        self.assertEqual(schedule_due(self.now), 0)
+
+        # An extended booking is reminded again for its new end
+        booking.booked_until += timedelta(minutes=5)
+        booking.save()
+        self.assertEqual(schedule_due(self.now), 1)
+        self.assertEqual(Notification.objects.filter(bill_number='B-1').count(), 2)
+
+    def test_sends_due_reminders(self):
+        from .notifications import deliver
+
+        self.ending()
+        notification = self.queued().get()
+        self.assertEqual(deliver(self.now), {'sent': 1, 'retried': 0, 'failed': 0, 'skipped': 0})
+
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('sent', 1))
+        [message] = self.sent()
+        self.assertEqual(message['recipient'], '9999999999')
+        self.assertIn('B-1', message['message'])
+
+    def test_failures_back_off_then_give_up(self):
+        from .notifications import deliver
+
+        self.ending()
+        notification = self.queued('flaky').get()
+        delays = []
+        for expected in ('retried', 'retried', 'failed'):
+            started = timezone.now()
+            counts = deliver(notification.next_attempt_at)
+            self.assertEqual(counts[expected], 1)
+            notification.refresh_from_db()
+            delays.append((notification.next_attempt_at - started).total_seconds())
+
+        self.assertEqual((notification.status, notification.attempts), ('failed', 3))
+        self.assertEqual(notification.last_error, 'timeout')
+        self.assertAlmostEqual(delays[0], 60, delta=5)
+        self.assertAlmostEqual(delays[1], 120, delta=5)
+
+    def test_rejected_messages_are_not_retried(self):
+        from .notifications import deliver
+
+        self.ending()
+        notification = self.queued('rejecting').get()
+        self.assertEqual(deliver(self.now)['failed'], 1)
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('failed', 1))
+
+    def test_lapsed_leases_are_reclaimed(self):
+        from .notifications import deliver
+
+        self.ending()
+        self.ending(bill_number='B-2', slot='A02', vehicle_number='KA01AB5678')
+        lapsed, held = self.queued()
+        # A worker died while sending the first; another still holds the second
+        lapsed.status, lapsed.attempts, lapsed.next_attempt_at = 'sending', 1, self.now - timedelta(seconds=1)
+        lapsed.save()
+        held.status, held.attempts, held.next_attempt_at = 'sending', 1, self.now + timedelta(seconds=200)
+        held.save()
+
+        self.assertEqual(deliver(self.now)['sent'], 1)
+        lapsed.refresh_from_db()
+        held.refresh_from_db()
+        self.assertEqual((lapsed.status, lapsed.attempts), ('sent', 2))
+        self.assertEqual(held.status, 'sending')
+        self.assertEqual([message['message'] for message in self.sent()], [lapsed.message])
+
+    def test_claimed_rows_are_not_sent_twice(self):
+        from .notifications import _claim
+
+        self.ending()
+        notification = self.queued().get()
+        self.assertTrue(_claim(notification, self.now, 300))
+        self.assertFalse(_claim(notification, self.now, 300))
+
+    def test_changed_bookings_are_skipped(self):
+        from .notifications import deliver
+
+        booking = self.ending()
+        notification = self.queued().get()
+        booking.status = 'completed'
+        booking.save()
+
+        self.assertEqual(deliver(self.now)['skipped'], 1)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'skipped')
+        self.assertEqual(self.sent(), [])
+
+    def test_rate_limit_leaves_the_rest_for_later(self):
+        from .models import Notification
+        from .notifications import deliver
+
+        for index in range(1, 4):
+            self.ending(bill_number=f'B-{index}', slot=f'A{index:02d}', vehicle_number=f'KA01AB000{index}')
+        self.queued('limited')
+
+        # burst 2 at 1 per second: a 2 second window
+        with mock.patch('parking_app.ratelimit.time', **{'time.return_value': 1000.0}):
+            self.assertEqual(deliver(self.now)['sent'], 2)
+            self.assertEqual(deliver(self.now)['sent'], 0)
+        # The refused row was handed back as it was
+        waiting = Notification.objects.get(status='pending')
+        self.assertEqual((waiting.attempts, waiting.next_attempt_at), (0, self.now))
+        # Halfway through the next window the first two weigh as one
+        with mock.patch('parking_app.ratelimit.time', **{'time.return_value': 1003.0}):
+            self.assertEqual(deliver(self.now)['sent'], 1)
+        self.assertEqual(len(self.sent()), 3)
+
+    def test_rows_lost_to_another_worker_use_no_rate(self):
+        from .notifications import deliver
+
+        self.ending()
+        self.queued('limited')
+        with mock.patch('parking_app.notifications._claim', return_value=False), \
+                mock.patch('parking_app.notifications.take_token') as take_token:
+            self.assertEqual(deliver(self.now)['sent'], 0)
+        take_token.assert_not_called()
+
+    def test_rate_limits_refuse_a_cache_without_atomic_increments(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from django.conf import settings
+        from .notifications import deliver
+
+        self.ending()
+        self.queued('limited')
+        file_cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                      'LOCATION': os.path.dirname(self.sink)}
+        with override_settings(CACHES=dict(TEST_CACHES, files=file_cache),
+                               NOTIFICATIONS=dict(settings.NOTIFICATIONS, CACHE='files')):
+            with self.assertRaises(ImproperlyConfigured):
+                deliver(self.now)
@@ -11,10 +11,13 @@ urlpatterns = [
     path('test/', views.test_api, name='test_api'),
     path('get-slots/', views.get_slots, name='get_slots'),
     path('sensor-data/', views.sensor_data, name='sensor_data'),
+    path('sensor-frame/', views.sensor_frame, name='sensor_frame'),
+    path('sensor-health/', views.sensor_health, name='sensor_health'),
     path('slots/available/', views.available_slots, name='available_slots'),
     
     # Booking endpoints
     path('create-booking/', views.create_booking, name='create_booking'),
+    path('create-group-booking/', views.create_group_booking, name='create_group_booking'),
     path('booking-history/', views.booking_history, name='booking_history'),
     path('booking/<str:bill_number>/', views.get_booking_details, name='get_booking_details'),
     path('bookings/search/', views.ParkingBookingViewSet.as_view({'get': 'search'}), name='booking_search'),
@@ -31,4 +34,17 @@ urlpatterns = [
     # QR Code endpoints
     path('booking/<str:bill_number>/qr-code/', views.generate_qr_code, name='generate_qr_code'),
     path('booking/<str:bill_number>/qr-image/', views.get_payment_qr, name='get_payment_qr'),
+    
+    # Gate barriers with plate readers
+    path('gate/entry/', views.gate_entry, name='gate_entry'),
+    path('gate/exit/', views.gate_exit, name='gate_exit'),
+    
+    # Change feed of booking and slot events
+    path('events/', views.change_feed, name='change_feed'),
+    
+    # Reporting from the daily summaries
+    path('reports/summary/', views.summary_report, name='summary_report'),
+    
+    # Forecasting
+    path('forecast/', views.demand_forecast, name='demand_forecast'),
 ]
\ No newline at end of file
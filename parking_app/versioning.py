@@ -0,0 +1,68 @@
+"""Versioned, conditional booking responses.
+
+Every booking carries a `version` that is bumped whenever it is saved or
+updated. The ETag is read from that column with one lookup on the unique
+bill_number index, so it can never be staler than the row: a poll with a
+matching If-None-Match is answered 304 without loading or rendering the
+booking. Rendered bundles (detail payload, QR PNG) are cached per version
+so a changed booking is only rendered once; an evicted bundle is simply
+rendered again.
+"""
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .models import ParkingBooking, ArchivedBooking
+
+BUNDLE_TIMEOUT = 3600
+
+
+def current_version(bill_number):
+    """Version of a booking from the hot table or the archive, or None"""
+    for model in (ParkingBooking, ArchivedBooking):
+        version = model.objects.filter(bill_number=bill_number).values_list('version', flat=True).first()
+        if version is not None:
+            return version
+    return None
+
+
+def cached_bundle(kind, bill_number, version, build):
+    """Return the rendered `kind` bundle for this booking version, building it once"""
+    key = f'booking-bundle:{kind}:{bill_number}:{version}'
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = build()
+        cache.set(key, bundle, BUNDLE_TIMEOUT)
+    return bundle
+
+
+def conditional_booking(kind):
+    """ETag/If-None-Match support for views taking a bill_number.
+
+    Sets `request.booking_version` for the view so it can use cached_bundle.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, bill_number, *args, **kwargs):
+            version = current_version(bill_number)
+            if version is None:
+                return view(request, bill_number, *args, **kwargs)
+
+            etag = f'"{kind}-{bill_number}-v{version}"'
+            # GZipMiddleware weakens ETags, so compare weakly
+            client_etags = {tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))}
+
+            if etag in client_etags or '*' in client_etags:
+                response = HttpResponseNotModified()
+            else:
+                request.booking_version = version
+                response = view(request, bill_number, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapped
+    return decorator
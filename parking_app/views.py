@@ -1,16 +1,25 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, action
+from rest_framework.decorators import api_view, action, authentication_classes, permission_classes, parser_classes
 from rest_framework.response import Response
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q
 from django.db import transaction
-from .models import ParkingSlot, ParkingBooking
-from .serializers import ParkingSlotSerializer, ParkingBookingSerializer
-from datetime import datetime
+from .models import ParkingSlot, ParkingBooking, ArchivedBooking
+from .serializers import ParkingSlotSerializer, ParkingBookingSerializer, ArchivedBookingSerializer, serialize_booking_history
+from .archive import merged_history, search_filter, find_booking
+from .sensors import apply_sensor_state, ingest_frame, complete_booking
+from .plates import plate_index_for
+from .outbox import record_booking_event, record_slot_event, change_feed as read_change_feed, DEFAULT_FEED_LIMIT
+from .lots import current_database, cross_lot_availability, cross_lot_report, lot_from_body
+from .parsers import SensorFrameParser
+from .authentication import GatewayHMACAuthentication, IsSensorGateway
+from .liveness import tracker as heartbeat_tracker, unhealthy_sensors
+from .versioning import conditional_booking, cached_bundle
+from .qr import PAYEE_NAME, UPI_ID, payment_url, render_png
+from datetime import datetime, timedelta
 import math
-import qrcode
-import qrcode.image.svg
-from io import BytesIO
+from decimal import Decimal
 import base64
 import json
 
@@ -43,19 +52,10 @@ class ParkingBookingViewSet(viewsets.ModelViewSet):
     def search(self, request):
         """Search bookings by various criteria"""
         query = request.query_params.get('q', '')
-        if query:
-            bookings = ParkingBooking.objects.filter(
-                Q(vehicle_number__icontains=query) |
-                Q(owner_name__icontains=query) |
-                Q(phone_number__icontains=query) |
-                Q(bill_number__icontains=query) |
-                Q(parking_slot__icontains=query)
-            ).order_by('-created_at')
-        else:
-            bookings = ParkingBooking.objects.all().order_by('-created_at')
         
-        serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data)
+        # Search both live and archived bookings
+        bookings = merged_history(search_filter(query) if query else None)
+        return Response(serialize_booking_history(bookings))
 
 @api_view(['GET'])
 def get_slots(request):
@@ -75,55 +75,11 @@ def sensor_data(request):
     
     try:
         slot = ParkingSlot.objects.get(sensor_id=sensor_id)
+        heartbeat_tracker.touch(sensor_id)
         
-        # Update slot status
-        slot.is_occupied = is_occupied
-        slot.save()
-        
-        # Handle vehicle entry
-        if is_occupied:
-            # Find active booking for this slot
-            active_booking = ParkingBooking.objects.filter(
-                parking_slot=slot.slot_number,
-                status='reserved',
-                booked_from__lte=timezone.now(),
-                booked_until__gte=timezone.now()
-            ).first()
-            
-            if active_booking:
-                active_booking.status = 'active'
-                active_booking.actual_entry_time = timezone.now()
-                active_booking.save()
-                
-        # Handle vehicle exit
-        else:
-            # Find active booking for this slot
-            active_booking = ParkingBooking.objects.filter(
-                parking_slot=slot.slot_number,
-                status='active'
-            ).first()
-            
-            if active_booking:
-                # Complete the booking
-                active_booking.status = 'completed'
-                active_booking.actual_exit_time = timezone.now()
-                
-                # Calculate actual amount
-                entry_time = active_booking.actual_entry_time or active_booking.booked_from
-                exit_time = active_booking.actual_exit_time
-                duration = (exit_time - entry_time).total_seconds() / 60
-                active_booking.duration_minutes = int(duration)
-                
-                # Calculate with fixed rate of ₹10 per hour, NO FREE MINUTES
-                hours = math.ceil(duration / 60)
-                active_booking.total_amount = round(float(hours) * 10.00, 2)
-                
-                active_booking.save()
-                
-                # Free the slot
-                slot.is_reserved = False
-                slot.is_occupied = False
-                slot.save()
+        # Periodic heartbeats only touch the database when they correct a missed change
+        if not request.data.get('heartbeat') or slot.is_occupied != is_occupied:
+            apply_sensor_state(slot, is_occupied)
         
         return Response({
             'status': 'success', 
@@ -136,29 +92,28 @@ def sensor_data(request):
     except ParkingSlot.DoesNotExist:
         return Response({'error': 'Sensor not found'}, status=404)
 
+@api_view(['POST'])
+@authentication_classes([GatewayHMACAuthentication])
+@permission_classes([IsSensorGateway])
+@parser_classes([SensorFrameParser])
+def sensor_frame(request):
+    """Handle compact binary sensor frames from HMAC-authenticated gateways"""
+    records = request.data.get('records', [])
+    result = ingest_frame(request.auth, records)
+    
+    return Response({
+        'status': 'success',
+        'gateway_id': request.auth['gateway_id'],
+        'received': len(records),
+        **result
+    })
+
 @api_view(['POST'])
 def create_booking(request):
     """Create a new parking booking"""
     try:
         data = request.data
-        
-        # Get the parking slot
         slot_number = data.get('parking_slot')
-        try:
-            slot = ParkingSlot.objects.get(slot_number=slot_number)
-            
-            # Check if slot is available
-            if slot.is_occupied or slot.is_reserved:
-                return Response({
-                    'error': f'Slot {slot_number} is already occupied or reserved'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Reserve the slot
-            slot.is_reserved = True
-            slot.save()
-            
-        except ParkingSlot.DoesNotExist:
-            return Response({'error': 'Parking slot not found'}, status=404)
         
         # Parse datetime strings
         booked_from_str = data.get('booked_from')
@@ -182,134 +137,168 @@ def create_booking(request):
                 'error': 'Minimum booking duration is 1 hour'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create booking data with fixed rate
-        booking_data = {
-            'vehicle_number': data['vehicle_number'],
-            'owner_name': data['owner_name'],
-            'phone_number': data['phone_number'],
-            'parking_slot': slot_number,
-            'booked_from': booked_from,
-            'booked_until': booked_until,
-            'sensor_id': slot.sensor_id,
-            'floor_number': slot.floor_number,
-            'status': 'reserved'
-        }
-        
-        serializer = ParkingBookingSerializer(data=booking_data)
-        if serializer.is_valid():
-            booking = serializer.save()
+        # The slot is locked, checked and reserved in the transaction that
+        # creates the booking, so a failed booking never leaves it reserved
+        with transaction.atomic(using=current_database()):
+            try:
+                slot = ParkingSlot.objects.select_for_update().get(slot_number=slot_number)
+            except ParkingSlot.DoesNotExist:
+                return Response({'error': 'Parking slot not found'}, status=404)
             
-            return Response({
-                'status': 'success',
-                'message': 'Parking booking created successfully',
-                'bill_number': booking.bill_number,
-                'vehicle_number': booking.vehicle_number,
-                'owner_name': booking.owner_name,
-                'phone_number': booking.phone_number,
-                'parking_slot': booking.parking_slot,
-                'duration_minutes': int(duration),
-                'total_amount': booking.total_amount,
-                'booking': serializer.data,
-                'slot_reserved': True,
-                'slot_number': slot_number
-            }, status=status.HTTP_201_CREATED)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            # Check if slot is available
+            if slot.is_occupied or slot.is_reserved:
+                return Response({
+                    'error': f'Slot {slot_number} is already occupied or reserved'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Create booking data with fixed rate
+            booking_data = {
+                'vehicle_number': data['vehicle_number'],
+                'owner_name': data['owner_name'],
+                'phone_number': data['phone_number'],
+                'parking_slot': slot_number,
+                'booked_from': booked_from,
+                'booked_until': booked_until,
+                'sensor_id': slot.sensor_id,
+                'floor_number': slot.floor_number,
+                'status': 'reserved'
+            }
+            
+            serializer = ParkingBookingSerializer(data=booking_data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Reserve the slot
+            slot.is_reserved = True
+            slot.save()
+            booking = serializer.save()
+            record_booking_event('booking.created', booking)
+            record_slot_event(slot)
+        
+        return Response({
+            'status': 'success',
+            'message': 'Parking booking created successfully',
+            'bill_number': booking.bill_number,
+            'vehicle_number': booking.vehicle_number,
+            'owner_name': booking.owner_name,
+            'phone_number': booking.phone_number,
+            'parking_slot': booking.parking_slot,
+            'duration_minutes': int(duration),
+            'total_amount': booking.total_amount,
+            'booking': serializer.data,
+            'slot_reserved': True,
+            'slot_number': slot_number
+        }, status=status.HTTP_201_CREATED)
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+def create_group_booking(request):
+    """Create many bookings at once (tour groups, airline crews), all or nothing"""
+    from .group_booking import create_group_booking as book_group, GroupBookingError
+
+    data = request.data
+    items = data.get('bookings')
+    if not isinstance(items, list):
+        return Response({'error': 'bookings must be a list'}, status=400)
+
+    try:
+        result = book_group(data, items)
+    except GroupBookingError as e:
+        return Response({
+            'status': 'error',
+            'error': str(e),
+            'bookings': e.items
+        }, status=e.status_code)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        'status': 'success',
+        'message': f"{len(result['bookings'])} bookings created successfully",
+        **result
+    }, status=status.HTTP_201_CREATED)
+
 @api_view(['GET'])
+@conditional_booking('detail')
 def get_booking_details(request, bill_number):
     """Get detailed booking information"""
     try:
-        booking = ParkingBooking.objects.get(bill_number=bill_number)
-        serializer = ParkingBookingSerializer(booking)
-        
-        # Calculate breakdown with fixed rate
-        duration_minutes = booking.duration_minutes or 0
-        
-        breakdown = []
-        hours = math.ceil(duration_minutes / 60)
-        
-        for i in range(1, hours + 1):
-            if i == 1:
-                description = f"First hour"
-            else:
-                description = f"Hour {i}"
-            
-            breakdown.append({
-                'description': description,
-                'rate': '₹10/hour',
-                'amount': 10.00
-            })
-        
-        # Generate QR code data for payment
-        qr_data = generate_qr_data(booking)
-        
-        response_data = serializer.data
-        response_data['breakdown'] = breakdown
-        response_data['qr_data'] = qr_data
-        
+        # Rendered once per booking version; polls with a matching ETag never get here
+        response_data = cached_bundle(
+            'detail', bill_number, getattr(request, 'booking_version', None),
+            lambda: build_booking_details(find_booking(bill_number))
+        )
         return Response(response_data)
         
     except ParkingBooking.DoesNotExist:
         return Response({'error': 'Booking not found'}, status=404)
 
-def generate_qr_data(booking):
-    """Generate QR code data for UPI payment"""
-    # Create UPI payment URL
-    upi_id = "ravirajvibhute09@okicici"  # Replace with your actual UPI ID
-    amount = float(booking.total_amount)
+def build_booking_details(booking):
+    """Serialized booking with its hourly breakdown and payment QR data"""
+    serializer = ArchivedBookingSerializer(booking) if isinstance(booking, ArchivedBooking) else ParkingBookingSerializer(booking)
+    
+    # Calculate breakdown with fixed rate
+    duration_minutes = booking.duration_minutes or 0
     
-    # UPI payment URL format: upi://pay?pa=UPI_ID&pn=MerchantName&am=Amount&tn=TransactionNote
-    upi_url = f"upi://pay?pa={upi_id}&pn=Smart%20Parking%20System&am={amount}&tn=Parking%20Bill%20{booking.bill_number}"
+    breakdown = []
+    hours = math.ceil(duration_minutes / 60)
     
-    # Generate QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(upi_url)
-    qr.make(fit=True)
+    for i in range(1, hours + 1):
+        if i == 1:
+            description = f"First hour"
+        else:
+            description = f"Hour {i}"
+        
+        breakdown.append({
+            'description': description,
+            'rate': '₹10/hour',
+            'amount': 10.00
+        })
     
-    # Create QR code image
-    img = qr.make_image(fill_color="black", back_color="white")
+    # Generate QR code data for payment
+    qr_data = generate_qr_data(booking)
     
-    # Convert image to base64 string
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
+    response_data = dict(serializer.data)
+    response_data['breakdown'] = breakdown
+    response_data['qr_data'] = qr_data
+    return response_data
+
+def generate_qr_data(booking):
+    """Generate QR code data for UPI payment"""
+    upi_url = payment_url(booking)
+    img_str = base64.b64encode(render_png(upi_url)).decode()
     
     return {
         'upi_url': upi_url,
-        'upi_id': upi_id,
-        'amount': amount,
+        'upi_id': UPI_ID,
+        'amount': float(booking.total_amount),
         'bill_number': booking.bill_number,
         'qr_code_base64': img_str,
         'payment_details': {
-            'payee_name': 'Smart Parking System',
+            'payee_name': PAYEE_NAME,
             'transaction_note': f'Parking Bill: {booking.bill_number}',
             'currency': 'INR'
         }
     }
 
 @api_view(['GET'])
+@conditional_booking('qr-code')
 def generate_qr_code(request, bill_number):
     """Generate and return QR code image for payment"""
     try:
-        booking = ParkingBooking.objects.get(bill_number=bill_number)
-        
-        # Generate QR code data
-        qr_data = generate_qr_data(booking)
+        # Generate QR code data once per booking version
+        qr_data = cached_bundle(
+            'qr-code', bill_number, getattr(request, 'booking_version', None),
+            lambda: generate_qr_data(find_booking(bill_number))
+        )
         
         # Return QR code as base64 string
         return Response({
             'status': 'success',
             'bill_number': bill_number,
-            'amount': float(booking.total_amount),
+            'amount': qr_data['amount'],
             'qr_code': qr_data['qr_code_base64'],
             'upi_url': qr_data['upi_url'],
             'payment_url': qr_data['upi_url']
@@ -321,43 +310,28 @@ def generate_qr_code(request, bill_number):
         return Response({'error': str(e)}, status=500)
 
 @api_view(['GET'])
+@conditional_booking('qr-image')
 def get_payment_qr(request, bill_number):
     """Generate QR code image and return as PNG response"""
     try:
-        booking = ParkingBooking.objects.get(bill_number=bill_number)
-        
-        # Create UPI payment URL
-        upi_id = "ravirajvibhute09@okicici"  # Replace with your actual UPI ID
-        amount = float(booking.total_amount)
-        upi_url = f"upi://pay?pa={upi_id}&pn=Smart%20Parking%20System&am={amount}&tn=Parking%20Bill%20{booking.bill_number}"
-        
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
+        png = cached_bundle(
+            'qr-image', bill_number, getattr(request, 'booking_version', None),
+            lambda: render_payment_qr_png(find_booking(bill_number))
         )
-        qr.add_data(upi_url)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save to bytes buffer
-        buffer = BytesIO()
-        img.save(buffer, "PNG")
-        buffer.seek(0)
         
         # Return image response
         from django.http import HttpResponse
-        response = HttpResponse(buffer.getvalue(), content_type="image/png")
+        response = HttpResponse(png, content_type="image/png")
         response['Content-Disposition'] = f'attachment; filename="payment_qr_{bill_number}.png"'
         return response
         
     except ParkingBooking.DoesNotExist:
         return Response({'error': 'Booking not found'}, status=404)
 
+def render_payment_qr_png(booking):
+    """Render the UPI payment QR code for a booking as PNG bytes"""
+    return render_png(payment_url(booking))
+
 @api_view(['GET'])
 def available_slots(request):
     """Get all available parking slots"""
@@ -367,10 +341,8 @@ def available_slots(request):
 
 @api_view(['GET'])
 def booking_history(request):
-    """Get all booking history"""
-    bookings = ParkingBooking.objects.all().order_by('-created_at')
-    serializer = ParkingBookingSerializer(bookings, many=True)
-    return Response(serializer.data)
+    """Get all booking history, including archived bookings"""
+    return Response(serialize_booking_history(merged_history()))
 
 @api_view(['GET'])
 def all_slots(request):
@@ -392,6 +364,7 @@ def active_bookings(request):
     return Response(serializer.data)
 
 @api_view(['POST'])
+@lot_from_body
 def cancel_booking(request):
     """Cancel an active booking"""
     try:
@@ -401,7 +374,7 @@ def cancel_booking(request):
         if not bill_number:
             return Response({'error': 'Bill number is required'}, status=400)
         
-        with transaction.atomic():
+        with transaction.atomic(using=current_database()):
             # Get the booking
             booking = ParkingBooking.objects.get(bill_number=bill_number)
             
@@ -415,17 +388,23 @@ def cancel_booking(request):
             try:
                 slot = ParkingSlot.objects.get(slot_number=booking.parking_slot)
                 
-                # Free the slot
-                slot.is_reserved = False
-                slot.is_occupied = False
-                slot.save()
-                
                 # Update booking status
                 booking.status = 'cancelled'
                 booking.cancelled_at = timezone.now()
                 booking.cancellation_reason = cancellation_reason
                 booking.save()
                 
+                # Free the slot unless another booking still holds it
+                slot.is_reserved = ParkingBooking.objects.filter(
+                    parking_slot=slot.slot_number,
+                    status='reserved'
+                ).exists()
+                slot.is_occupied = False
+                slot.save()
+                
+                record_booking_event('booking.cancelled', booking, cancellation_reason=cancellation_reason)
+                record_slot_event(slot)
+                
                 return Response({
                     'status': 'success',
                     'message': 'Booking cancelled successfully',
@@ -443,6 +422,7 @@ def cancel_booking(request):
         return Response({'error': str(e)}, status=500)
 
 @api_view(['POST'])
+@lot_from_body
 def extend_booking(request):
     """Extend an active booking"""
     try:
@@ -489,12 +469,14 @@ def extend_booking(request):
         
         # Update booking
         booking.booked_until = new_exit_time
-        booking.total_amount += additional_amount
+        booking.total_amount += Decimal(str(additional_amount))
         
         if booking.duration_minutes:
             booking.duration_minutes += int(additional_minutes)
         
-        booking.save()
+        with transaction.atomic(using=current_database()):
+            booking.save()
+            record_booking_event('booking.extended', booking, additional_amount=additional_amount)
         
         return Response({
             'status': 'success',
@@ -511,6 +493,7 @@ def extend_booking(request):
         return Response({'error': str(e)}, status=500)
 
 @api_view(['POST'])
+@lot_from_body
 def confirm_payment(request):
     """Confirm payment for a booking"""
     try:
@@ -519,7 +502,9 @@ def confirm_payment(request):
         if not bill_number:
             return Response({'error': 'Bill number is required'}, status=400)
         
-        booking = ParkingBooking.objects.get(bill_number=bill_number)
+        booking = find_booking(bill_number)
+        if isinstance(booking, ArchivedBooking):
+            return Response({'error': 'Archived bookings cannot be changed'}, status=400)
         
         # Update booking payment status
         booking.is_paid = True
@@ -531,7 +516,9 @@ def confirm_payment(request):
             # Mark as paid but keep the current status
             pass
         
-        booking.save()
+        with transaction.atomic(using=booking._state.db):
+            booking.save()
+            record_booking_event('booking.paid', booking)
         
         return Response({
             'status': 'success',
@@ -545,4 +532,194 @@ def confirm_payment(request):
     except ParkingBooking.DoesNotExist:
         return Response({'error': 'Booking not found'}, status=404)
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
\ No newline at end of file
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['POST'])
+def gate_entry(request):
+    """Open the entry barrier for a plate with a booking that is due"""
+    plate = request.data.get('vehicle_number')
+    if not plate:
+        return Response({'error': 'Vehicle number is required'}, status=400)
+    
+    try:
+        now = timezone.now()
+        early = timedelta(minutes=getattr(settings, 'GATE_EARLY_ENTRY_MINUTES', 15))
+        bookings = plate_index_for().lookup(plate)
+        
+        # A repeated read of a car already inside just opens the barrier again
+        booking = next((b for b in bookings if b.status == 'active'), None) \
+            or next((b for b in bookings if b.status == 'reserved'
+                     and b.booked_from - early <= now <= b.booked_until), None)
+        
+        if booking is not None and booking.status == 'reserved':
+            with transaction.atomic(using=current_database()):
+                booking = ParkingBooking.objects.select_for_update().get(pk=booking.pk)
+                # The bay sensor or another gate read may have started it meanwhile
+                if booking.status == 'reserved':
+                    booking.status = 'active'
+                    booking.actual_entry_time = now
+                    booking.save()
+                    record_booking_event('booking.started', booking)
+        
+        if booking is None or booking.status != 'active':
+            return Response({
+                'error': 'No booking due for this vehicle',
+                'vehicle_number': plate,
+                'open_barrier': False
+            }, status=404)
+        
+        return Response({
+            'status': 'success',
+            'open_barrier': True,
+            'bill_number': booking.bill_number,
+            'vehicle_number': booking.vehicle_number,
+            'parking_slot': booking.parking_slot,
+            'floor_number': booking.floor_number,
+            'booked_until': booking.booked_until.isoformat(),
+            'entry_time': booking.actual_entry_time.isoformat()
+        })
+        
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['POST'])
+def gate_exit(request):
+    """Close the stay of a plate, price it and return the payment QR"""
+    plate = request.data.get('vehicle_number')
+    if not plate:
+        return Response({'error': 'Vehicle number is required'}, status=400)
+    
+    try:
+        bookings = plate_index_for().lookup(plate)
+        # The bay sensor may already have completed the booking
+        booking = next((b for b in bookings if b.status == 'active'), None) \
+            or next((b for b in bookings if b.status == 'completed'), None)
+        
+        if booking is not None and booking.status == 'active':
+            with transaction.atomic(using=current_database()):
+                # Slot first, then booking: the same lock order as the bay sensor
+                slot = ParkingSlot.objects.select_for_update().get(slot_number=booking.parking_slot)
+                booking = ParkingBooking.objects.select_for_update().get(pk=booking.pk)
+                # The sensor may have completed it while we waited for the lock
+                if booking.status == 'active':
+                    complete_booking(booking, slot)
+        
+        if booking is None or booking.status not in ('completed', 'paid'):
+            return Response({
+                'error': 'No open booking for this vehicle',
+                'vehicle_number': plate,
+                'open_barrier': False
+            }, status=404)
+        
+        qr_data = cached_bundle('qr-code', booking.bill_number, booking.version,
+                                lambda: generate_qr_data(booking))
+        
+        return Response({
+            'status': 'success',
+            'open_barrier': booking.is_paid,
+            'bill_number': booking.bill_number,
+            'vehicle_number': booking.vehicle_number,
+            'parking_slot': booking.parking_slot,
+            'entry_time': (booking.actual_entry_time or booking.booked_from).isoformat(),
+            'exit_time': booking.actual_exit_time.isoformat(),
+            'duration_minutes': booking.duration_minutes,
+            'total_amount': booking.total_amount,
+            'is_paid': booking.is_paid,
+            'qr_code': qr_data['qr_code_base64'],
+            'upi_url': qr_data['upi_url']
+        })
+        
+    except ParkingSlot.DoesNotExist:
+        return Response({'error': 'Parking slot not found'}, status=404)
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['GET'])
+def demand_forecast(request):
+    """Predicted hourly occupancy per floor based on booking history"""
+    from .forecasting import forecast_occupancy
+
+    try:
+        days = int(request.query_params.get('days', 7))
+        history_days = int(request.query_params.get('history_days', 365))
+    except ValueError:
+        return Response({'error': 'days and history_days must be integers'}, status=400)
+
+    if not 1 <= days <= 31 or not 7 <= history_days <= 3650:
+        return Response({'error': 'days must be 1-31 and history_days 7-3650'}, status=400)
+
+    try:
+        return Response(forecast_occupancy(days=days, history_days=history_days))
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['GET'])
+def sensor_health(request):
+    """List sensors that have stopped reporting, with the slots they watch"""
+    try:
+        stale_after = request.query_params.get('stale_after')
+        return Response(unhealthy_sensors(int(stale_after) if stale_after else None))
+    except ValueError:
+        return Response({'error': 'stale_after must be an integer number of seconds'}, status=400)
+
+@api_view(['GET'])
+def lot_overview(request):
+    """Slot availability across all parking lots"""
+    try:
+        return Response(cross_lot_availability())
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['GET'])
+def lot_summary_report(request):
+    """Booking counts and revenue per parking lot, with totals"""
+    from .group_booking import parse_iso_datetime
+
+    try:
+        date_from = request.query_params.get('date_from')
+        date_to = request.query_params.get('date_to')
+        return Response(cross_lot_report(
+            parse_iso_datetime(date_from) if date_from else None,
+            parse_iso_datetime(date_to) if date_to else None
+        ))
+    except ValueError as e:
+        return Response({'error': f'Invalid datetime format: {str(e)}'}, status=400)
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['GET'])
+def change_feed(request):
+    """Booking and slot change events after a cursor, oldest first"""
+    try:
+        after = int(request.query_params.get('after', 0))
+        limit = int(request.query_params.get('limit', DEFAULT_FEED_LIMIT))
+    except ValueError:
+        return Response({'error': 'after and limit must be integers'}, status=400)
+    
+    types = [t for t in request.query_params.get('types', '').split(',') if t]
+    try:
+        return Response(read_change_feed(after=after, limit=limit, types=types))
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['GET'])
+def summary_report(request):
+    """Revenue and utilization from the materialized daily summaries"""
+    from .summaries import daily_report, parse_day
+
+    params = request.query_params
+    try:
+        floor_number = params.get('floor')
+        report = daily_report(
+            date_from=parse_day(params.get('date_from')),
+            date_to=parse_day(params.get('date_to')),
+            group_by=[g for g in params.get('group_by', 'day').split(',') if g],
+            floor_number=int(floor_number) if floor_number else None,
+            payment_method=params.get('payment_method'),
+            status=params.get('status'),
+        )
+        return Response(report)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
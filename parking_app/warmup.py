@@ -0,0 +1,100 @@
+"""Worker warmup.
+
+A fresh worker otherwise pays for the plate index load, URL resolution,
+the dashboard template and the static manifest on its first requests. warm_up() does that work up front:
+wsgi.py/asgi.py call it once the application is built, and ready() hooks
+it to the first request for servers that load neither (e.g. runserver).
+It runs once per process, so a worker forked from a preloaded master
+warms again in its own process.
+Set PARKING_WARMUP = False to skip it.
+
+Database connections used while warming are closed afterwards: under a
+preloading server (gunicorn --preload) the forked workers would otherwise
+share them, and Django connections only serve the thread that opened them.
+
+Heavy, rarely used libraries (qrcode/PIL, numpy, brotli) are imported
+where they are used and are deliberately not warmed.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.urls import get_resolver
+
+from .lots import fan_out
+from .plates import plate_index_for
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_TEMPLATE = 'index.html'
+
+_warmed_pid = None
+_lock = threading.Lock()
+
+
+def _warm_plate_indexes():
+    fan_out(lambda lot: plate_index_for(lot).warm())
+
+
+def _populate_urls():
+    get_resolver().reverse_dict
+
+
+def _load_templates():
+    from django.template.loader import get_template
+
+    get_template(DASHBOARD_TEMPLATE)
+
+
+def _load_static_manifest():
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    # Manifest storages read manifest.json when first used; others have none
+    getattr(staticfiles_storage, 'hashed_files', None)
+
+
+STEPS = [
+    ('plate_indexes', _warm_plate_indexes),
+    ('urls', _populate_urls),
+    ('templates', _load_templates),
+    ('static_manifest', _load_static_manifest),
+]
+
+
+def warm_up(force=False):
+    """Run every warmup step once per process; returns {step: seconds}"""
+    global _warmed_pid
+    if not force and not getattr(settings, 'PARKING_WARMUP', True):
+        return {}
+    with _lock:
+        if _warmed_pid == os.getpid() and not force:
+            return {}
+        _warmed_pid = os.getpid()
+
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            # A cold cache is slower, not broken; the request path loads it lazily
+            logger.exception('Warmup step %s failed', name)
+        timings[name] = time.perf_counter() - started
+    _close_connections()
+    return timings
+
+
+def _close_connections():
+    # Not those inside a transaction, e.g. when warming on a test request
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def warm_on_first_request(sender, **kwargs):
+    request_started.disconnect(warm_on_first_request)
+    warm_up()
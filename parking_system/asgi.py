@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'parking_system.settings')
 
 application = get_asgi_application()
+
+# Load caches before the first request arrives
+from parking_app.warmup import warm_up  # noqa: E402
+warm_up()
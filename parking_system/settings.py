@@ -4,6 +4,7 @@ Django settings for parking_system project.
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -32,12 +33,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'parking_app.middleware.StaticDeliveryMiddleware',
+    'parking_app.middleware.AdmissionControlMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'parking_app.middleware.LotMiddleware',
 ]
 
 ROOT_URLCONF = 'parking_system.urls'
@@ -67,6 +72,24 @@ DATABASES = {
     }
 }
 
+# Parking lots. Each lot keeps its slots, bookings and bill sequences in its
+# own database, selected per request from the /api/lots/<lot>/ prefix; plain
+# /api/ URLs use DEFAULT_LOT. A lot without a DATABASES entry gets its own
+# SQLite file. After adding a lot, run `python manage.py migrate_lots`.
+PARKING_LOTS = {
+    'T1': {'name': 'Terminal 1', 'database': 'default'},
+}
+DEFAULT_LOT = 'T1'
+
+for _code, _lot in PARKING_LOTS.items():
+    _lot.setdefault('database', f'lot_{_code.lower()}')
+    DATABASES.setdefault(_lot['database'], {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR/f'db_{_code.lower()}.sqlite3',
+    })
+
+DATABASE_ROUTERS = ['parking_app.routers.LotRouter']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -93,9 +116,42 @@ USE_TZ = True
 # Static files
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Hashed, pre-compressed (gzip/brotli) static files written by collectstatic
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'parking_app.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Caches. The default cache holds rendered booking bundles keyed by booking
+# version, so an eviction only costs a re-render; it is file-based so every
+# worker process on the host shares it.
+# Admission control and notification rate limits count with add()/incr(),
+# which the file cache cannot do atomically, so they use SQLite files that
+# every worker process on the host shares (see parking_app.cache); point
+# them at Memcached or Redis to share limits across hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'parking-cache'),
+    },
+    'admission': {
+        'BACKEND': 'parking_app.cache.SQLiteCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'parking-admission.sqlite3'),
+    },
+    'notifications': {
+        'BACKEND': 'parking_app.cache.SQLiteCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'parking-notifications.sqlite3'),
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -117,8 +173,106 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
+        'parking_app.parsers.SensorFrameParser',
     ]
 }
 
+# Rate-limit admission control for /api/ (see AdmissionControlMiddleware).
+# rate is requests per second and burst the most allowed in any sliding
+# burst / rate second window; CLASSES are per client.
+ADMISSION_CONTROL = {
+    'ENABLED': True,
+    'CACHE': 'admission',
+    'DEFAULT_CLASS': 'dashboard',
+    'ROUTES': {
+        'sensor_data': 'sensor',
+        'sensor_frame': 'sensor',
+        'create_booking': 'booking',
+        'create_group_booking': 'booking',
+        'cancel_booking': 'booking',
+        'extend_booking': 'booking',
+        'confirm_payment': 'booking',
+        'gate_entry': 'gate',
+        'gate_exit': 'gate',
+        'lot_overview': 'dashboard',
+        'lot_summary_report': 'dashboard',
+        'change_feed': 'dashboard',
+        'summary_report': 'dashboard',
+    },
+    'CLASSES': {
+        'sensor': {'rate': 20, 'burst': 60},
+        'gate': {'rate': 10, 'burst': 30},
+        'booking': {'rate': 2, 'burst': 10},
+        'dashboard': {'rate': 5, 'burst': 20},
+    },
+    'GLOBAL': {'rate': 300, 'burst': 600},
+    # Share of the global limit kept free for sensor and gate traffic
+    'RESERVE': {
+        'dashboard': 0.4,
+        'booking': 0.2,
+    },
+}
+
+# Sensor gateways posting binary frames to /api/sensor-frame/.
+# Record sensor_index N maps to sensors[N]; the secret keys the body HMAC.
+# A gateway whose secret is unset is rejected rather than given a default.
+SENSOR_GATEWAYS = {
+    'GW-001': {
+        'lot': 'T1',
+        'secret': os.environ.get('GATEWAY_GW_001_SECRET'),
+        'sensors': ['SENSOR_001', 'SENSOR_002', 'SENSOR_003', 'SENSOR_004'],
+    },
+}
+# Signed frames older or newer than this are refused as replays
+SENSOR_FRAME_MAX_SKEW_SECONDS = 300
+
+# Sensors silent for longer than this are reported by /api/sensor-health/.
+# The firmware heartbeats every 30 seconds, so this allows three missed cycles.
+SENSOR_STALE_AFTER_SECONDS = 90
+# Each worker writes last-seen times from a background thread this often
+SENSOR_HEARTBEAT_FLUSH_SECONDS = 15
 
+# Bill numbers are BILL-<yymmdd>-<lot>-<sequence>; each worker reserves
+# BILL_NUMBER_BLOCK_SIZE sequence numbers per database round trip
+BILL_NUMBER_BLOCK_SIZE = 100
 
+# Closed bookings older than this are moved to the archive table by `archive_bookings`
+BOOKING_ARCHIVE_AFTER_DAYS = 90
+
+# Outbox events drained by every consumer are pruned after this many days.
+# With concurrent database writers, delay the feed by a few settle seconds
+# so readers never skip an event whose transaction commits late.
+OUTBOX_RETENTION_DAYS = 7
+OUTBOX_SETTLE_SECONDS = 0
+
+# Gate barriers admit a reserved plate this many minutes before booked_from
+GATE_EARLY_ENTRY_MINUTES = 15
+
+# Workers load the plate indexes, URL resolver, templates and static
+# manifest as they start, before serving; see parking_app.warmup
+PARKING_WARMUP = True
+
+# Booking reminders, queued and sent by `manage.py send_notifications --follow`
+# (see parking_app.notifications). Providers are NotificationProvider
+# subclasses; RATE_LIMIT (sends per second, burst) is counted in CACHE,
+# which must increment atomically across workers (see parking_app.ratelimit);
+# a cache that cannot is refused.
+NOTIFICATIONS = {
+    'PROVIDER': 'console',
+    'PROVIDERS': {
+        'console': {
+            'BACKEND': 'parking_app.notifications.ConsoleProvider',
+            'RATE_LIMIT': {'rate': 5, 'burst': 20},
+        },
+        'file': {
+            'BACKEND': 'parking_app.notifications.FileProvider',
+            'PATH': BASE_DIR / 'notifications.jsonl',
+        },
+    },
+    'CACHE': 'notifications',
+    'ENDING_LEAD_MINUTES': 15,
+    'NO_SHOW_LEAD_MINUTES': 15,
+    'BATCH_SIZE': 200,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_SECONDS': 60,
+}
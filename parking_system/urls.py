@@ -2,14 +2,44 @@
 from django.urls import path, include
 from django.views.generic import TemplateView
 from django.http import HttpResponse
+from django.conf import settings
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from parking_app import views as parking_views
+import hashlib
+import os
 
 # Simple health check view
 def health_check(request):
     return HttpResponse('OK')
 
+def dashboard_etag(request):
+    """Version the dashboard shell by its template and the collected static manifest"""
+    parts = [str(settings.DEBUG)]
+    candidates = [
+        settings.BASE_DIR / 'templates' / 'index.html',
+        settings.STATIC_ROOT / 'staticfiles.json',
+    ]
+    for path in candidates:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+# The shell is revalidated on every load but answered with 304 when unchanged
+dashboard = cache_control(no_cache=True, public=True)(
+    condition(etag_func=dashboard_etag)(TemplateView.as_view(template_name='index.html'))
+)
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Cross-lot views, then the same API scoped to one lot
+    path('api/lots/', parking_views.lot_overview, name='lot_overview'),
+    path('api/lots/report/', parking_views.lot_summary_report, name='lot_summary_report'),
+    path('api/lots/<str:lot>/', include('parking_app.urls')),
     path('api/', include('parking_app.urls')),
     path('health/', health_check, name='health_check'),
-    path('', TemplateView.as_view(template_name='index.html'), name='home'),
+    path('', dashboard, name='home'),
 ]
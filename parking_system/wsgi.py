@@ -7,25 +7,22 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
-#import os
-
-#from django.core.wsgi import get_wsgi_application
-
-#os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'parking_system.settings')
-
-#application = get_wsgi_application()
-
-
-
-
 import os
 import sys
+from pathlib import Path
 
-path = '/home/codewithraviraj/your_project_name'
+# Hosts that load this file by path (e.g. PythonAnywhere) need the project
+# directory importable
+path = str(Path(__file__).resolve().parent.parent)
 if path not in sys.path:
     sys.path.append(path)
 
-os.environ['DJANGO_SETTINGS_MODULE'] = 'your_project_name.settings'
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'parking_system.settings')
 
-from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+# Load caches before the first request arrives
+from parking_app.warmup import warm_up  # noqa: E402
+warm_up()
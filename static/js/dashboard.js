@@ -0,0 +1,1641 @@
+// Configuration
+const API_BASE = 'http://127.0.0.1:8000/api';
+const UPDATE_INTERVAL = 1000; // 1 second updates
+const RATE_PER_HOUR = 10.00;
+const UPI_ID = ""; // Replace with your actual UPI ID
+
+// Global variables
+let currentBillNumber = '';
+let systemOnline = false;
+let updateInterval;
+let lastUpdateTime = Date.now();
+let slotsData = [];
+let selectedSlot = '';
+let activeBookingsData = [];
+let currentQRCodeData = null;
+let currentBillAmount = 0;
+
+// Initialize
+document.addEventListener('DOMContentLoaded', () => {
+    console.log('🚀 Initializing Smart Parking System...');
+    
+    // Set default times
+    setDefaultTimes();
+    
+    // Add event listeners
+    setupEventListeners();
+    
+    // Test backend connection
+    testBackendConnection();
+    
+    // Start real-time updates
+    startRealTimeUpdates();
+    
+    // Update time display
+    updateLastUpdated();
+    setInterval(updateLastUpdated, 1000);
+});
+
+function setDefaultTimes() {
+    const entryInput = document.getElementById('entry-time');
+    const exitInput = document.getElementById('exit-time');
+    
+    const now = new Date();
+    const nowString = now.toISOString().slice(0, 16);
+    
+    entryInput.min = nowString;
+    exitInput.min = nowString;
+    
+    entryInput.value = '';
+    exitInput.value = '';
+    
+    entryInput.classList.add('placeholder');
+    exitInput.classList.add('placeholder');
+    
+    [entryInput, exitInput].forEach(input => {
+        input.addEventListener('focus', function() {
+            this.classList.remove('placeholder');
+            if (!this.value) {
+                const currentTime = new Date().toISOString().slice(0, 16);
+                this.value = currentTime;
+            }
+        });
+        
+        input.addEventListener('blur', function() {
+            if (!this.value) {
+                this.classList.add('placeholder');
+            }
+        });
+        
+        input.addEventListener('change', function() {
+            if (this.value) {
+                this.classList.remove('placeholder');
+            } else {
+                this.classList.add('placeholder');
+            }
+        });
+    });
+}
+
+function setupEventListeners() {
+    const inputs = ['entry-time', 'exit-time', 'vehicle-number', 'owner-name', 'phone-number', 'slot-select'];
+    
+    inputs.forEach(id => {
+        const element = document.getElementById(id);
+        if (element) {
+            if (id === 'entry-time' || id === 'exit-time') {
+                element.addEventListener('change', function() {
+                    validateDateTime(this);
+                    updateBillPreview();
+                });
+                element.addEventListener('input', function() {
+                    validateDateTime(this);
+                    updateBillPreview();
+                });
+            } else {
+                element.addEventListener('change', updateBillPreview);
+                element.addEventListener('input', updateBillPreview);
+            }
+        }
+    });
+    
+    document.getElementById('phone-number').addEventListener('input', validatePhoneNumber);
+    
+    const slotSelect = document.getElementById('slot-select');
+    if (slotSelect) {
+        slotSelect.addEventListener('change', function() {
+            selectedSlot = this.value;
+            console.log('Selected slot:', selectedSlot);
+        });
+    }
+}
+
+function validateDateTime(inputElement) {
+    const inputId = inputElement.id;
+    const value = inputElement.value;
+    const now = new Date();
+    
+    inputElement.classList.remove('invalid');
+    
+    const validationElement = document.getElementById(`${inputId}-validation`);
+    if (validationElement) {
+        validationElement.classList.remove('show');
+        validationElement.textContent = '';
+    }
+    
+    if (!value) {
+        inputElement.classList.add('invalid');
+        if (validationElement) {
+            validationElement.textContent = `${inputId === 'entry-time' ? 'Entry' : 'Exit'} time is required`;
+            validationElement.classList.add('show');
+        }
+        return false;
+    }
+    
+    const selectedDate = new Date(value);
+    const isEntryTime = inputId === 'entry-time';
+    const isExitTime = inputId === 'exit-time';
+    
+    if (selectedDate < now) {
+        inputElement.classList.add('invalid');
+        if (validationElement) {
+            validationElement.textContent = `${isEntryTime ? 'Entry' : 'Exit'} time cannot be in the past`;
+            validationElement.classList.add('show');
+        }
+        return false;
+    }
+    
+    if (isEntryTime) {
+        const maxFutureDate = new Date();
+        maxFutureDate.setDate(maxFutureDate.getDate() + 30);
+        if (selectedDate > maxFutureDate) {
+            inputElement.classList.add('invalid');
+            if (validationElement) {
+                validationElement.textContent = 'Entry time cannot be more than 30 days in the future';
+                validationElement.classList.add('show');
+            }
+            return false;
+        }
+    }
+    
+    if (isExitTime) {
+        const entryTimeInput = document.getElementById('entry-time');
+        const entryTimeValue = entryTimeInput.value;
+        
+        if (entryTimeValue) {
+            const entryDate = new Date(entryTimeValue);
+            
+            if (selectedDate <= entryDate) {
+                inputElement.classList.add('invalid');
+                if (validationElement) {
+                    validationElement.textContent = 'Exit time must be after entry time';
+                    validationElement.classList.add('show');
+                }
+                return false;
+            }
+            
+            const durationMinutes = (selectedDate - entryDate) / (1000 * 60);
+            if (durationMinutes < 60) {
+                inputElement.classList.add('invalid');
+                if (validationElement) {
+                    validationElement.textContent = 'Minimum booking duration is 1 hour';
+                    validationElement.classList.add('show');
+                }
+                return false;
+            }
+        }
+    }
+    
+    return true;
+}
+
+function validatePhoneNumber() {
+    const phoneInput = document.getElementById('phone-number');
+    const phoneValue = phoneInput.value.trim();
+    const validationElement = document.getElementById('phone-validation');
+    
+    phoneInput.classList.remove('invalid');
+    validationElement.classList.remove('show');
+    validationElement.textContent = '';
+    
+    if (!phoneValue) {
+        return true;
+    }
+    
+    if (!/^\d+$/.test(phoneValue)) {
+        phoneInput.classList.add('invalid');
+        validationElement.textContent = 'Phone number should contain only digits';
+        validationElement.classList.add('show');
+        return false;
+    }
+    
+    if (phoneValue.length !== 10) {
+        phoneInput.classList.add('invalid');
+        validationElement.textContent = 'Phone number must be exactly 10 digits';
+        validationElement.classList.add('show');
+        return false;
+    }
+    
+    return true;
+}
+
+function validateAllFormFields() {
+    let isValid = true;
+    
+    if (!validatePhoneNumber()) {
+        isValid = false;
+    }
+    
+    const entryTimeInput = document.getElementById('entry-time');
+    if (!validateDateTime(entryTimeInput)) {
+        isValid = false;
+    }
+    
+    const exitTimeInput = document.getElementById('exit-time');
+    if (!validateDateTime(exitTimeInput)) {
+        isValid = false;
+    }
+    
+    const requiredFields = ['vehicle-number', 'owner-name', 'phone-number', 'slot-select', 'entry-time', 'exit-time'];
+    requiredFields.forEach(fieldId => {
+        const field = document.getElementById(fieldId);
+        if (!field.value.trim()) {
+            field.classList.add('invalid');
+            isValid = false;
+        }
+    });
+    
+    return isValid;
+}
+
+function startRealTimeUpdates() {
+    if (updateInterval) clearInterval(updateInterval);
+    
+    updateInterval = setInterval(() => {
+        if (systemOnline) {
+            loadSlots();
+            if (Date.now() - lastUpdateTime > 2000) {
+                loadActiveBookings();
+                lastUpdateTime = Date.now();
+            }
+        }
+    }, UPDATE_INTERVAL);
+    
+    console.log('⚡ Started real-time updates (1 second interval)');
+}
+
+function updateSystemStatus(status) {
+    const indicator = document.getElementById('status-indicator');
+    const statusText = document.getElementById('system-status-text');
+    
+    switch(status) {
+        case 'online':
+            indicator.className = 'status-indicator status-online';
+            statusText.textContent = 'Online';
+            statusText.style.color = 'var(--available-color)';
+            systemOnline = true;
+            break;
+        case 'offline':
+            indicator.className = 'status-indicator status-offline';
+            statusText.textContent = 'Offline';
+            statusText.style.color = 'var(--occupied-color)';
+            systemOnline = false;
+            break;
+        case 'testing':
+            indicator.className = 'status-indicator';
+            statusText.textContent = 'Testing...';
+            statusText.style.color = 'var(--reserved-color)';
+            systemOnline = false;
+            break;
+    }
+}
+
+function updateLastUpdated() {
+    const now = new Date();
+    const timeString = now.toLocaleTimeString([], {hour: '2-digit', minute:'2-digit', second:'2-digit'});
+    document.getElementById('last-updated').textContent = timeString;
+}
+
+async function testBackendConnection() {
+    try {
+        updateSystemStatus('testing');
+        
+        const response = await fetch(`${API_BASE}/test/`, {
+            method: 'GET',
+            headers: {
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            }
+        });
+        
+        if (response.ok) {
+            const data = await response.json();
+            console.log('✅ Backend connected:', data);
+            updateSystemStatus('online');
+            showNotification('✅ Connected to server!', 'success');
+            
+            loadSlots();
+            loadActiveBookings();
+            loadBookingHistory();
+            
+            return true;
+        } else {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+    } catch (error) {
+        console.error('❌ Backend connection failed:', error);
+        updateSystemStatus('offline');
+        showNotification(`❌ Connection failed: ${error.message}`, 'error');
+        return false;
+    }
+}
+
+function formatDuration(minutes) {
+    if (!minutes || minutes < 0) return "0 minutes";
+    
+    const hours = Math.floor(minutes / 60);
+    const mins = Math.round(minutes % 60);
+    
+    let parts = [];
+    if (hours > 0) {
+        parts.push(`${hours} hour${hours !== 1 ? 's' : ''}`);
+    }
+    if (mins > 0 || hours === 0) {
+        parts.push(`${mins} minute${mins !== 1 ? 's' : ''}`);
+    }
+    return parts.join(' ');
+}
+
+async function loadSlots() {
+    if (!systemOnline) return;
+    
+    try {
+        const response = await fetch(`${API_BASE}/get-slots/?t=${Date.now()}`, {
+            cache: 'no-cache'
+        });
+        
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        
+        slotsData = await response.json();
+        console.log('📊 Slots data loaded:', slotsData.length, 'slots');
+        
+        updateParkingGrid(slotsData);
+        updateSlotSelect(slotsData);
+        updateStats(slotsData);
+        
+    } catch (error) {
+        console.error('Error loading slots:', error);
+        if (systemOnline) {
+            showNotification('Failed to load parking slots', 'warning');
+        }
+    }
+}
+
+function updateParkingGrid(slots) {
+    const grid = document.getElementById('parking-grid');
+    
+    if (!slots || slots.length === 0) {
+        grid.innerHTML = `
+            <div class="empty-state">
+                <i class="fas fa-parking"></i>
+                <p>No parking slots found</p>
+                <button onclick="initializeDemoSlots()" style="margin-top: 15px; padding: 10px 15px; background: var(--primary-color); color: white; border: none; border-radius: 5px; cursor: pointer;">
+                    <i class="fas fa-plus"></i> Create Demo Slots
+                </button>
+            </div>
+        `;
+        return;
+    }
+    
+    const loadingEl = document.getElementById('slots-loading');
+    if (loadingEl) loadingEl.style.display = 'none';
+    
+    grid.innerHTML = '';
+    
+    slots.forEach(slot => {
+        let statusClass = 'available';
+        let statusText = 'AVAILABLE';
+        let statusIcon = '🟢';
+        let slotTitle = 'Ready for Parking';
+        
+        if (slot.is_occupied === true) {
+            statusClass = 'occupied';
+            statusText = 'OCCUPIED';
+            statusIcon = '🚗';
+            slotTitle = 'Car Present';
+        }
+        else if (slot.is_reserved === true && slot.is_occupied === false) {
+            statusClass = 'reserved';
+            statusText = 'RESERVED';
+            statusIcon = '🟠';
+            slotTitle = 'Booked/Reserved';
+        }
+        else {
+            statusClass = 'available';
+            statusText = 'AVAILABLE';
+            statusIcon = '🟢';
+            slotTitle = 'Ready for Parking';
+        }
+        
+        const slotElement = document.createElement('div');
+        slotElement.className = `parking-slot ${statusClass}`;
+        slotElement.innerHTML = `
+            <div class="real-time-indicator"></div>
+            <h3>${slot.slot_number}</h3>
+            <p class="slot-status">${statusIcon} ${statusText}</p>
+            <p>Floor ${slot.floor_number}</p>
+            <p class="sensor-id">${slot.sensor_id || 'No Sensor'}</p>
+            <p style="font-size: 0.8rem; margin-top: 5px; opacity: 0.9;">
+                ${slotTitle}
+            </p>
+        `;
+        
+        if (statusClass === 'available') {
+            slotElement.style.cursor = 'pointer';
+            slotElement.title = `Click to select slot ${slot.slot_number}`;
+            slotElement.addEventListener('click', () => {
+                selectedSlot = slot.slot_number;
+                document.getElementById('slot-select').value = selectedSlot;
+                updateBillPreview();
+                showNotification(`Selected slot ${slot.slot_number}`, 'info');
+            });
+        } else {
+            slotElement.style.cursor = 'default';
+            slotElement.title = `${statusText} - ${slotTitle}`;
+            slotElement.addEventListener('click', () => {
+                showNotification(`Slot ${slot.slot_number} is ${statusText.toLowerCase()}`, 'info');
+            });
+        }
+        
+        grid.appendChild(slotElement);
+    });
+}
+
+function updateSlotSelect(slots) {
+    const select = document.getElementById('slot-select');
+    
+    const currentSelectedValue = selectedSlot || select.value;
+    
+    while (select.options.length > 1) {
+        select.remove(1);
+    }
+    
+    if (slots && slots.length > 0) {
+        let hasAvailable = false;
+        slots.forEach(slot => {
+            if (!slot.is_occupied && !slot.is_reserved) {
+                const option = document.createElement('option');
+                option.value = slot.slot_number;
+                option.textContent = `${slot.slot_number} - Available (Floor ${slot.floor_number})`;
+                select.appendChild(option);
+                hasAvailable = true;
+            }
+        });
+        
+        if (!hasAvailable) {
+            const option = document.createElement('option');
+            option.value = '';
+            option.textContent = 'No slots available - Please check back later';
+            option.disabled = true;
+            select.appendChild(option);
+        }
+    }
+    
+    if (currentSelectedValue) {
+        const slotStillAvailable = slots && slots.some(slot => 
+            slot.slot_number === currentSelectedValue && 
+            !slot.is_occupied && 
+            !slot.is_reserved
+        );
+        
+        if (slotStillAvailable) {
+            select.value = currentSelectedValue;
+            selectedSlot = currentSelectedValue;
+        } else {
+            select.value = '';
+            selectedSlot = '';
+        }
+    }
+}
+
+function updateStats(slots) {
+    if (!slots || slots.length === 0) {
+        ['total-slots', 'available-slots', 'occupied-slots', 'reserved-slots'].forEach(id => {
+            document.getElementById(id).textContent = '0';
+        });
+        return;
+    }
+    
+    const total = slots.length;
+    const available = slots.filter(s => !s.is_occupied && !s.is_reserved).length;
+    const occupied = slots.filter(s => s.is_occupied).length;
+    const reserved = slots.filter(s => s.is_reserved && !s.is_occupied).length;
+    
+    document.getElementById('total-slots').textContent = total;
+    document.getElementById('available-slots').textContent = available;
+    document.getElementById('occupied-slots').textContent = occupied;
+    document.getElementById('reserved-slots').textContent = reserved;
+}
+
+function updateBillPreview() {
+    const vehicleNumber = document.getElementById('vehicle-number').value.trim();
+    const ownerName = document.getElementById('owner-name').value.trim();
+    const phoneNumber = document.getElementById('phone-number').value.trim();
+    const slot = document.getElementById('slot-select').value;
+    const entryTime = document.getElementById('entry-time').value;
+    const exitTime = document.getElementById('exit-time').value;
+    
+    const preview = document.getElementById('bill-preview');
+    
+    const entryValid = validateDateTime(document.getElementById('entry-time'));
+    const exitValid = validateDateTime(document.getElementById('exit-time'));
+    const phoneValid = validatePhoneNumber();
+    
+    if (!entryValid || !exitValid || !phoneValid) {
+        preview.classList.remove('show');
+        return;
+    }
+    
+    if (vehicleNumber && ownerName && phoneNumber && slot && entryTime && exitTime) {
+        const from = new Date(entryTime);
+        const until = new Date(exitTime);
+        const now = new Date();
+        
+        if (from < now) {
+            preview.classList.remove('show');
+            showNotification('Entry time cannot be in the past', 'warning');
+            return;
+        }
+        
+        if (until <= from) {
+            preview.classList.remove('show');
+            showNotification('Exit time must be after entry time', 'warning');
+            return;
+        }
+        
+        const durationMinutes = (until - from) / (1000 * 60);
+        
+        if (durationMinutes < 60) {
+            preview.classList.remove('show');
+            showNotification('Minimum booking duration is 1 hour', 'warning');
+            return;
+        }
+        
+        const hours = Math.ceil(durationMinutes / 60);
+        const amount = hours * RATE_PER_HOUR;
+        
+        const formatTime = (date) => {
+            return date.toLocaleDateString() + ' ' + date.toLocaleTimeString([], {hour: '2-digit', minute:'2-digit'});
+        };
+        
+        document.getElementById('bill-vehicle').textContent = vehicleNumber;
+        document.getElementById('bill-owner').textContent = ownerName;
+        document.getElementById('bill-phone').textContent = phoneNumber;
+        document.getElementById('bill-slot').textContent = slot;
+        document.getElementById('bill-entry').textContent = formatTime(from);
+        document.getElementById('bill-exit').textContent = formatTime(until);
+        document.getElementById('bill-duration').textContent = formatDuration(durationMinutes);
+        document.getElementById('bill-total').textContent = `₹${amount.toFixed(2)}`;
+        
+        preview.classList.add('show');
+    } else {
+        preview.classList.remove('show');
+    }
+}
+
+async function createBooking() {
+    if (!systemOnline) {
+        showNotification('System is offline', 'error');
+        return;
+    }
+    
+    if (!validateAllFormFields()) {
+        showNotification('Please correct the validation errors before submitting', 'error');
+        return;
+    }
+    
+    const vehicleNumber = document.getElementById('vehicle-number').value.trim();
+    const ownerName = document.getElementById('owner-name').value.trim();
+    const phoneNumber = document.getElementById('phone-number').value.trim();
+    const parkingSlot = document.getElementById('slot-select').value;
+    const entryTime = document.getElementById('entry-time').value;
+    const exitTime = document.getElementById('exit-time').value;
+
+    if (!vehicleNumber || !ownerName || !phoneNumber || !parkingSlot || !entryTime || !exitTime) {
+        showNotification('Please fill all required fields', 'error');
+        return;
+    }
+
+    const from = new Date(entryTime);
+    const until = new Date(exitTime);
+    const now = new Date();
+    
+    if (from < now) {
+        showNotification('Entry time cannot be in the past', 'error');
+        return;
+    }
+    
+    if (until <= from) {
+        showNotification('Exit time must be after entry time', 'error');
+        return;
+    }
+
+    const durationMinutes = (until - from) / (1000 * 60);
+    if (durationMinutes < 60) {
+        showNotification('Minimum booking duration is 1 hour', 'error');
+        return;
+    }
+    
+    if (!/^\d{10}$/.test(phoneNumber)) {
+        showNotification('Phone number must be exactly 10 digits', 'error');
+        return;
+    }
+
+    const submitBtn = document.getElementById('submit-btn');
+    submitBtn.disabled = true;
+    submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
+
+    try {
+        const response = await fetch(`${API_BASE}/create-booking/`, {
+            method: 'POST',
+            headers: { 
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+            body: JSON.stringify({
+                vehicle_number: vehicleNumber,
+                owner_name: ownerName,
+                phone_number: phoneNumber,
+                parking_slot: parkingSlot,
+                booked_from: entryTime,
+                booked_until: exitTime
+            })
+        });
+
+        const data = await response.json();
+        
+        if (response.ok) {
+            document.getElementById('vehicle-number').value = '';
+            document.getElementById('owner-name').value = '';
+            document.getElementById('phone-number').value = '';
+            
+            document.getElementById('entry-time').value = '';
+            document.getElementById('exit-time').value = '';
+            document.getElementById('entry-time').classList.add('placeholder');
+            document.getElementById('exit-time').classList.add('placeholder');
+            
+            document.getElementById('bill-preview').classList.remove('show');
+            
+            document.querySelectorAll('.validation-message').forEach(el => {
+                el.classList.remove('show');
+                el.textContent = '';
+            });
+            
+            document.querySelectorAll('input.invalid').forEach(el => {
+                el.classList.remove('invalid');
+            });
+            
+            selectedSlot = '';
+            
+            showNotification(`✅ Bill created! Number: ${data.bill_number}`, 'success');
+            
+            await Promise.all([
+                loadSlots(),
+                loadActiveBookings(),
+                loadBookingHistory()
+            ]);
+            
+            setTimeout(() => {
+                showBillDetails(data.bill_number);
+            }, 500);
+        } else {
+            throw new Error(data.error || 'Booking failed');
+        }
+    } catch (error) {
+        console.error('Error creating booking:', error);
+        showNotification(`❌ ${error.message}`, 'error');
+    } finally {
+        submitBtn.disabled = false;
+        submitBtn.innerHTML = '<i class="fas fa-file-invoice-dollar"></i> <b>Submit Booking</b>';
+    }
+}
+
+async function loadActiveBookings() {
+    if (!systemOnline) {
+        console.log('System offline, skipping active bookings load');
+        return;
+    }
+    
+    try {
+        console.log('🔄 Loading active bookings...');
+        const response = await fetch(`${API_BASE}/active-bookings/?t=${Date.now()}`, {
+            cache: 'no-cache'
+        });
+        
+        if (!response.ok) {
+            console.error(`HTTP Error ${response.status}: ${response.statusText}`);
+            throw new Error(`HTTP ${response.status}`);
+        }
+        
+        const bookings = await response.json();
+        console.log('📋 Active bookings data received:', bookings);
+        
+        activeBookingsData = bookings || [];
+        
+        displayActiveBookings(bookings);
+        
+        return bookings;
+        
+    } catch (error) {
+        console.error('❌ Error loading active bookings:', error);
+        const container = document.getElementById('active-bookings-container');
+        container.innerHTML = `
+            <div class="empty-state">
+                <i class="fas fa-exclamation-triangle"></i>
+                <p>Failed to load active bookings</p>
+                <button onclick="loadActiveBookings()" style="margin-top: 15px; padding: 8px 15px; background: var(--primary-color); color: white; border: none; border-radius: 5px; cursor: pointer;">
+                    <i class="fas fa-redo"></i> Retry
+                </button>
+            </div>
+        `;
+        return [];
+    }
+}
+
+function displayActiveBookings(bookings) {
+    const container = document.getElementById('active-bookings-container');
+    
+    if (!container) {
+        console.error('Active bookings container not found!');
+        return;
+    }
+    
+    const loadingEl = document.getElementById('active-loading');
+    if (loadingEl) loadingEl.style.display = 'none';
+    
+    container.innerHTML = '';
+    
+    if (!bookings || bookings.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <i class="fas fa-clock"></i>
+                <p>No active bookings</p>
+                <p style="font-size: 0.9rem; margin-top: 10px; color: #718096;">
+                    Create a new booking to see it here
+                </p>
+            </div>
+        `;
+        return;
+    }
+    
+    console.log(`📊 Displaying ${bookings.length} active bookings`);
+    
+    bookings.sort((a, b) => new Date(a.booked_until) - new Date(b.booked_until));
+    
+    bookings.forEach((booking, index) => {
+        try {
+            const fromDate = new Date(booking.booked_from);
+            const untilDate = new Date(booking.booked_until);
+            const now = new Date();
+            
+            const timeRemaining = untilDate - now;
+            const totalMinutesRemaining = Math.max(0, Math.floor(timeRemaining / (1000 * 60)));
+            const hoursRemaining = Math.floor(totalMinutesRemaining / 60);
+            const minsRemaining = totalMinutesRemaining % 60;
+            
+            let timeRemainingText = '';
+            let timeRemainingClass = 'info';
+            
+            if (totalMinutesRemaining <= 0) {
+                timeRemainingText = 'EXPIRED';
+                timeRemainingClass = 'error';
+            } else if (hoursRemaining > 0) {
+                timeRemainingText = `${hoursRemaining}h ${minsRemaining}m left`;
+                timeRemainingClass = hoursRemaining < 1 ? 'warning' : 'info';
+            } else {
+                timeRemainingText = `${totalMinutesRemaining}m left`;
+                timeRemainingClass = 'warning';
+            }
+            
+            const totalDuration = (untilDate - fromDate) / (1000 * 60);
+            const durationHours = Math.floor(totalDuration / 60);
+            const durationMinutes = Math.round(totalDuration % 60);
+            let durationText = '';
+            
+            if (durationHours > 0) {
+                durationText = `${durationHours}h ${durationMinutes}m`;
+            } else {
+                durationText = `${durationMinutes}m`;
+            }
+            
+            const formatTime = (date) => {
+                return date.toLocaleDateString() + ' ' + date.toLocaleTimeString([], {hour: '2-digit', minute:'2-digit'});
+            };
+            
+            let statusColor = '#718096';
+            let statusText = booking.status || 'active';
+            
+            if (statusText === 'active') statusColor = 'var(--occupied-color)';
+            else if (statusText === 'reserved') statusColor = 'var(--reserved-color)';
+            else if (statusText === 'completed') statusColor = 'var(--available-color)';
+            else if (statusText === 'cancelled') statusColor = '#718096';
+            
+            let timeBadgeStyle = '';
+            if (timeRemainingClass === 'error') {
+                timeBadgeStyle = 'background: rgba(231, 76, 60, 0.2); color: #e74c3c;';
+            } else if (timeRemainingClass === 'warning') {
+                timeBadgeStyle = 'background: rgba(243, 156, 18, 0.2); color: #f39c12;';
+            } else {
+                timeBadgeStyle = 'background: rgba(52, 152, 219, 0.2); color: #2980b9;';
+            }
+            
+            const bookingItem = document.createElement('div');
+            bookingItem.className = 'booking-item';
+            bookingItem.setAttribute('data-bill-number', booking.bill_number);
+            bookingItem.innerHTML = `
+                <div class="booking-header">
+                    <div>
+                        <strong style="color: var(--dark-color); font-size: 1.1rem;">${booking.bill_number || 'N/A'}</strong>
+                        <span style="margin-left: 10px; ${timeBadgeStyle} padding: 2px 8px; border-radius: 12px; font-size: 0.8rem; font-weight: bold;">
+                            ${timeRemainingText}
+                        </span>
+                    </div>
+                    <span style="font-weight: bold; color: ${statusColor}; font-size: 0.9rem; text-transform: uppercase;">
+                        ${statusText}
+                    </span>
+                </div>
+                <div class="booking-details">
+                    <p><strong>${booking.vehicle_number || 'N/A'}</strong> - ${booking.owner_name || 'N/A'}</p>
+                    <p><i class="fas fa-parking"></i> Slot: ${booking.parking_slot || 'N/A'}</p>
+                    <p><i class="fas fa-phone"></i> ${booking.phone_number || 'N/A'}</p>
+                    <p><i class="fas fa-sign-in-alt"></i> Entry: ${formatTime(fromDate)}</p>
+                    <p><i class="fas fa-sign-out-alt"></i> Exit: ${formatTime(untilDate)}</p>
+                    <p><i class="fas fa-clock"></i> Duration: ${durationText}</p>
+                    <p style="font-weight: bold; color: var(--dark-color); text-align: right; margin-top: 5px;">
+                        <i class="fas fa-rupee-sign"></i> ${parseFloat(booking.total_amount || 0).toFixed(2)}
+                    </p>
+                </div>
+                <div class="booking-actions">
+                    <button class="btn-cancel" onclick="showCancelModal('${booking.bill_number || ''}', '${(booking.vehicle_number || '').replace(/'/g, "\\'")}')">
+                        <i class="fas fa-times-circle"></i> Cancel
+                    </button>
+                    <button onclick="showBillDetails('${booking.bill_number || ''}')" style="background: var(--primary-color); color: white; border: none; padding: 8px 15px; border-radius: 6px; cursor: pointer; flex: 1;">
+                        <i class="fas fa-eye"></i> Details
+                    </button>
+                </div>
+            `;
+            
+            container.appendChild(bookingItem);
+            
+        } catch (error) {
+            console.error(`Error displaying booking ${index}:`, error, booking);
+        }
+    });
+}
+
+async function loadBookingHistory() {
+    if (!systemOnline) return;
+    
+    try {
+        const response = await fetch(`${API_BASE}/booking-history/?t=${Date.now()}`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        
+        const bookings = await response.json();
+        displayBookingHistory(bookings);
+        
+    } catch (error) {
+        console.error('Error loading booking history:', error);
+    }
+}
+
+function displayBookingHistory(bookings) {
+    const container = document.getElementById('history-container');
+    
+    const loadingEl = document.getElementById('history-loading');
+    if (loadingEl) loadingEl.style.display = 'none';
+    
+    if (!bookings || bookings.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <i class="fas fa-inbox"></i>
+                <p>No booking history</p>
+            </div>
+        `;
+        return;
+    }
+    
+    bookings.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+    
+    container.innerHTML = '';
+    
+    bookings.forEach(booking => {
+        let statusColor = '#718096';
+        if (booking.status === 'completed') statusColor = 'var(--available-color)';
+        else if (booking.status === 'cancelled') statusColor = 'var(--occupied-color)';
+        else if (booking.status === 'active') statusColor = 'var(--primary-color)';
+        else if (booking.status === 'reserved') statusColor = 'var(--reserved-color)';
+        
+        const bookingItem = document.createElement('div');
+        bookingItem.className = 'booking-item';
+        bookingItem.onclick = () => showBillDetails(booking.bill_number);
+        bookingItem.style.cursor = 'pointer';
+        
+        bookingItem.innerHTML = `
+            <div class="booking-header">
+                <div class="bill-number">${booking.bill_number}</div>
+                <div style="color: #718096; font-size: 0.9rem;">${new Date(booking.created_at).toLocaleDateString()}</div>
+            </div>
+            <div class="booking-details">
+                <p><strong>${booking.vehicle_number}</strong> - ${booking.owner_name}</p>
+                <p><i class="fas fa-parking"></i> Slot: ${booking.parking_slot}</p>
+                <p><i class="fas fa-phone"></i> ${booking.phone_number}</p>
+                <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 5px;">
+                    <span style="font-weight: bold; color: ${statusColor};">
+                        ${booking.status.toUpperCase()}
+                    </span>
+                    <span style="font-weight: bold; color: var(--dark-color);">
+                        <i class="fas fa-rupee-sign"></i> ${parseFloat(booking.total_amount).toFixed(2)}
+                    </span>
+                </div>
+            </div>
+        `;
+        
+        container.appendChild(bookingItem);
+    });
+}
+
+async function searchBills() {
+    const query = document.getElementById('search-input').value.trim();
+    
+    if (!query) {
+        loadBookingHistory();
+        return;
+    }
+    
+    try {
+        const response = await fetch(`${API_BASE}/bookings/search/?q=${encodeURIComponent(query)}`);
+        const bookings = await response.json();
+        displayBookingHistory(bookings);
+    } catch (error) {
+        console.error('Error searching bills:', error);
+        showNotification('Search failed', 'error');
+    }
+}
+
+async function checkSlotStatus(slotNumber = 'A01') {
+    try {
+        const response = await fetch(`${API_BASE}/slot/${slotNumber}/`);
+        if (response.ok) {
+            const slotData = await response.json();
+            
+            const modalContent = document.getElementById('slot-details-content');
+            modalContent.innerHTML = `
+                <div style="color: #4a5568;">
+                    <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                        <strong>Slot Number:</strong>
+                        <span>${slotData.slot_number}</span>
+                    </div>
+                    <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                        <strong>Floor:</strong>
+                        <span>${slotData.floor_number || 'N/A'}</span>
+                    </div>
+                    <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                        <strong>Sensor ID:</strong>
+                        <span>${slotData.sensor_id || 'No Sensor'}</span>
+                    </div>
+                    <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                        <strong>Is Occupied:</strong>
+                        <span style="color: ${slotData.is_occupied ? 'var(--occupied-color)' : 'var(--available-color)'}; font-weight: bold;">
+                            ${slotData.is_occupied ? 'YES' : 'NO'}
+                        </span>
+                    </div>
+                    <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                        <strong>Is Reserved:</strong>
+                        <span style="color: ${slotData.is_reserved ? 'var(--reserved-color)' : 'var(--available-color)'}; font-weight: bold;">
+                            ${slotData.is_reserved ? 'YES' : 'NO'}
+                        </span>
+                    </div>
+                    <div style="margin-top: 20px; padding: 10px; background: #f7fafc; border-radius: 8px;">
+                        <strong>Raw Data:</strong>
+                        <pre style="margin-top: 10px; font-size: 0.8rem; background: #edf2f7; padding: 10px; border-radius: 5px; overflow: auto;">
+${JSON.stringify(slotData, null, 2)}
+                        </pre>
+                    </div>
+                </div>
+            `;
+            
+            document.getElementById('slot-details-modal').classList.add('show');
+            
+            console.log('Slot API Response:', slotData);
+            return slotData;
+        }
+    } catch (error) {
+        console.error('Error checking slot status:', error);
+        showNotification(`Failed to check slot: ${error.message}`, 'error');
+    }
+}
+
+async function resetSlotStatus(slotNumber = 'A01') {
+    try {
+        if (!confirm(`Are you sure you want to reset slot ${slotNumber}? This will clear any reservation status.`)) {
+            return;
+        }
+        
+        const response = await fetch(`${API_BASE}/reset-slot/${slotNumber}/`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            }
+        });
+        
+        if (response.ok) {
+            showNotification(`✅ Slot ${slotNumber} has been reset!`, 'success');
+            setTimeout(() => loadSlots(), 500);
+        } else {
+            const errorData = await response.json();
+            throw new Error(errorData.error || 'Failed to reset slot');
+        }
+    } catch (error) {
+        console.error('Error resetting slot:', error);
+        showNotification(`❌ Failed to reset slot: ${error.message}`, 'error');
+    }
+}
+
+async function checkAllSlotsStatus() {
+    try {
+        const response = await fetch(`${API_BASE}/get-slots/`);
+        const slots = await response.json();
+        
+        const available = slots.filter(s => !s.is_occupied && !s.is_reserved).length;
+        const occupied = slots.filter(s => s.is_occupied).length;
+        const reserved = slots.filter(s => s.is_reserved && !s.is_occupied).length;
+        
+        const a01 = slots.find(s => s.slot_number === 'A01');
+        
+        showNotification(`
+            Total: ${slots.length} | 
+            Available: ${available} | 
+            Occupied: ${occupied} | 
+            Reserved: ${reserved}
+            ${a01 ? `A01: ${a01.is_occupied ? 'Occupied' : a01.is_reserved ? 'Reserved' : 'Available'}` : ''}
+        `, 'info');
+        
+        console.log('All slots:', slots);
+    } catch (error) {
+        console.error('Error checking all slots:', error);
+    }
+}
+
+function toggleDebugControls() {
+    const debugControls = document.getElementById('debug-controls');
+    debugControls.style.display = debugControls.style.display === 'none' ? 'block' : 'none';
+}
+
+async function showBillDetails(billNumber) {
+    try {
+        const response = await fetch(`${API_BASE}/booking/${billNumber}/`);
+        const bill = await response.json();
+        
+        const fromDate = new Date(bill.booked_from);
+        const untilDate = new Date(bill.booked_until);
+        const createdDate = new Date(bill.created_at);
+        
+        const totalDuration = bill.duration_minutes || 0;
+        const durationHours = Math.floor(totalDuration / 60);
+        const durationMinutes = Math.round(totalDuration % 60);
+        let durationText = '';
+        if (durationHours > 0) {
+            durationText = `${durationHours} hour${durationHours !== 1 ? 's' : ''} ${durationMinutes} minute${durationMinutes !== 1 ? 's' : ''}`;
+        } else {
+            durationText = `${durationMinutes} minute${durationMinutes !== 1 ? 's' : ''}`;
+        }
+        
+        const details = document.getElementById('bill-details-content');
+        
+        let statusColor = '#718096';
+        if (bill.status === 'completed') statusColor = 'var(--available-color)';
+        else if (bill.status === 'cancelled') statusColor = 'var(--occupied-color)';
+        else if (bill.status === 'active') statusColor = 'var(--primary-color)';
+        else if (bill.status === 'reserved') statusColor = 'var(--reserved-color)';
+        else if (bill.status === 'paid') statusColor = 'var(--payment-color)';
+        
+        // Store bill amount for UPI deep links
+        currentBillAmount = parseFloat(bill.total_amount).toFixed(2);
+        
+        // Check if there's QR data from backend
+        const qrData = bill.qr_data;
+        const qrContainerId = `qr-container-${billNumber}`;
+        
+        details.innerHTML = `
+            <div style="color: #4a5568;">
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Bill Number:</strong>
+                    <span>${bill.bill_number}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Vehicle:</strong>
+                    <span>${bill.vehicle_number}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Owner:</strong>
+                    <span>${bill.owner_name}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Phone:</strong>
+                    <span>${bill.phone_number}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Parking Slot:</strong>
+                    <span>${bill.parking_slot}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Entry Time:</strong>
+                    <span>${fromDate.toLocaleString()}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Exit Time:</strong>
+                    <span>${untilDate.toLocaleString()}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Duration:</strong>
+                    <span>${durationText}</span>
+                </div>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 10px; padding-bottom: 10px; border-bottom: 1px solid #e2e8f0;">
+                    <strong>Status:</strong>
+                    <span style="font-weight: bold; color: ${statusColor}">
+                        ${bill.status.toUpperCase()}
+                    </span>
+                </div>
+                <div style="font-size: 2rem; font-weight: bold; color: var(--payment-color); text-align: center; margin: 25px 0; padding: 20px; background: #f8f9fa; border-radius: 12px; border: 2px dashed #dee2e6;">
+                    <i class="fas fa-rupee-sign"></i> ${currentBillAmount}
+                    <div style="font-size: 1rem; color: #718096; margin-top: 5px;">Total Amount</div>
+                </div>
+                
+                <!-- QR Code Payment Section -->
+                <div class="qr-code-container">
+                    <h4 style="color: var(--payment-color); margin-bottom: 15px; font-size: 1.3rem;">
+                        <i class="fas fa-qrcode"></i> Pay with QR Code
+                    </h4>
+                    
+                    <div class="qr-code-box">
+                        <div id="${qrContainerId}" style="margin: 0 auto; min-height: 220px; display: flex; flex-direction: column; align-items: center; justify-content: center;">
+                            <div class="spinner" style="margin: 20px auto;"></div>
+                            <p style="color: #718096; margin-top: 10px;">Loading QR Code...</p>
+                        </div>
+                    </div>
+                    
+                    <div class="payment-amount">
+                        <i class="fas fa-rupee-sign"></i> ${currentBillAmount}
+                    </div>
+                    
+                    <!-- UPI Deep Link Buttons -->
+                    <div class="upi-deep-link-buttons">
+                        <button class="upi-deep-link-btn gpay-deep-link" onclick="openGPay('${bill.bill_number}')">
+                            <i class="fab fa-google"></i>
+                            Pay with Google Pay
+                        </button>
+                        <button class="upi-deep-link-btn phonepe-deep-link" onclick="openPhonePe('${bill.bill_number}')">
+                            <i class="fas fa-mobile-alt"></i>
+                            Pay with PhonePe
+                        </button>
+                    </div>
+                    
+                    <div class="upi-apps">
+                        <div class="upi-app google-pay" onclick="openGPay('${bill.bill_number}')" title="Pay with Google Pay">
+                            <i class="fab fa-google"></i>
+                        </div>
+                        <div class="upi-app phonepe" onclick="openPhonePe('${bill.bill_number}')" title="Pay with PhonePe">
+                            <i class="fas fa-mobile-alt"></i>
+                        </div>
+                        <div class="upi-app paytm" onclick="openPaytm('${bill.bill_number}')" title="Pay with Paytm">
+                            <i class="fas fa-wallet"></i>
+                        </div>
+                        <div class="upi-app bhim" onclick="openBHIM('${bill.bill_number}')" title="Pay with BHIM UPI">
+                            <i class="fas fa-university"></i>
+                        </div>
+                    </div>
+                    
+                    <div class="app-store-links">
+                        <a href="https://play.google.com/store/apps/details?id=com.google.android.apps.nbu.paisa.user" target="_blank" class="app-store-link play-store">
+                            <i class="fab fa-google-play"></i> Get Google Pay
+                        </a>
+                        <a href="https://play.google.com/store/apps/details?id=com.phonepe.app" target="_blank" class="app-store-link play-store">
+                            <i class="fab fa-google-play"></i> Get PhonePe
+                        </a>
+                    </div>
+                    
+                    <div class="payment-instructions">
+                        <p><strong>How to Pay:</strong></p>
+                        <ol>
+                            <li>Scan the QR code with any UPI app</li>
+                            <li>OR click on your preferred payment app above</li>
+                            <li>Verify amount and UPI ID</li>
+                            <li>Enter your UPI PIN to complete payment</li>
+                        </ol>
+                        <p style="margin-top: 10px; text-align: center;">
+                            <button onclick="testPayment('${bill.bill_number}')" 
+                                    style="background: var(--payment-color); color: white; border: none; padding: 10px 20px; border-radius: 25px; font-weight: bold; cursor: pointer; display: inline-flex; align-items: center; gap: 8px;">
+                                <i class="fas fa-check-circle"></i>
+                                Confirm Payment
+                            </button>
+                        </p>
+                    </div>
+                    
+                    <div style="margin-top: 15px; color: #718096; font-size: 0.9rem;">
+                        <p><i class="fas fa-shield-alt"></i> Secure payment via UPI</p>
+                        <p style="font-size: 0.8rem; margin-top: 5px;">UPI ID: ${UPI_ID}</p>
+                    </div>
+                </div>
+                
+                <div style="text-align: center; color: #718096; font-size: 0.9rem; margin-top: 20px; padding: 15px; background: #f8f9fa; border-radius: 8px;">
+                    <p><i class="fas fa-info-circle"></i> Bill created on: ${createdDate.toLocaleString()}</p>
+                    <p style="font-size: 0.8rem; margin-top: 10px;">
+                        Need help? Contact support: support@parkingsystem.com
+                    </p>
+                </div>
+            </div>
+        `;
+        
+        // Load QR Code
+        loadQRCode(billNumber, qrContainerId);
+        
+        document.getElementById('bill-modal').classList.add('show');
+        
+        // Update current bill number for payment tracking
+        currentBillNumber = billNumber;
+        
+    } catch (error) {
+        console.error('Error:', error);
+        showNotification('Failed to load bill details', 'error');
+    }
+}
+
+// UPI Deep Link Functions
+function openGPay(billNumber) {
+    const amount = currentBillAmount;
+    const payeeName = encodeURIComponent("Smart Parking System");
+    const transactionNote = encodeURIComponent(`Parking Bill ${billNumber}`);
+    
+    // Google Pay UPI deep link
+    const gpayUrl = `gpay://upi/pay?pa=${UPI_ID}&pn=${payeeName}&am=${amount}&tn=${transactionNote}&cu=INR`;
+    
+    // Open Google Pay app
+    window.location.href = gpayUrl;
+    
+    // Fallback to Play Store if app not installed
+    setTimeout(() => {
+        if (document.hasFocus()) {
+            window.open('https://play.google.com/store/apps/details?id=com.google.android.apps.nbu.paisa.user', '_blank');
+            showNotification('Google Pay not installed. Redirecting to Play Store.', 'warning');
+        }
+    }, 500);
+}
+
+function openPhonePe(billNumber) {
+    const amount = currentBillAmount;
+    const payeeName = encodeURIComponent("Smart Parking System");
+    const transactionNote = encodeURIComponent(`Parking Bill ${billNumber}`);
+    
+    // PhonePe UPI deep link
+    const phonepeUrl = `phonepe://upi/pay?pa=${UPI_ID}&pn=${payeeName}&am=${amount}&tn=${transactionNote}&cu=INR`;
+    
+    // Open PhonePe app
+    window.location.href = phonepeUrl;
+    
+    // Fallback to Play Store if app not installed
+    setTimeout(() => {
+        if (document.hasFocus()) {
+            window.open('https://play.google.com/store/apps/details?id=com.phonepe.app', '_blank');
+            showNotification('PhonePe not installed. Redirecting to Play Store.', 'warning');
+        }
+    }, 500);
+}
+
+function openPaytm(billNumber) {
+    const amount = currentBillAmount;
+    const payeeName = encodeURIComponent("Smart Parking System");
+    const transactionNote = encodeURIComponent(`Parking Bill ${billNumber}`);
+    
+    // Paytm UPI deep link
+    const paytmUrl = `paytmmp://upi/pay?pa=${UPI_ID}&pn=${payeeName}&am=${amount}&tn=${transactionNote}&cu=INR`;
+    
+    // Open Paytm app
+    window.location.href = paytmUrl;
+    
+    // Fallback to Play Store if app not installed
+    setTimeout(() => {
+        if (document.hasFocus()) {
+            window.open('https://play.google.com/store/apps/details?id=net.one97.paytm', '_blank');
+            showNotification('Paytm not installed. Redirecting to Play Store.', 'warning');
+        }
+    }, 500);
+}
+
+function openBHIM(billNumber) {
+    const amount = currentBillAmount;
+    const payeeName = encodeURIComponent("Smart Parking System");
+    const transactionNote = encodeURIComponent(`Parking Bill ${billNumber}`);
+    
+    // BHIM UPI deep link
+    const bhimUrl = `bhim://upi/pay?pa=${UPI_ID}&pn=${payeeName}&am=${amount}&tn=${transactionNote}&cu=INR`;
+    
+    // Open BHIM app
+    window.location.href = bhimUrl;
+    
+    // Fallback to Play Store if app not installed
+    setTimeout(() => {
+        if (document.hasFocus()) {
+            window.open('https://play.google.com/store/apps/details?id=in.org.npci.upiapp', '_blank');
+            showNotification('BHIM UPI not installed. Redirecting to Play Store.', 'warning');
+        }
+    }, 500);
+}
+
+async function loadQRCode(billNumber, containerId) {
+    try {
+        // Fetch QR code from backend
+        const response = await fetch(`${API_BASE}/booking/${billNumber}/qr-code/`);
+        const qrData = await response.json();
+        
+        if (qrData.qr_code) {
+            currentQRCodeData = qrData;
+            
+            const container = document.getElementById(containerId);
+            if (container) {
+                container.innerHTML = '';
+                
+                // Create QR code image
+                const qrImage = document.createElement('img');
+                qrImage.className = 'qr-code-image';
+                qrImage.src = `data:image/png;base64,${qrData.qr_code}`;
+                qrImage.alt = 'Payment QR Code';
+                
+                // Create download button
+                const downloadBtn = document.createElement('button');
+                downloadBtn.className = 'download-qr-btn';
+                downloadBtn.innerHTML = '<i class="fas fa-download"></i> Download QR Code';
+                downloadBtn.onclick = () => downloadQRCode(billNumber);
+                
+                container.appendChild(qrImage);
+                container.appendChild(downloadBtn);
+            }
+        } else {
+            // Fallback: Generate QR code using JavaScript library
+            generateFallbackQRCode(billNumber, containerId);
+        }
+    } catch (error) {
+        console.error('Error loading QR code:', error);
+        // Fallback: Generate QR code using JavaScript library
+        generateFallbackQRCode(billNumber, containerId);
+    }
+}
+
+function generateFallbackQRCode(billNumber, containerId) {
+    try {
+        // Create UPI payment URL
+        const payeeName = encodeURIComponent("Smart Parking System");
+        const transactionNote = encodeURIComponent(`Parking Bill ${billNumber}`);
+        const upiPaymentUrl = `upi://pay?pa=${UPI_ID}&pn=${payeeName}&am=${currentBillAmount}&tn=${transactionNote}&cu=INR`;
+        
+        const container = document.getElementById(containerId);
+        if (container) {
+            container.innerHTML = '';
+            
+            new QRCode(container, {
+                text: upiPaymentUrl,
+                width: 200,
+                height: 200,
+                colorDark: "#000000",
+                colorLight: "#ffffff",
+                correctLevel: QRCode.CorrectLevel.H
+            });
+            
+            // Create download button
+            const downloadBtn = document.createElement('button');
+            downloadBtn.className = 'download-qr-btn';
+            downloadBtn.innerHTML = '<i class="fas fa-download"></i> Download QR Code';
+            downloadBtn.onclick = () => {
+                const qrCanvas = container.querySelector('canvas');
+                if (qrCanvas) {
+                    const link = document.createElement('a');
+                    link.href = qrCanvas.toDataURL('image/png');
+                    link.download = `payment_qr_${billNumber}.png`;
+                    link.click();
+                }
+            };
+            
+            container.appendChild(downloadBtn);
+        }
+    } catch (error) {
+        console.error('Error generating fallback QR code:', error);
+        const container = document.getElementById(containerId);
+        if (container) {
+            container.innerHTML = '<p style="color: #e74c3c;">Failed to load QR code</p>';
+        }
+    }
+}
+
+async function downloadQRCode(billNumber) {
+    try {
+        if (currentQRCodeData && currentQRCodeData.qr_code) {
+            const link = document.createElement('a');
+            link.href = `data:image/png;base64,${currentQRCodeData.qr_code}`;
+            link.download = `payment_qr_${billNumber}.png`;
+            link.click();
+            showNotification('QR Code downloaded!', 'success');
+        } else {
+            // Fallback: Try to download from backend
+            window.open(`${API_BASE}/booking/${billNumber}/qr-image/`, '_blank');
+        }
+    } catch (error) {
+        console.error('Error downloading QR code:', error);
+        showNotification('Failed to download QR code', 'error');
+    }
+}
+
+async function testPayment(billNumber) {
+    try {
+        const response = await fetch(`${API_BASE}/confirm-payment/`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+            body: JSON.stringify({
+                bill_number: billNumber
+            })
+        });
+        
+        if (response.ok) {
+            const data = await response.json();
+            showPaymentSuccess(data.amount, billNumber);
+            showNotification('Payment confirmed successfully!', 'success');
+            
+            // Refresh data
+            setTimeout(() => {
+                loadActiveBookings();
+                loadBookingHistory();
+            }, 1000);
+        } else {
+            throw new Error('Payment confirmation failed');
+        }
+    } catch (error) {
+        console.error('Error confirming payment:', error);
+        showNotification('Payment confirmation failed', 'error');
+    }
+}
+
+function showCancelModal(billNumber, vehicleNumber) {
+    currentBillNumber = billNumber;
+    document.getElementById('cancel-message').innerHTML = `
+        Cancel booking for <strong>${vehicleNumber}</strong>?
+        <br><small>Bill Number: ${billNumber}</small>
+    `;
+    document.getElementById('cancellation-reason').value = '';
+    document.getElementById('cancel-modal').classList.add('show');
+}
+
+async function confirmCancel() {
+    const reason = document.getElementById('cancellation-reason').value;
+    
+    try {
+        const response = await fetch(`${API_BASE}/cancel-booking/`, {
+            method: 'POST',
+            headers: { 
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+            body: JSON.stringify({
+                bill_number: currentBillNumber,
+                cancellation_reason: reason || ''
+            })
+        });
+        
+        const data = await response.json();
+        
+        if (response.ok) {
+            showNotification('✅ Booking cancelled!', 'success');
+            closeModal('cancel-modal');
+            
+            await Promise.all([
+                loadSlots(),
+                loadActiveBookings(),
+                loadBookingHistory()
+            ]);
+        } else {
+            throw new Error(data.error || 'Cancellation failed');
+        }
+    } catch (error) {
+        console.error('Error cancelling booking:', error);
+        showNotification(`❌ ${error.message}`, 'error');
+    }
+}
+
+function closeModal(modalId) {
+    document.getElementById(modalId).classList.remove('show');
+    if (modalId === 'cancel-modal') {
+        currentBillNumber = '';
+    }
+}
+
+function printBill() {
+    window.print();
+}
+
+function showNotification(message, type = 'info') {
+    const notification = document.getElementById('notification');
+    notification.innerHTML = `
+        <i class="fas fa-${type === 'success' ? 'check-circle' : type === 'error' ? 'exclamation-circle' : type === 'payment' ? 'qrcode' : 'info-circle'}"></i>
+        ${message}
+    `;
+    notification.className = `notification ${type} show`;
+    
+    setTimeout(() => {
+        notification.classList.remove('show');
+    }, 3000);
+}
+
+function switchTab(tabName) {
+    document.querySelectorAll('.tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    document.querySelectorAll('.tab-content').forEach(content => {
+        content.classList.remove('active');
+    });
+    
+    event.target.classList.add('active');
+    document.getElementById(`${tabName}-tab`).classList.add('active');
+    
+    if (tabName === 'history') {
+        loadBookingHistory();
+    } else if (tabName === 'active') {
+        loadActiveBookings();
+    }
+}
+
+function refreshAll() {
+    showNotification('Refreshing all data...', 'info');
+    loadSlots();
+    loadActiveBookings();
+    loadBookingHistory();
+}
+
+async function initializeDemoSlots() {
+    try {
+        showNotification('Creating demo slots...', 'info');
+        
+        const response = await fetch(`${API_BASE}/get-slots/`);
+        const existingSlots = await response.json();
+        
+        if (existingSlots && existingSlots.length > 0) {
+            showNotification('Slots already exist!', 'warning');
+            return;
+        }
+        
+        const demoSlots = [
+            { slot_number: 'A01', sensor_id: 'SENSOR_001', floor_number: 1 },
+            { slot_number: 'A02', sensor_id: 'SENSOR_002', floor_number: 1 },
+            { slot_number: 'A03', sensor_id: 'SENSOR_003', floor_number: 1 },
+            { slot_number: 'A04', sensor_id: 'SENSOR_004', floor_number: 1 }
+        ];
+        
+        for (const slotData of demoSlots) {
+            await fetch(`${API_BASE}/slots/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json'
+                },
+                body: JSON.stringify(slotData)
+            });
+        }
+        
+        showNotification('✅ Demo slots created!', 'success');
+        setTimeout(() => loadSlots(), 1000);
+        
+    } catch (error) {
+        console.error('Error creating demo slots:', error);
+        showNotification(`Failed: ${error.message}`, 'error');
+    }
+}
+
+// Payment success function
+function showPaymentSuccess(amount, billNumber) {
+    document.getElementById('payment-amount').textContent = `₹${amount}`;
+    document.getElementById('payment-bill-number').textContent = billNumber;
+    document.getElementById('payment-success-modal').classList.add('show');
+    
+    // Animate the modal
+    const modalContent = document.querySelector('#payment-success-modal .modal-content');
+    modalContent.classList.add('payment-success');
+    
+    // Close bill modal if open
+    closeModal('bill-modal');
+}
+
+// Make functions available globally
+window.searchBills = searchBills;
+window.showBillDetails = showBillDetails;
+window.printBill = printBill;
+window.closeModal = closeModal;
+window.createBooking = createBooking;
+window.confirmCancel = confirmCancel;
+window.showCancelModal = showCancelModal;
+window.testBackendConnection = testBackendConnection;
+window.initializeDemoSlots = initializeDemoSlots;
+window.refreshAll = refreshAll;
+window.switchTab = switchTab;
+window.checkSlotStatus = checkSlotStatus;
+window.resetSlotStatus = resetSlotStatus;
+window.checkAllSlotsStatus = checkAllSlotsStatus;
+window.toggleDebugControls = toggleDebugControls;
+window.showPaymentSuccess = showPaymentSuccess;
+window.testPayment = testPayment;
+window.downloadQRCode = downloadQRCode;
+window.openGPay = openGPay;
+window.openPhonePe = openPhonePe;
+window.openPaytm = openPaytm;
+window.openBHIM = openBHIM;
+
+console.log('✅ Smart Parking System initialized with UPI Deep Links');